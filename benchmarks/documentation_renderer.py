@@ -0,0 +1,183 @@
+"""
+documentation_renderer compares how long a DocumentationWidget takes to show
+    its documentation, and how much memory it adds, with each renderer.
+
+Usage:
+    python benchmarks/documentation_renderer.py [--runs 5] [--tokens 50]
+
+Each renderer is measured in `--runs` new interpreters, from creating the
+    widget until the Tokens tab has finished loading its html.
+Memory is the growth in resident memory of the interpreter and any processes
+    it started, such as the web engine's render process, so it is only
+    reported where `/proc` is available.
+Set `QT_QPA_PLATFORM=offscreen` to run it without a display.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import timeit
+
+RENDERERS = ("text", "web")
+_LOAD_TIMEOUT = 30.0
+
+
+def _children(pid):
+    children = []
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open("/proc/{}/stat".format(name)) as fh:
+                # The command name is in brackets and may contain spaces.
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except (IOError, OSError):
+            continue
+        if int(fields[1]) == pid:
+            children.append(int(name))
+    return children
+
+
+def process_tree_rss(pid=None):
+    """
+    process_tree_rss returns the resident memory, in bytes, of the process
+        `pid` and every process it started.
+
+    :param int|None pid: Optional process id, defaults to this process.
+    :return: The resident memory, or `None` if `/proc` is not available.
+    :rtype: int|None
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    pid = os.getpid() if pid is None else pid
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open("/proc/{}/status".format(current)) as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+        except (IOError, OSError):
+            continue
+        pending.extend(_children(current))
+    return total
+
+
+def _make_parser(token_count):
+    from sept import PathTemplateParser, Token
+
+    tokens = []
+    for index in range(token_count):
+        name = "token{}".format(index)
+        tokens.append(
+            type(
+                str(name),
+                (Token,),
+                {
+                    "__doc__": (
+                        "The <code>{name}</code> Token returns the "
+                        '<b>"{name}"</b> value.<br>'
+                        "<ul><li>Example: <code>{{{{{name}}}}}</code></li></ul>"
+                    ).format(name=name),
+                    "name": name,
+                    "getValue": lambda self, data, name=name: data.get(name),
+                },
+            )
+        )
+    return PathTemplateParser(additional_tokens=tokens)
+
+
+def measure(renderer, token_count):
+    """
+    measure shows a DocumentationWidget with `renderer` and returns the
+        seconds until its Tokens tab finished loading and the bytes of
+        resident memory it added.
+
+    :param str renderer: Renderer passed to the DocumentationWidget.
+    :param int token_count: Number of documented Tokens to display.
+    :rtype: tuple[float, int|None]
+    """
+    from Qt import QtCore, QtWidgets
+
+    from sept_qt import DocumentationWidget
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    parser = _make_parser(token_count)
+    app.processEvents()
+    rss_before = process_tree_rss()
+
+    start = timeit.default_timer()
+    widget = DocumentationWidget(parser, renderer=renderer)
+    view = widget.widget(0)
+    loop = QtCore.QEventLoop()
+    if hasattr(view, "loadFinished"):
+        view.loadFinished.connect(loop.quit)
+        QtCore.QTimer.singleShot(int(_LOAD_TIMEOUT * 1000), loop.quit)
+        widget.show()
+        loop.exec_()
+    else:
+        widget.show()
+        app.processEvents()
+    elapsed = timeit.default_timer() - start
+
+    rss_after = process_tree_rss()
+    widget.close()
+    if rss_before is None or rss_after is None:
+        return elapsed, None
+    return elapsed, rss_after - rss_before
+
+
+def _run(renderer, token_count):
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--measure",
+            renderer,
+            "--tokens",
+            str(token_count),
+        ]
+    )
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--measure", choices=RENDERERS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        print(json.dumps(measure(args.measure, args.tokens)))
+        return
+
+    print("{:<10} {:>16} {:>16}".format("renderer", "median (ms)", "memory (MiB)"))
+    for renderer in RENDERERS:
+        try:
+            results = [_run(renderer, args.tokens) for _ in range(args.runs)]
+        except subprocess.CalledProcessError:
+            print("{:<10} {:>16}".format(renderer, "failed"))
+            continue
+        timings = sorted(elapsed for elapsed, _ in results)
+        memory = sorted(rss for _, rss in results if rss is not None)
+        print(
+            "{:<10} {:>16.1f} {:>16}".format(
+                renderer,
+                timings[len(timings) // 2] * 1000,
+                (
+                    "{:.1f}".format(memory[len(memory) // 2] / 1024.0 / 1024.0)
+                    if memory
+                    else "-"
+                ),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+import_time measures how long importing sept_qt, and each of its widgets,
+    takes in a fresh Python interpreter.
+
+Usage:
+    python benchmarks/import_time.py [--runs 10] [--path /other/checkout]
+
+Each statement is timed in `--runs` new interpreters and the fastest and
+    median times are printed, so the numbers reflect a cold import rather
+    than modules already cached in `sys.modules`.
+Pass `--path` to time another checkout, eg. to compare before and after a
+    change.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+STATEMENTS = (
+    "import sept_qt",
+    "from sept_qt import TemplateInputWidget",
+    "from sept_qt import TemplatePreviewWidget",
+    "from sept_qt import DocumentationWidget",
+)
+_TIMER = (
+    "import sys, timeit; sys.path.insert(0, {path!r}); "
+    "start = timeit.default_timer(); {statement}; "
+    "print(timeit.default_timer() - start)"
+)
+
+
+def time_statement(statement, path, runs):
+    """
+    time_statement returns the seconds `statement` took in each of `runs`
+        fresh interpreters, with `path` first on `sys.path`.
+
+    :param str statement: Import statement to time.
+    :param str path: Checkout containing the sept_qt package.
+    :param int runs: Number of interpreters to time it in.
+    :rtype: list[float]
+    """
+    code = _TIMER.format(path=path, statement=statement)
+    return [
+        float(subprocess.check_output([sys.executable, "-c", code]).strip())
+        for _ in range(runs)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument(
+        "--path", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    args = parser.parse_args(argv)
+
+    print("{:<45} {:>10} {:>12}".format("statement", "min (ms)", "median (ms)"))
+    for statement in STATEMENTS:
+        timings = sorted(time_statement(statement, args.path, args.runs))
+        print(
+            "{:<45} {:>10.1f} {:>12.1f}".format(
+                statement, timings[0] * 1000, timings[len(timings) // 2] * 1000
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,55 @@
-from .documentation_widget import DocumentationWidget
-from .input_widget import TemplateInputWidget
-from .preview_widget import TemplatePreviewWidget
-from .file_input_widget import FileTemplateInputWidget
+import importlib
+import sys
 
-from ._version import get_versions
+# Each widget is imported from its module the first time it is accessed so
+#   that, for example, using TemplateInputWidget never pulls in the web
+#   engine that DocumentationWidget needs.
+_LAZY_ATTRIBUTES = {
+    "DocumentationWidget": ".documentation_widget",
+    "TemplateInputWidget": ".input_widget",
+    "TemplatePreviewWidget": ".preview_widget",
+    "FileTemplateInputWidget": ".file_input_widget",
+    "TemplateLibraryWidget": ".template_library",
+}
 
-__version__ = get_versions()["version"]
-del get_versions
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+def _get_version():
+    # get_versions may shell out to git in a source checkout, so it is only
+    #   called the first time __version__ is read. Built packages contain a
+    #   _version.py with the version frozen in by versioneer.
+    from ._version import get_versions
+
+    return get_versions()["version"]
+
+
+def __getattr__(name):
+    if name == "__version__":
+        value = _get_version()
+        globals()[name] = value
+        return value
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(
+            "module {module!r} has no attribute {name!r}".format(
+                module=__name__, name=name
+            )
+        )
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | {"__version__"})
+
+
+if sys.version_info < (3, 7):
+    # Module level __getattr__ (PEP 562) is not available, import eagerly.
+    __version__ = _get_version()
+    from .documentation_widget import DocumentationWidget
+    from .input_widget import TemplateInputWidget
+    from .preview_widget import TemplatePreviewWidget
+    from .file_input_widget import FileTemplateInputWidget
+    from .template_library import TemplateLibraryWidget
@@ -0,0 +1,409 @@
+import contextlib
+import itertools
+import threading
+import time
+
+from six.moves import queue
+
+from .dataset_cache import query_key
+from .derived_fields import enrich_record
+from .field_usage import template_data_fields
+from .worker_pool import WorkerPool
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_DELAY = 0.5
+
+VERSION_FIELDS = (
+    "code",
+    "description",
+    "user.HumanUser.firstname",
+    "user.HumanUser.lastname",
+    "user.HumanUser.name",
+    "sg_status_list",
+    "project.Project.tank_name",
+    "project.Project.code",
+    "entity.Shot.code",
+    "entity.Shot.sg_sequence.Sequence.code",
+    "entity.Sequence.code",
+    "published_files",
+)
+PUBLISHED_FILE_FIELDS = ("version_number", "path")
+
+# Connection and socket errors, which are worth retrying.
+TRANSIENT_ERRORS = (IOError, OSError)
+
+# Pages are only consistent with each other if the order is fixed.
+_ID_ORDER = [{"field_name": "id", "direction": "asc"}]
+
+
+def chunked(values, size):
+    """
+    chunked splits `values` in to lists of at most `size` items.
+
+    :param list values: Values to split.
+    :param int size: Maximum number of values per chunk.
+    :rtype: iterator[list]
+    """
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class ConnectionPool(object):
+    """
+    ConnectionPool hands out at most `size` ShotGrid connections at a time,
+        reusing idle connections and only creating new ones with `factory`
+        when every existing connection is busy.
+
+    `shotgun_api3.Shotgun` connections can not be shared between threads, so
+        each thread borrows its own through `connection`.
+    It is safe to share a single pool between threads.
+    """
+
+    def __init__(self, factory=None, size=1, connections=()):
+        """
+        :param callable|None factory: Optional callable returning a new
+            connection. Without one the pool only holds `connections`.
+        :param int size: Maximum number of connections in use at once.
+        :param iterable connections: Optional existing connections to reuse.
+        """
+        super(ConnectionPool, self).__init__()
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        for connection in connections:
+            self._idle.put(connection)
+        if factory is None:
+            size = min(size, self._idle.qsize())
+        self.size = max(size, 1)
+        self._semaphore = threading.BoundedSemaphore(self.size)
+
+    @contextlib.contextmanager
+    def connection(self):
+        """
+        connection borrows a connection for the duration of the context,
+            blocking while `size` connections are in use.
+        If an error is raised while it is borrowed the connection is dropped,
+            in case the error left it broken, unless there is no `factory` to
+            replace it.
+
+        :return: Context manager yielding a connection.
+        """
+        with self._semaphore:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self.factory()
+            broken = True
+            try:
+                yield connection
+                broken = False
+            finally:
+                if not broken or self.factory is None:
+                    self._idle.put(connection)
+
+
+class ShotGridLoader(object):
+    """
+    ShotGridLoader loads datasets for the `sept_qt.TemplatePreviewWidget`
+        from a `shotgun_api3.Shotgun` connection.
+
+    Queries are fetched a page at a time rather than with one unbounded
+        `find` call, and linked PublishedFiles missing fields are fetched in
+        batches by their id and joined back on to their Versions through a
+        dictionary, so loading scales linearly with the number of records.
+
+    *Concurrent Fetching*
+    Fetching page after page is dominated by the round trip to ShotGrid.
+    Passing a `connection_factory` and `max_workers` fetches up to
+        `max_workers` pages at once on a `sept_qt.worker_pool.WorkerPool`,
+        each over a connection borrowed from a `ConnectionPool`, so both the
+        threads and the connections are reused between pages and batches.
+    Pages are still yielded in order by `iter_pages` and `iter_versions`.
+    Requests failing with one of `TRANSIENT_ERRORS` are retried up to
+        `retries` times, waiting twice as long after each failure.
+
+    *Caching*
+    If a `sept_qt.dataset_cache.DatasetCache` is passed as `cache`, loaded
+        Versions are stored in it and `load_versions` returns them from the
+        cache until they expire.
+    Use `cached_versions` to show the cached Versions straight away, even
+        expired ones, while fresh ones are loaded in the background, see
+        `sept_qt.TemplatePreviewWidget.load_versions`.
+
+    *Derived Fields*
+    Any `sept_qt.derived_fields.DerivedField` passed in `derived_fields` is
+        computed once for each loaded Version and stored on it, see
+        `sept_qt.derived_fields.PUBLISHED_FILE_FIELDS`.
+
+    *Field Projection*
+    `fields_for_template` works out which fields a template reads from the
+        `data_fields` declared on its Tokens, so only those are requested.
+    """
+
+    def __init__(
+        self,
+        sg,
+        page_size=None,
+        batch_size=None,
+        cache=None,
+        derived_fields=(),
+        connection_factory=None,
+        max_workers=None,
+        retries=None,
+    ):
+        """
+        :param shotgun_api3.Shotgun sg: Connection to ShotGrid, or anything
+            with a compatible `find` method.
+        :param int|None page_size: Optional number of records per page,
+            defaults to 500 which is the most ShotGrid returns per page.
+        :param int|None batch_size: Optional number of ids to fetch per
+            PublishedFile query.
+        :param sept_qt.dataset_cache.DatasetCache|None cache: Optional cache
+            of loaded Versions.
+        :param iterable[sept_qt.derived_fields.DerivedField] derived_fields:
+            Optional fields to compute for each loaded Version.
+        :param callable|None connection_factory: Optional callable returning
+            a new connection, needed to make requests concurrently.
+        :param int|None max_workers: Optional maximum number of requests
+            made at once, only used with a `connection_factory`.
+        :param int|None retries: Optional number of times a request failing
+            with a transient error is retried, defaults to 3.
+        """
+        super(ShotGridLoader, self).__init__()
+        self.sg = sg
+        self.page_size = page_size or DEFAULT_PAGE_SIZE
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.cache = cache
+        self.derived_fields = tuple(derived_fields)
+        self.retries = DEFAULT_RETRIES if retries is None else retries
+        self.retry_delay = DEFAULT_RETRY_DELAY
+        self.pool = ConnectionPool(
+            connection_factory, max_workers or 1, connections=[sg]
+        )
+        self.worker_pool = WorkerPool(self.pool.size)
+
+    @property
+    def max_workers(self):
+        return self.pool.size
+
+    def _find(self, entity_type, filters, **kwargs):
+        """
+        _find runs `find` on a connection borrowed from the pool, retrying
+            transient errors.
+        """
+        for attempt in itertools.count():
+            try:
+                with self.pool.connection() as sg:
+                    return sg.find(entity_type, filters, **kwargs)
+            except TRANSIENT_ERRORS:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.retry_delay * 2**attempt)
+
+    def _fetch_page(self, entity_type, filters, fields, page):
+        # The page size has to stay the same for every page, ShotGrid works
+        #   out where a page starts from it.
+        return self._find(
+            entity_type,
+            filters,
+            fields=list(fields),
+            order=_ID_ORDER,
+            limit=self.page_size,
+            page=page,
+        )
+
+    def iter_pages(self, entity_type, filters, fields, limit=None):
+        """
+        iter_pages yields the records matching `filters` one page at a time,
+            in order.
+
+        :param str entity_type: ShotGrid entity type, eg "Version".
+        :param list filters: ShotGrid filters.
+        :param list[str] fields: Fields to return for each record.
+        :param int|None limit: Optional maximum number of records.
+        :rtype: iterator[list[dict]]
+        """
+        # Updated by the jobs so no more pages are asked for past the end.
+        last_page = [None]
+        if limit is not None:
+            last_page[0] = max(-(-limit // self.page_size), 1)
+        lock = threading.Lock()
+
+        def _fetch(page):
+            records = self._fetch_page(entity_type, filters, fields, page)
+            if len(records) < self.page_size:
+                with lock:
+                    last_page[0] = min(page, last_page[0] or page)
+            return records
+
+        def _tasks():
+            for page in itertools.count(1):
+                with lock:
+                    if last_page[0] is not None and page > last_page[0]:
+                        return
+                yield page, lambda page=page: _fetch(page)
+
+        pages = self.worker_pool.imap_unordered(_tasks())
+        fetched = {}
+        next_page = 1
+        remaining = limit
+        try:
+            for page, records in pages:
+                fetched[page] = records
+                # Pages can complete out of order when fetched concurrently.
+                while next_page in fetched:
+                    records = fetched.pop(next_page)
+                    if remaining is not None:
+                        records = records[:remaining]
+                        remaining -= len(records)
+                    if records:
+                        yield records
+                    if next_page == last_page[0]:
+                        return
+                    next_page += 1
+        finally:
+            pages.close()
+
+    def find(self, entity_type, filters, fields, limit=None):
+        """
+        find returns every record matching `filters`, fetched a page at a
+            time.
+
+        :param str entity_type: ShotGrid entity type, eg "Version".
+        :param list filters: ShotGrid filters.
+        :param list[str] fields: Fields to return for each record.
+        :param int|None limit: Optional maximum number of records.
+        :rtype: list[dict]
+        """
+        records = []
+        for page in self.iter_pages(entity_type, filters, fields, limit=limit):
+            records.extend(page)
+        return records
+
+    def backfill_published_files(self, versions, fields=PUBLISHED_FILE_FIELDS):
+        """
+        backfill_published_files fills in the `fields` of every PublishedFile
+            linked to `versions` that is missing any of them.
+
+        Each PublishedFile is fetched once, even if it is linked to many
+            Versions, in batches of `batch_size` ids.
+
+        :param list[dict] versions: Versions with "published_files" links,
+            updated in place.
+        :param list[str] fields: PublishedFile fields to fill in.
+        :return: The updated `versions`.
+        :rtype: list[dict]
+        """
+        links_by_id = {}
+        for version in versions:
+            for published_file in version.get("published_files") or []:
+                if not all(published_file.get(field) for field in fields):
+                    links_by_id.setdefault(published_file.get("id"), []).append(
+                        published_file
+                    )
+
+        tasks = (
+            (
+                index,
+                lambda ids=ids: self._find(
+                    "PublishedFile", [["id", "in", ids]], fields=list(fields)
+                ),
+            )
+            for index, ids in enumerate(chunked(list(links_by_id), self.batch_size))
+        )
+        for _, results in self.worker_pool.imap_unordered(tasks):
+            for result in results:
+                for published_file in links_by_id.get(result.get("id"), []):
+                    for field in fields:
+                        published_file[field] = result.get(field)
+        return versions
+
+    def fields_for_template(self, template, parser=None, fields=VERSION_FIELDS):
+        """
+        fields_for_template returns the fields to request for `template` to
+            resolve, see `sept_qt.field_usage.template_data_fields`.
+
+        :param sept.Template template: Validated template.
+        :param sept.PathTemplateParser|None parser: Optional parser the
+            template was validated by.
+        :param list[str] fields: Fields to fall back to if any Token used by
+            the template does not declare the fields it reads.
+        :rtype: tuple[str]
+        """
+        used_fields = template_data_fields(template, parser, self.derived_fields)
+        if used_fields is None:
+            return tuple(fields)
+        return used_fields
+
+    def _versions_key(self, filters, fields, limit):
+        derived_names = [derived_field.name for derived_field in self.derived_fields]
+        return query_key("Version", filters, fields, limit, derived_names)
+
+    def cached_versions(self, filters, fields=VERSION_FIELDS, limit=None):
+        """
+        cached_versions returns the Versions `load_versions` cached for the
+            same arguments, without touching ShotGrid.
+
+        :param list filters: ShotGrid filters.
+        :param list[str] fields: Version fields.
+        :param int|None limit: Optional maximum number of Versions.
+        :return: The cached Versions, which may have expired, or `None` if
+            nothing is cached or there is no `cache`.
+        :rtype: sept_qt.dataset_cache.CachedDataset|None
+        """
+        if self.cache is None:
+            return None
+        return self.cache.get(self._versions_key(filters, fields, limit))
+
+    def iter_versions(self, filters, fields=VERSION_FIELDS, limit=None, refresh=False):
+        """
+        iter_versions yields the Versions matching `filters` a page at a
+            time, with the version number and path of their PublishedFiles
+            filled in.
+
+        If there is a `cache`, the Versions cached by a previous call are
+            yielded as a single page instead until they expire. Otherwise
+            they are cached once the last page has been yielded.
+
+        :param list filters: ShotGrid filters.
+        :param list[str] fields: Version fields to return, should include
+            "published_files".
+        :param int|None limit: Optional maximum number of Versions.
+        :param bool refresh: Whether to load from ShotGrid even if the cached
+            Versions have not expired.
+        :rtype: iterator[list[dict]]
+        """
+        if not refresh:
+            cached = self.cached_versions(filters, fields, limit)
+            if cached is not None and not cached.expired:
+                yield cached.records
+                return
+        versions = []
+        for page in self.iter_pages("Version", filters, fields, limit=limit):
+            self.backfill_published_files(page)
+            for version in page:
+                enrich_record(version, self.derived_fields)
+            versions.extend(page)
+            yield page
+        if self.cache is not None:
+            self.cache.put(
+                self._versions_key(filters, fields, limit), versions, "Version"
+            )
+
+    def load_versions(self, filters, fields=VERSION_FIELDS, limit=None, refresh=False):
+        """
+        load_versions returns every Version from `iter_versions`.
+
+        :param list filters: ShotGrid filters.
+        :param list[str] fields: Version fields to return, should include
+            "published_files".
+        :param int|None limit: Optional maximum number of Versions.
+        :param bool refresh: Whether to load from ShotGrid even if the cached
+            Versions have not expired.
+        :rtype: list[dict]
+        """
+        versions = []
+        for page in self.iter_versions(filters, fields, limit, refresh):
+            versions.extend(page)
+        return versions
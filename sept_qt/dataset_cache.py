@@ -0,0 +1,154 @@
+import collections
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+
+from . import sqlite_store
+
+SCHEMA_VERSION = 1
+CHUNK_SIZE = 1000
+_TABLES = [
+    (
+        "datasets",
+        "key TEXT PRIMARY KEY, entity_type TEXT, fetched_at REAL, "
+        "record_count INTEGER",
+    ),
+    ("chunks", "key TEXT, chunk INTEGER, data BLOB, PRIMARY KEY (key, chunk)"),
+]
+
+CachedDataset = collections.namedtuple(
+    "CachedDataset", ("records", "fetched_at", "expired")
+)
+
+
+def query_key(entity_type, filters, fields, limit=None, derived_fields=()):
+    """
+    query_key returns the key a dataset is cached under.
+    The order of `fields` and `derived_fields` does not matter, the order of
+        `filters` does.
+
+    :param str entity_type: ShotGrid entity type, eg "Version".
+    :param list filters: ShotGrid filters.
+    :param list[str] fields: Fields of each record.
+    :param int|None limit: Optional maximum number of records.
+    :param iterable[str] derived_fields: Optional names of the derived fields
+        computed for each record, so records cached without them are not
+        used where they are expected.
+    :rtype: str
+    """
+    query = [entity_type, filters, sorted(fields), limit]
+    derived_fields = sorted(derived_fields)
+    if derived_fields:
+        query.append(derived_fields)
+    payload = json.dumps(query, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class DatasetCache(object):
+    """
+    DatasetCache keeps datasets fetched from ShotGrid in a local SQLite
+        database so they can be shown straight away the next time they are
+        needed.
+
+    Datasets are keyed by their query, see `query_key`, and stored as zlib
+        compressed chunks of `CHUNK_SIZE` records.
+    Datasets older than `ttl` seconds are still returned, but flagged as
+        expired so the caller knows to fetch them again.
+
+    The cache holds no open connection between calls, so a
+        `sept_qt.data.ShotGridLoader` can store the Versions it loads from
+        its worker thread while the preview reads cached ones.
+    """
+
+    DEFAULT_TTL = 60 * 60.0
+
+    def __init__(self, path, ttl=None):
+        """
+        :param str path: Path of the SQLite database, created if needed.
+        :param float|None ttl: Optional number of seconds a dataset is fresh
+            for, defaults to an hour.
+        """
+        super(DatasetCache, self).__init__()
+        self.path = path
+        self.ttl = self.DEFAULT_TTL if ttl is None else ttl
+        sqlite_store.create_schema(path, SCHEMA_VERSION, _TABLES)
+
+    def _connect(self):
+        return sqlite_store.connect(self.path)
+
+    def get(self, key):
+        """
+        get returns the dataset cached under `key`, even if it has expired.
+
+        :param str key: Key from `query_key`.
+        :return: The cached dataset or `None` if nothing is cached.
+        :rtype: CachedDataset|None
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT fetched_at FROM datasets WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            chunks = connection.execute(
+                "SELECT data FROM chunks WHERE key = ? ORDER BY chunk", (key,)
+            ).fetchall()
+        records = []
+        for (data,) in chunks:
+            records.extend(json.loads(zlib.decompress(data).decode("utf-8")))
+        fetched_at = row[0]
+        return CachedDataset(records, fetched_at, time.time() - fetched_at >= self.ttl)
+
+    def put(self, key, records, entity_type=None):
+        """
+        put replaces the dataset cached under `key` with `records`.
+
+        :param str key: Key from `query_key`.
+        :param list[dict] records: JSON serializable records.
+        :param str|None entity_type: Optional entity type of the records,
+            stored so `clear` can remove every dataset of a type.
+        """
+        rows = [
+            (
+                key,
+                index,
+                sqlite3.Binary(
+                    zlib.compress(
+                        json.dumps(
+                            records[start : start + CHUNK_SIZE],
+                            separators=(",", ":"),
+                        ).encode("utf-8")
+                    )
+                ),
+            )
+            for index, start in enumerate(range(0, len(records), CHUNK_SIZE))
+        ]
+        with self._connect() as connection:
+            connection.execute("DELETE FROM chunks WHERE key = ?", (key,))
+            connection.executemany("INSERT INTO chunks VALUES (?, ?, ?)", rows)
+            connection.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?)",
+                (key, entity_type, time.time(), len(records)),
+            )
+
+    def clear(self, entity_type=None):
+        """
+        clear removes every cached dataset, or only those of `entity_type`.
+
+        :param str|None entity_type: Optional entity type to remove.
+        """
+        with self._connect() as connection:
+            if entity_type is None:
+                connection.execute("DELETE FROM chunks")
+                connection.execute("DELETE FROM datasets")
+                return
+            connection.execute(
+                "DELETE FROM chunks WHERE key IN "
+                "(SELECT key FROM datasets WHERE entity_type = ?)",
+                (entity_type,),
+            )
+            connection.execute(
+                "DELETE FROM datasets WHERE entity_type = ?", (entity_type,)
+            )
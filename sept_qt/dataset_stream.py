@@ -0,0 +1,158 @@
+import contextlib
+import gzip
+import io
+import itertools
+import json
+import numbers
+
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_READ_SIZE = 64 * 1024
+DEFAULT_MAX_ITEM_SIZE = 64 * 1024 * 1024
+_GZIP_EXTENSION = ".gz"
+_WHITESPACE = " \t\r\n"
+_NUMBER_CHARACTERS = "0123456789+-.eE"
+
+
+@contextlib.contextmanager
+def open_dataset_stream(path):
+    """
+    open_dataset_stream opens `path` as a utf-8 text stream, decompressing it
+        if it ends in ".gz".
+
+    :param str path: Path to a JSON or NDJSON dataset.
+    :return: Context manager yielding a readable text stream.
+    """
+    if path.lower().endswith(_GZIP_EXTENSION):
+        raw = gzip.open(path, "rb")
+    else:
+        raw = io.open(path, "rb")
+    with raw:
+        yield io.TextIOWrapper(raw, encoding="utf-8")
+
+
+def _iter_ndjson(stream):
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def _may_be_cut_short(item, buffer, end):
+    """
+    _may_be_cut_short returns whether `item`, decoded from `buffer` up to
+        `end`, is a number that may continue past the end of the buffer, eg.
+        "2" read from the start of "2.5", so it is only trusted once more has
+        been read.
+    """
+    if not isinstance(item, numbers.Number) or isinstance(item, bool):
+        return False
+    while end < len(buffer):
+        if buffer[end] not in _NUMBER_CHARACTERS:
+            return False
+        end += 1
+    return True
+
+
+def _iter_json_array(stream, buffer, read_size, max_item_size):
+    """
+    _iter_json_array yields the items of the top level JSON array in
+        `stream`, decoding one item at a time from a small buffer.
+        `buffer` holds whatever was already read past the opening bracket.
+    An item that is still incomplete after `max_item_size` characters raises
+        a ValueError rather than buffering the rest of the file.
+    """
+    decoder = json.JSONDecoder()
+    position = 0
+    eof = False
+    while True:
+        # Skip the whitespace and comma between items.
+        while position < len(buffer) and buffer[position] in _WHITESPACE + ",":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        if position == len(buffer):
+            if eof:
+                raise ValueError("Unterminated JSON array")
+            buffer, position = stream.read(read_size), 0
+            eof = not buffer
+            continue
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            item, end = None, None
+        if end is None or (not eof and _may_be_cut_short(item, buffer, end)):
+            if eof:
+                raise ValueError(
+                    "Invalid JSON array item at {!r}".format(buffer[position:][:40])
+                )
+            pending = len(buffer) - position
+            if pending > max_item_size:
+                raise ValueError(
+                    "JSON array item at {item!r} is larger than {size} "
+                    "characters".format(item=buffer[position:][:40], size=max_item_size)
+                )
+            # Reading as much again as is pending keeps decoding attempts on
+            #   a large item linear.
+            data = stream.read(max(read_size, pending))
+            eof = not data
+            buffer, position = buffer[position:] + data, 0
+            continue
+        yield item
+        position = end
+
+
+def iter_records(
+    path, read_size=DEFAULT_READ_SIZE, max_item_size=DEFAULT_MAX_ITEM_SIZE
+):
+    """
+    iter_records lazily yields every record in a JSON or NDJSON dataset.
+
+    A file starting with "[" is read as a JSON array whose items are decoded
+        one at a time, anything else is read as NDJSON with one record per
+        line. Files ending in ".gz" are decompressed as they are read.
+    Only the current record and `read_size` characters of the file are held
+        in memory, so the first records are available straight away no
+        matter how big the file is.
+
+    :param str path: Path to a JSON or NDJSON dataset.
+    :param int read_size: Number of characters read from a JSON array at a
+        time.
+    :param int max_item_size: Maximum number of characters in one item of a
+        JSON array, a larger or malformed item raises a ValueError.
+    :rtype: generator[dict]
+    """
+    with open_dataset_stream(path) as stream:
+        buffer = stream.read(read_size)
+        while buffer and not buffer.lstrip(_WHITESPACE):
+            buffer = stream.read(read_size)
+        buffer = buffer.lstrip(_WHITESPACE)
+        if buffer.startswith("["):
+            for record in _iter_json_array(
+                stream, buffer[1:], read_size, max_item_size
+            ):
+                yield record
+            return
+        # The buffer may end part way through a line, so the rest of that
+        #   line is read before the buffered lines are decoded.
+        buffered_lines = io.StringIO(buffer + stream.readline())
+        for record in _iter_ndjson(itertools.chain(buffered_lines, stream)):
+            yield record
+
+
+def iter_record_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    iter_record_chunks yields the records of a dataset in lists of at most
+        `chunk_size` records, see `iter_records`.
+
+    :param str path: Path to a JSON or NDJSON dataset.
+    :param int chunk_size: Maximum number of records per list.
+    :rtype: generator[list[dict]]
+    """
+    chunk = []
+    for record in iter_records(path):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
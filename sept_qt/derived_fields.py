@@ -0,0 +1,153 @@
+import abc
+import os
+
+import six
+
+_FILE_URL_PREFIX = "file://"
+
+
+@six.add_metaclass(abc.ABCMeta)
+class DerivedField(object):
+    """
+    DerivedField is a value computed once from each record when a dataset is
+        loaded and stored on the record under `name`.
+
+    Tokens can then read the flat key with a single `data.get(name)` instead
+        of walking nested data every time a template is resolved.
+    DerivedField is an abstract base class, subclasses implement `compute`
+        and list the record fields it reads in `fields`, so loaders know to
+        request them.
+    """
+
+    name = None
+    fields = ()
+
+    def __init__(self, name=None):
+        """
+        :param str|None name: Optional key to store the value under,
+            overriding the class `name`.
+        """
+        super(DerivedField, self).__init__()
+        if name is not None:
+            self.name = name
+
+    @abc.abstractmethod
+    def compute(self, record):
+        """
+        :param dict record: Record to compute the value from.
+        :return: The derived value.
+        """
+
+    def get(self, record):
+        """
+        get returns the value stored on `record`, computing it instead if the
+            record was not enriched, eg. it was cached before this field
+            existed.
+
+        :param dict record: Record to read the value from.
+        :return: The derived value.
+        """
+        if self.name in record:
+            return record[self.name]
+        return self.compute(record)
+
+
+class FirstNestedValue(DerivedField):
+    """
+    FirstNestedValue is the first truthy `field` of the dictionaries in the
+        `source` list of a record, eg. the "version_number" of the first
+        "published_files" entry that has one.
+    """
+
+    def __init__(self, name, source, field):
+        """
+        :param str name: Key to store the value under.
+        :param str source: Key of the list of nested dictionaries.
+        :param str field: Key to read from each nested dictionary.
+        """
+        super(FirstNestedValue, self).__init__(name)
+        self.source = source
+        self.field = field
+        self.fields = (source,)
+
+    def compute(self, record):
+        for item in record.get(self.source) or []:
+            value = item.get(self.field)
+            if value:
+                return value
+        return None
+
+
+def published_file_local_path(published_file):
+    """
+    published_file_local_path returns the local path of a PublishedFile from
+        its "path" field, or `None` if it does not have a local path.
+
+    :param dict published_file: PublishedFile with a "path" field.
+    :rtype: str|None
+    """
+    path = published_file.get("path")
+    if not path:
+        return None
+    if path.get("link_type") == "local":
+        return path.get("local_path") or path.get("local_path_linux")
+    if path.get("link_type") == "web":
+        url = path.get("url") or ""
+        if url.startswith(_FILE_URL_PREFIX):
+            return url[len(_FILE_URL_PREFIX) :]
+        return url
+    return None
+
+
+class PublishedFileExtension(DerivedField):
+    """
+    PublishedFileExtension is the extension, without the leading dot, of the
+        first PublishedFile linked to a Version that has a path.
+    """
+
+    name = "published_file.extension"
+    fields = ("published_files",)
+
+    def compute(self, record):
+        for published_file in record.get("published_files") or []:
+            if published_file.get("path"):
+                local_path = published_file_local_path(published_file)
+                if local_path is None:
+                    return None
+                return os.path.splitext(local_path)[1].lstrip(".")
+        return None
+
+
+PUBLISHED_FILE_VERSION_NUMBER = FirstNestedValue(
+    "published_file.version_number", "published_files", "version_number"
+)
+PUBLISHED_FILE_EXTENSION = PublishedFileExtension()
+PUBLISHED_FILE_FIELDS = (PUBLISHED_FILE_VERSION_NUMBER, PUBLISHED_FILE_EXTENSION)
+
+
+def enrich_record(record, derived_fields):
+    """
+    enrich_record stores the value of each derived field on `record`.
+
+    :param dict record: Record to update in place.
+    :param iterable[DerivedField] derived_fields: Fields to compute.
+    :return: The updated `record`.
+    :rtype: dict
+    """
+    for derived_field in derived_fields:
+        record[derived_field.name] = derived_field.compute(record)
+    return record
+
+
+def enrich(records, derived_fields=PUBLISHED_FILE_FIELDS):
+    """
+    enrich lazily stores the value of each derived field on every record,
+        so it can be chained with a streaming loader.
+
+    :param iterable[dict] records: Records to update in place.
+    :param iterable[DerivedField] derived_fields: Fields to compute.
+    :rtype: generator[dict]
+    """
+    derived_fields = tuple(derived_fields)
+    for record in records:
+        yield enrich_record(record, derived_fields)
@@ -0,0 +1,369 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import weakref
+
+TOKENS = "tokens"
+OPERATORS = "operators"
+KINDS = (TOKENS, OPERATORS)
+
+FORMAT_VERSION = 2
+MANIFEST_NAME = "manifest.json"
+HTML_NAME = "documentation.html"
+
+# Fingerprints by parser, along with the entries they were computed from.
+_FINGERPRINTS = weakref.WeakKeyDictionary()
+
+
+class _EntrySubset(object):
+    """
+    _EntrySubset stands in for a TokenManager or OperatorManager so the
+        parser's DocumentationGenerator can render only some entries.
+    """
+
+    def __init__(self, entries):
+        super(_EntrySubset, self).__init__()
+        self.tokens = entries
+        self.operators = entries
+
+
+def parser_entries(parser, kind):
+    """
+    parser_entries returns the Tokens or Operators registered on `parser`, or
+        `None` if the parser does not expose them.
+
+    :param sept.PathTemplateParser parser: Parser to read entries from.
+    :param str kind: Either "tokens" or "operators".
+    :rtype: list|None
+    """
+    if kind == TOKENS:
+        manager = getattr(parser, "_token_manager", None)
+        return None if manager is None else manager.tokens
+    manager = getattr(parser, "_operator_manager", None)
+    return None if manager is None else manager.operators
+
+
+def parser_documentation(parser, kind, entries=None):
+    """
+    parser_documentation returns the documentation html for every entry of
+        `kind` on `parser`, or only for `entries` if they are passed.
+
+    :param sept.PathTemplateParser parser: Parser to generate docs with.
+    :param str kind: Either "tokens" or "operators".
+    :param list|None entries: Optional subset of Tokens or Operators.
+    :rtype: str
+    """
+    if entries is None:
+        if kind == TOKENS:
+            return parser.token_documentation()
+        return parser.operator_documentation()
+
+    generator = parser._documentation_generation
+    subset = _EntrySubset(entries)
+    if kind == TOKENS:
+        return generator.generate_token_documentation(token_manager=subset)
+    return generator.generate_operator_documentation(operator_manager=subset)
+
+
+def parser_fingerprint(parser):
+    """
+    parser_fingerprint returns a digest of the names, classes and docstrings
+        of every Token and Operator on `parser`.
+    Unlike the fingerprint DocumentationWidget caches on, it is stable across
+        processes so it can be stored in a bundle.
+    The digest is cached per parser and only computed again if its Tokens or
+        Operators are replaced.
+
+    :param sept.PathTemplateParser parser: Parser to fingerprint.
+    :rtype: str
+    """
+    entries_by_kind = []
+    for kind in KINDS:
+        entries = parser_entries(parser, kind)
+        if entries is None:
+            raise ValueError(
+                "{parser!r} does not expose its {kind}.".format(
+                    parser=parser, kind=kind
+                )
+            )
+        entries_by_kind.append((kind, list(entries)))
+    entry_ids = tuple(id(entry) for _, entries in entries_by_kind for entry in entries)
+    cached = _FINGERPRINTS.get(parser)
+    if cached is not None and cached[0] == entry_ids:
+        return cached[1]
+
+    digest = hashlib.sha1()
+    for kind, entries in entries_by_kind:
+        for entry in entries:
+            klass = entry if isinstance(entry, type) else type(entry)
+            for value in (kind, entry.name, klass.__module__, klass.__name__):
+                digest.update(value.encode("utf-8") + b"\0")
+            digest.update((entry.__doc__ or "").encode("utf-8") + b"\0")
+    fingerprint = digest.hexdigest()
+    _FINGERPRINTS[parser] = (entry_ids, fingerprint)
+    return fingerprint
+
+
+# The generator's page templates and the divider it puts between entries.
+_PAGE_TEMPLATES = {
+    TOKENS: ("_overall_token_html_template", "_token_divider"),
+    OPERATORS: ("_overall_operator_html_template", "_divider"),
+}
+
+
+def _page_parts(parser, kind):
+    """
+    _page_parts returns the header, footer and divider the parser's
+        DocumentationGenerator wraps the entries of `kind` in, by splitting
+        its page template at the "{tokens}" or "{operators}" placeholder.
+
+    :return: The header, footer and divider, or `None` if the generator does
+        not expose its templates.
+    :rtype: tuple[str, str, str]|None
+    """
+    generator = getattr(parser, "_documentation_generation", None)
+    template_name, divider_name = _PAGE_TEMPLATES[kind]
+    template = getattr(generator, template_name, None)
+    divider = getattr(generator, divider_name, None)
+    if template is None or divider is None:
+        return None
+    marker = "\0{kind}\0".format(kind=kind)
+    page = template.format(**{kind: marker})
+    if page.count(marker) != 1:
+        return None
+    header, footer = page.split(marker)
+    return header, footer, divider
+
+
+def _export_kind(parser, kind, entries, add_chunk):
+    """
+    _export_kind writes the full page and every entry of `kind` through
+        `add_chunk` and returns the manifest describing them.
+
+    Entries are stored without the page header and footer so any subset can
+        be rendered as header + entries joined by the divider + footer.
+    """
+    full_html = parser_documentation(parser, kind)
+    singles_html = [parser_documentation(parser, kind, [entry]) for entry in entries]
+    fragments = None
+    parts = _page_parts(parser, kind)
+    if parts is not None:
+        header, footer, divider = parts
+        fragments = []
+        for single_html in singles_html:
+            if not single_html.startswith(header) or not single_html.endswith(footer):
+                fragments = None
+                break
+            fragments.append(single_html[len(header) : len(single_html) - len(footer)])
+    # Only trust the fragments if they rebuild the page the parser generates.
+    if fragments is None or header + divider.join(fragments) + footer != full_html:
+        # Fall back to storing each entry as its own full page.
+        header = footer = ""
+        divider = "<hr>"
+        fragments = singles_html
+
+    return {
+        "full": add_chunk(full_html),
+        "header": header,
+        "footer": footer,
+        "divider": divider,
+        "entries": [
+            {"name": entry.name, "doc": entry.__doc__ or "", "html": add_chunk(html)}
+            for entry, html in zip(entries, fragments)
+        ],
+    }
+
+
+def _read_manifest(path):
+    manifest_path = os.path.join(path, MANIFEST_NAME)
+    with io.open(manifest_path, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def bundle_is_current(path, parser):
+    """
+    bundle_is_current checks whether the bundle at `path` was exported from
+        a parser with the same Tokens and Operators as `parser`.
+
+    :param str path: Bundle directory.
+    :param sept.PathTemplateParser parser: Parser to compare against.
+    :rtype: bool
+    """
+    try:
+        manifest = _read_manifest(path)
+    except (IOError, OSError, ValueError):
+        return False
+    return (
+        manifest.get("format_version") == FORMAT_VERSION
+        and manifest.get("fingerprint") == parser_fingerprint(parser)
+        and os.path.isfile(os.path.join(path, HTML_NAME))
+    )
+
+
+def export_bundle(parser, path, force=False):
+    """
+    export_bundle writes the Token and Operator documentation of `parser` to
+        a static bundle directory that `DocumentationBundle` can load without
+        the parser.
+
+    The bundle contains a "documentation.html" file with every page and
+        entry, and a "manifest.json" index of where each one is in the html
+        file.
+    Nothing is written if the bundle was already exported from a parser with
+        the same fingerprint, unless `force` is True.
+
+    :param sept.PathTemplateParser parser: Parser to export docs from.
+    :param str path: Bundle directory, created if it does not exist.
+    :param bool force: Whether to export even if the bundle is current.
+    :return: Whether the bundle was written.
+    :rtype: bool
+    """
+    if not force and bundle_is_current(path, parser):
+        return False
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    chunks = []
+    offset = [0]
+
+    def _add_chunk(html):
+        data = html.encode("utf-8")
+        chunks.append(data)
+        span = [offset[0], len(data)]
+        offset[0] += len(data)
+        return span
+
+    kinds = {}
+    for kind in KINDS:
+        entries = parser_entries(parser, kind)
+        kinds[kind] = _export_kind(parser, kind, entries, _add_chunk)
+
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "fingerprint": parser_fingerprint(parser),
+        "kinds": kinds,
+    }
+    # Write the html first so a bundle is never current with stale html.
+    with io.open(os.path.join(path, HTML_NAME), "wb") as fh:
+        for chunk in chunks:
+            fh.write(chunk)
+    with io.open(os.path.join(path, MANIFEST_NAME), "w", encoding="utf-8") as fh:
+        fh.write(json.dumps(manifest, indent=1, sort_keys=True))
+    return True
+
+
+class BundleEntry(object):
+    """
+    BundleEntry is the stand-in for a Token or Operator loaded from a bundle.
+    """
+
+    def __init__(self, name, doc, span):
+        super(BundleEntry, self).__init__()
+        self.name = name
+        self.__doc__ = doc
+        self.span = span
+
+
+class DocumentationBundle(object):
+    """
+    DocumentationBundle loads documentation exported with `export_bundle`.
+
+    Only the manifest is read up front, the html file is memory-mapped and
+        each page or entry is decoded the first time it is requested.
+    A DocumentationBundle can be passed to `sept_qt.DocumentationWidget` in
+        place of a parser.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: Bundle directory written by `export_bundle`.
+        """
+        super(DocumentationBundle, self).__init__()
+        self.path = path
+        manifest = _read_manifest(path)
+        if manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                "Unsupported documentation bundle format {version} in "
+                "{path}".format(version=manifest.get("format_version"), path=path)
+            )
+        self.fingerprint = manifest["fingerprint"]
+        self._kinds = manifest["kinds"]
+        self._entries = {}
+        for kind, kind_manifest in self._kinds.items():
+            self._entries[kind] = [
+                BundleEntry(entry["name"], entry["doc"], entry["html"])
+                for entry in kind_manifest["entries"]
+            ]
+        self._html_file = None
+        self._html_map = None
+
+    def _read(self, span):
+        start, length = span
+        if not length:
+            return ""
+        if self._html_map is None:
+            self._html_file = io.open(os.path.join(self.path, HTML_NAME), "rb")
+            self._html_map = mmap.mmap(
+                self._html_file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        return self._html_map[start : start + length].decode("utf-8")
+
+    def close(self):
+        """
+        close releases the memory-mapped html file.
+        """
+        if self._html_map is not None:
+            self._html_map.close()
+            self._html_file.close()
+        self._html_map = None
+        self._html_file = None
+
+    def entries(self, kind):
+        """
+        :param str kind: Either "tokens" or "operators".
+        :rtype: list[BundleEntry]
+        """
+        return self._entries[kind]
+
+    def documentation(self, kind, entries=None):
+        """
+        documentation returns the html for every entry of `kind`, or only for
+            `entries` if they are passed.
+
+        :param str kind: Either "tokens" or "operators".
+        :param list[BundleEntry]|None entries: Optional subset of entries.
+        :rtype: str
+        """
+        kind_manifest = self._kinds[kind]
+        if entries is None:
+            return self._read(kind_manifest["full"])
+        return (
+            kind_manifest["header"]
+            + kind_manifest["divider"].join(self._read(entry.span) for entry in entries)
+            + kind_manifest["footer"]
+        )
+
+    def token_documentation(self):
+        return self.documentation(TOKENS)
+
+    def operator_documentation(self):
+        return self.documentation(OPERATORS)
+
+
+def load_bundle(path, parser=None):
+    """
+    load_bundle loads the documentation bundle at `path`.
+
+    If a `parser` is passed, the bundle is exported again first when it is
+        missing or was exported from different Tokens or Operators.
+
+    :param str path: Bundle directory.
+    :param sept.PathTemplateParser|None parser: Optional parser to keep the
+        bundle up to date with.
+    :rtype: DocumentationBundle
+    """
+    if parser is not None:
+        export_bundle(parser, path)
+    return DocumentationBundle(path)
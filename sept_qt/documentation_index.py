@@ -0,0 +1,108 @@
+import bisect
+import collections
+import re
+
+_TAG_RE = re.compile(r"<[^>]*>")
+_ENTITY_RE = re.compile(r"&\w+;")
+_WORD_RE = re.compile(r"[a-z0-9_]+")
+
+NAME_WEIGHT = 10.0
+DOCSTRING_WEIGHT = 1.0
+PREFIX_PENALTY = 0.5
+
+
+def _words(text):
+    text = _ENTITY_RE.sub(" ", _TAG_RE.sub(" ", text or ""))
+    return _WORD_RE.findall(text.lower())
+
+
+class DocumentationIndex(object):
+    """
+    DocumentationIndex is an inverted index over the names and docstrings of
+        Tokens and Operators, used to search the documentation as the user
+        types.
+
+    Entries are identified by a `(kind, name)` tuple, where kind is whatever
+        the caller groups entries by, eg "tokens" or "operators".
+    The index is built once, searching only looks up the query words so it
+        does not depend on the size of the documentation.
+    """
+
+    def __init__(self, entries_by_kind):
+        """
+        :param dict[str, iterable] entries_by_kind: Mapping of each kind to
+            the Tokens or Operators of that kind. Each entry needs a `name`
+            and may have a docstring.
+        """
+        super(DocumentationIndex, self).__init__()
+        self._postings = collections.defaultdict(dict)
+        self._entries = {}
+        for kind, entries in entries_by_kind.items():
+            for entry in entries:
+                self._add(kind, entry)
+        self._terms = sorted(self._postings)
+
+    def _add(self, kind, entry):
+        key = (kind, entry.name)
+        self._entries[key] = entry
+        postings = self._postings
+        name_words = set(_words(entry.name))
+        name_words.update(_words(entry.name.replace("_", " ")))
+        for word in name_words:
+            postings[word][key] = postings[word].get(key, 0.0) + NAME_WEIGHT
+        for word in _words(entry.__doc__):
+            postings[word][key] = postings[word].get(key, 0.0) + DOCSTRING_WEIGHT
+
+    def entry(self, kind, name):
+        return self._entries.get((kind, name))
+
+    def _score_word(self, word, prefix):
+        """
+        _score_word returns the scores of every entry containing `word`, or
+            a word starting with it if `prefix` is True.
+        """
+        scores = dict(self._postings.get(word, {}))
+        if not prefix:
+            return scores
+        start = bisect.bisect_left(self._terms, word)
+        for term in self._terms[start:]:
+            if not term.startswith(word):
+                break
+            if term == word:
+                continue
+            for key, score in self._postings[term].items():
+                scores[key] = max(scores.get(key, 0.0), score * PREFIX_PENALTY)
+        return scores
+
+    def search(self, query):
+        """
+        search returns the entries matching every word in `query`, best
+            matches first.
+
+        The last word of the query also matches longer words starting with
+            it, so results are useful while the user is still typing.
+
+        :param str query: Text to search for.
+        :return: Ranked `(kind, name)` tuples.
+        :rtype: list[tuple[str, str]]
+        """
+        words = _WORD_RE.findall((query or "").lower())
+        if not words:
+            return []
+        # A trailing space means the user finished typing the last word.
+        prefix_last = query == query.rstrip()
+        scores = None
+        for position, word in enumerate(words):
+            prefix = position == len(words) - 1 and prefix_last
+            word_scores = self._score_word(word, prefix)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {
+                    key: score + word_scores[key]
+                    for key, score in scores.items()
+                    if key in word_scores
+                }
+            if not scores:
+                return []
+        return sorted(scores, key=lambda key: (-scores[key], key))
@@ -1,20 +1,156 @@
-from Qt import QtGui, QtWidgets
+import collections
+import importlib
+
+from Qt import QtGui, QtWidgets, QtCore
 import Qt
 
-if Qt.__binding__ == "PySide2":
-    try:
-        from PySide2 import QtWebEngineWidgets
+from . import documentation_bundle
+from .documentation_index import DocumentationIndex
+
+_QWebView = None
+# The modules providing a web view, in order of preference, found under the
+#   package of the current Qt binding.
+_WEB_VIEW_CLASSES = (
+    ("QtWebEngineWidgets", "QWebEngineView"),  # Qt5.6+
+    ("QtWebKitWidgets", "QWebView"),  # Qt5 before QtWebEngine
+    ("QtWebKit", "QWebView"),  # Qt4
+)
+
+
+def _get_web_view_class():
+    """
+    _get_web_view_class imports the web view class for the current Qt binding
+        the first time it is needed.
+
+    The web engine is a heavy import, so we avoid paying for it until a
+        DocumentationWidget is actually created.
+    """
+    global _QWebView
+    if _QWebView is not None:
+        return _QWebView
+
+    for module_name, class_name in _WEB_VIEW_CLASSES:
+        try:
+            module = importlib.import_module(
+                "{binding}.{module}".format(binding=Qt.__binding__, module=module_name)
+            )
+        except ImportError:
+            continue
+        _QWebView = getattr(module, class_name, None)
+        if _QWebView is not None:
+            return _QWebView
+    raise ImportError(
+        "No web view is available for the {binding} Qt binding, install its "
+        "web engine or use the {text!r} renderer.".format(
+            binding=Qt.__binding__, text=TEXT_RENDERER
+        )
+    )
+
+
+TEXT_RENDERER = "text"
+WEB_RENDERER = "web"
+
+
+def _get_renderer_class(renderer):
+    """
+    _get_renderer_class returns the widget class used to display the html for
+        the `renderer` passed to DocumentationWidget.
+
+    :param str|callable|None renderer: "text", "web" or a callable returning
+        a widget with a `setHtml` method.
+    """
+    if renderer is None or renderer == TEXT_RENDERER:
+        return _TextBrowserRenderer
+    elif renderer == WEB_RENDERER:
+        return _get_web_view_class()
+    elif callable(renderer):
+        return renderer
+    raise ValueError(
+        "Unknown documentation renderer {renderer!r}, expected {text!r}, "
+        "{web!r} or a widget class.".format(
+            renderer=renderer, text=TEXT_RENDERER, web=WEB_RENDERER
+        )
+    )
 
-        QWebView = QtWebEngineWidgets.QWebEngineView
-    except ImportError:
-        from PySide2 import QtWebkitWidgets
 
-        QWebView = QtWebkitWidgets.QWebView
+class _TextBrowserRenderer(QtWidgets.QTextBrowser):
+    """
+    _TextBrowserRenderer is a QTextBrowser that displays the documentation
+        html without starting a web engine.
+    It supports the simple html found in Token and Operator docstrings.
+    """
+
+    # The view draws with the widget palette, so it needs no colour styling.
+    follows_palette = True
 
-elif Qt.__binding__ == "PySide":
-    from PySide import QtWebKit
+    def __init__(self, parent=None):
+        super(_TextBrowserRenderer, self).__init__(parent)
+        self.setOpenExternalLinks(True)
 
-    QWebView = QtWebKit.QWebView
+
+class _DocumentationCacheEntry(object):
+    """
+    _DocumentationCacheEntry holds everything generated for one set of Tokens
+        and Operators.
+    """
+
+    def __init__(self):
+        super(_DocumentationCacheEntry, self).__init__()
+        self.html = {}
+        self.search_index = None
+
+
+class DocumentationCache(object):
+    """
+    DocumentationCache shares the generated documentation html and search
+        index between every DocumentationWidget showing the same Tokens and
+        Operators, so opening several widgets over the same parser only
+        generates the documentation once.
+
+    Only the `max_entries` most recently used parser fingerprints are kept.
+    """
+
+    DEFAULT_MAX_ENTRIES = 8
+
+    def __init__(self, max_entries=None):
+        """
+        :param int|None max_entries: Optional number of parser fingerprints
+            to keep documentation for.
+        """
+        super(DocumentationCache, self).__init__()
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        """
+        get returns the cache entry for a parser fingerprint, creating it if
+            needed.
+
+        :param tuple key: Parser fingerprint.
+        :rtype: _DocumentationCacheEntry
+        """
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            entry = _DocumentationCacheEntry()
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, key=None):
+        """
+        invalidate drops the documentation cached for `key`, or for every
+            fingerprint if no key is passed.
+
+        :param tuple|None key: Optional parser fingerprint to forget.
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+
+SHARED_DOCUMENTATION_CACHE = DocumentationCache()
 
 
 class DocumentationWidget(QtWidgets.QTabWidget):
@@ -22,13 +158,61 @@ class DocumentationWidget(QtWidgets.QTabWidget):
     DocumentationWidget is designed to give a fast and easy way to display the
         Token and Operator documentation to your users.
 
+    *Renderers*
+    By default the documentation is displayed in a QTextBrowser, which
+        handles the simple html used in docstrings without the cost of
+        starting a web engine.
+    If your docstrings need full html and css support, pass `renderer="web"`
+        to display them in a QWebEngineView (or QWebView on older bindings).
+    You can also pass your own widget class, it only needs a `setHtml`
+        method.
+
     **Warning** This takes the html text from the sept.Operator and sept.Token
-        docstrings and directly loads it into a QWebView.
+        docstrings and directly loads it into the renderer.
     This is a known security risk if you are loading Tokens or Operators
         from an untrusted source.
+
+    *Caching*
+    The generated html is cached and only regenerated when the Tokens or
+        Operators registered on the parser change, and the views are only
+        reloaded when the html changes.
+    Palette changes re-colour the views in place.
+    If you change the documentation in some other way, such as editing a
+        docstring at runtime, call `invalidate` to force a reload.
+
+    *Lazy Rendering*
+    Only the current tab is rendered, the other tab is rendered when it is
+        selected.
+    When a tab has more than `INDEX_ENTRY_THRESHOLD` entries and the renderer
+        supports links, an index of entry names is rendered first and each
+        entry's documentation is rendered when its link is clicked.
+
+    *Searching*
+    The search box next to the tabs filters both tabs down to the Tokens and
+        Operators whose name or docstring match the query, best matches
+        first.
+    The search index is built once for each set of Tokens and Operators.
+
+    *Sharing*
+    By default every DocumentationWidget shares its generated html and search
+        index through `SHARED_DOCUMENTATION_CACHE`, so several widgets over
+        the same Tokens and Operators only generate their documentation once.
+    Pass your own `DocumentationCache` as `cache` to keep them separate.
+
+    *Bundles*
+    Generating the documentation for a large parser can be slow, you can
+        export it once with `sept_qt.documentation_bundle.export_bundle` and
+        pass the loaded `DocumentationBundle` in place of the parser.
+    The bundle's entries are read from disk as they are displayed.
     """
 
-    def __init__(self, parser, parent=None):
+    TOKENS_TAB = documentation_bundle.TOKENS
+    OPERATORS_TAB = documentation_bundle.OPERATORS
+    INDEX_ENTRY_THRESHOLD = 100
+    _LINK_SCHEME = "sept-doc"
+    SEARCH_PLACEHOLDER_TEXT = "Search documentation..."
+
+    def __init__(self, parser, parent=None, renderer=None, cache=None):
         """
         DocumentationWidget only requires a `sept.PathTemplateParser` object
             to operate.
@@ -36,18 +220,54 @@ class DocumentationWidget(QtWidgets.QTabWidget):
         This should be a fully instantiated Parser object that we can generate
             documentation from.
 
-        :param sept.PathTemplateParser parser: Parser object driving the docs.
+        :param sept.PathTemplateParser|DocumentationBundle parser: Parser
+            object, or exported documentation bundle, driving the docs.
         :param QtWidgets.QWidget|None parent: Optional Qt parent widget.
+        :param str|callable|None renderer: Optional renderer, either "text"
+            (the default), "web" or a widget class with a `setHtml` method.
+        :param DocumentationCache|None cache: Optional cache to share the
+            generated documentation through, defaults to
+            `SHARED_DOCUMENTATION_CACHE`.
         """
         super(DocumentationWidget, self).__init__(parent)
 
         self.parser = parser
-        self._token_webview = QWebView()
-        self._operator_webview = QWebView()
+        renderer_class = _get_renderer_class(renderer)
+        self._token_webview = renderer_class()
+        self._operator_webview = renderer_class()
+        self._views = {
+            self.TOKENS_TAB: self._token_webview,
+            self.OPERATORS_TAB: self._operator_webview,
+        }
+        self._tab_kinds = (self.TOKENS_TAB, self.OPERATORS_TAB)
 
         self.addTab(self._token_webview, "Tokens")
         self.addTab(self._operator_webview, "Operators")
 
+        for kind, view in self._views.items():
+            if hasattr(view, "anchorClicked"):
+                view.setOpenLinks(False)
+                view.anchorClicked.connect(self._anchor_clicked_factory(kind))
+
+        self._search_widget = QtWidgets.QLineEdit(self)
+        self._search_widget.setPlaceholderText(self.SEARCH_PLACEHOLDER_TEXT)
+        if hasattr(self._search_widget, "setClearButtonEnabled"):  # Qt5+
+            self._search_widget.setClearButtonEnabled(True)
+        self._search_widget.setVisible(self._supports_subsets())
+        self._search_widget.textChanged.connect(self._handle_search_text_changed)
+        self.setCornerWidget(self._search_widget, QtCore.Qt.TopRightCorner)
+
+        self._cache = SHARED_DOCUMENTATION_CACHE if cache is None else cache
+        self._cache_entry = _DocumentationCacheEntry()
+        self._documentation_key = None
+        self._pages = {}
+        self._rendered_keys = {}
+        self._rendered_html = {}
+        self._rendered_themes = {}
+        self._query = ""
+        self._search_results = None
+        self.currentChanged.connect(self._handle_current_changed)
+
     def html_prefix(self):
         return (
             "<head><style>body {"
@@ -68,19 +288,276 @@ class DocumentationWidget(QtWidgets.QTabWidget):
         r, g, b = fg_colour.red(), fg_colour.green(), fg_colour.blue()
         return "rgb({r}, {g}, {b});".format(r=r, g=g, b=b)
 
+    def _is_bundle(self):
+        return isinstance(self.parser, documentation_bundle.DocumentationBundle)
+
+    def _supports_subsets(self):
+        # Parsers render subsets of entries through their generator.
+        return self._is_bundle() or hasattr(self.parser, "_documentation_generation")
+
+    def _get_documentation_key(self):
+        """
+        _get_documentation_key is an internal helper that fingerprints the
+            Tokens and Operators registered on the parser.
+
+        If the parser does not expose its managers, only the parser identity
+            is used and `invalidate` must be called to pick up changes.
+        """
+        if self._is_bundle():
+            return "bundle", self.parser.fingerprint, None
+        tokens = self._get_entries(self.TOKENS_TAB)
+        operators = self._get_entries(self.OPERATORS_TAB)
+        if tokens is None or operators is None:
+            return id(self.parser), None, None
+        tokens = tuple((tok.name, type(tok)) for tok in tokens)
+        operators = tuple((op.name, op) for op in operators)
+        return None, tokens, operators
+
+    def _get_entries(self, kind):
+        """
+        _get_entries returns the Tokens or Operators registered on the parser,
+            or `None` if the parser does not expose them.
+        """
+        if self._is_bundle():
+            return self.parser.entries(kind)
+        return documentation_bundle.parser_entries(self.parser, kind)
+
+    def _generate_documentation(self, kind, entries=None):
+        """
+        _generate_documentation returns the html for every entry of `kind`, or
+            only for `entries` if they are passed.
+        """
+        if self._is_bundle():
+            return self.parser.documentation(kind, entries)
+        return documentation_bundle.parser_documentation(self.parser, kind, entries)
+
+    def _uses_index(self, kind):
+        entries = self._get_entries(kind)
+        return (
+            entries is not None
+            and len(entries) > self.INDEX_ENTRY_THRESHOLD
+            and hasattr(self._views[kind], "anchorClicked")
+            and self._supports_subsets()
+        )
+
+    def _generate_index(self, kind):
+        title = "Token" if kind == self.TOKENS_TAB else "Operator"
+        links = [
+            '<li><a href="{scheme}:{kind}/{name}"><code>{name}</code></a></li>'.format(
+                scheme=self._LINK_SCHEME, kind=kind, name=entry.name
+            )
+            for entry in self._get_entries(kind)
+        ]
+        return "<h1>{title} Documentation</h1><ul>{links}</ul>".format(
+            title=title, links="".join(links)
+        )
+
+    def _generate_entry(self, kind, name):
+        entries = [entry for entry in self._get_entries(kind) if entry.name == name]
+        back_link = '<a href="{scheme}:{kind}">Back to index</a>'.format(
+            scheme=self._LINK_SCHEME, kind=kind
+        )
+        return back_link + self._generate_documentation(kind, entries)
+
+    def _get_page_html(self, kind, page):
+        """
+        _get_page_html returns the cached html for a page of a tab, generating
+            it if needed. A `page` of `None` is the tab's main page.
+        """
+        uses_index = page is None and self._uses_index(kind)
+        # The index and the full documentation are both the main page.
+        key = (kind, page, uses_index)
+        html = self._cache_entry.html.get(key)
+        if html is None:
+            if page is not None:
+                html = self._generate_entry(kind, page)
+            elif uses_index:
+                html = self._generate_index(kind)
+            else:
+                html = self._generate_documentation(kind)
+            self._cache_entry.html[key] = html
+        return html
+
+    def _render_tab(self, kind):
+        """
+        _render_tab is an internal helper that loads the current page of a tab
+            into its view, unless it is already displayed.
+        """
+        page = self._pages.get(kind)
+        rendered_key = (self._documentation_key, page, self._query)
+        if rendered_key == self._rendered_keys.get(kind):
+            self._apply_theme(kind)
+            return
+        if self._query and page is None:
+            html = self._get_search_html(kind)
+        else:
+            html = self._get_page_html(kind, page)
+        view = self._views[kind]
+        html_prefix = self.html_prefix()
+        if getattr(view, "follows_palette", False):
+            html_prefix = ""
+        view.setHtml(html_prefix + html)
+        self._rendered_keys[kind] = rendered_key
+        self._rendered_html[kind] = html
+        self._rendered_themes[kind] = self._get_theme()
+
+    def _get_theme(self):
+        return self._get_background_colour(), self._get_foreground_colour()
+
+    def _apply_theme(self, kind):
+        """
+        _apply_theme is an internal helper that updates the colours of an
+            already rendered view to match the palette, without regenerating
+            or reloading its html when the renderer allows it.
+        """
+        theme = self._get_theme()
+        if kind not in self._rendered_html or self._rendered_themes[kind] == theme:
+            return
+        self._rendered_themes[kind] = theme
+        view = self._views[kind]
+        if getattr(view, "follows_palette", False):
+            return
+
+        script = (
+            "document.body.style.backgroundColor = '{background}';"
+            "document.body.style.color = '{foreground}';".format(
+                background=theme[0].rstrip(";"), foreground=theme[1].rstrip(";")
+            )
+        )
+        page = view.page() if hasattr(view, "page") else None
+        if hasattr(page, "runJavaScript"):  # QWebEngineView
+            page.runJavaScript(script)
+        elif hasattr(page, "mainFrame"):  # QWebView
+            page.mainFrame().evaluateJavaScript(script)
+        else:
+            view.setHtml(self.html_prefix() + self._rendered_html[kind])
+
+    def _get_search_index(self):
+        if self._cache_entry.search_index is None:
+            entries_by_kind = {}
+            for kind in self._tab_kinds:
+                entries_by_kind[kind] = self._get_entries(kind) or []
+            self._cache_entry.search_index = DocumentationIndex(entries_by_kind)
+        return self._cache_entry.search_index
+
+    def _get_search_html(self, kind):
+        """
+        _get_search_html renders only the entries of `kind` that match the
+            current query, in ranked order.
+        """
+        index = self._get_search_index()
+        if self._search_results is None:
+            self._search_results = index.search(self._query)
+        entries = [
+            index.entry(result_kind, name)
+            for result_kind, name in self._search_results
+            if result_kind == kind
+        ]
+        if not entries:
+            return "<p>No results for <code>{query}</code></p>".format(
+                query=self._query.replace("&", "&amp;").replace("<", "&lt;")
+            )
+        return self._generate_documentation(kind, entries)
+
+    def search(self, query):
+        """
+        search filters the documentation down to the Tokens and Operators
+            matching `query`. An empty query shows all of the documentation.
+
+        :param str query: Text to search for.
+        """
+        if self._search_widget.text() != query:
+            # Updating the text calls back in to search.
+            self._search_widget.setText(query)
+            return
+        self._query = query.strip() and query
+        self._search_results = None
+        for kind in self._tab_kinds:
+            self._pages[kind] = None
+        if self._documentation_key is None or not self.isVisible():
+            return
+        kind = self._current_kind()
+        if kind is not None:
+            self._render_tab(kind)
+
+    @QtCore.Slot(str)
+    def _handle_search_text_changed(self, text):
+        self.search(text)
+
+    def _current_kind(self):
+        index = self.currentIndex()
+        if 0 <= index < len(self._tab_kinds):
+            return self._tab_kinds[index]
+        return None
+
+    def _anchor_clicked_factory(self, kind):
+        def _handle_anchor_clicked(url):
+            if url.scheme() != self._LINK_SCHEME:
+                QtGui.QDesktopServices.openUrl(url)
+                return
+            _, _, name = url.path().partition("/")
+            self._pages[kind] = name or None
+            self._render_tab(kind)
+
+        return _handle_anchor_clicked
+
+    def _handle_current_changed(self, index):
+        if self._documentation_key is None or not self.isVisible():
+            return
+        kind = self._current_kind()
+        if kind is not None:
+            self._render_tab(kind)
+
+    def invalidate(self):
+        """
+        invalidate drops the cached documentation so that it is regenerated
+            from the parser.
+        This also drops it from the shared cache, other widgets keep showing
+            their current documentation until they are invalidated.
+        If the widget is visible the current tab is reloaded immediately,
+            otherwise it will be reloaded the next time it is shown.
+        """
+        if self._documentation_key is not None:
+            self._cache.invalidate(self._documentation_key)
+        self._cache_entry = _DocumentationCacheEntry()
+        self._documentation_key = None
+        self._rendered_keys = {}
+        self._rendered_html = {}
+        self._rendered_themes = {}
+        self._search_results = None
+        if self.isVisible():
+            self.refreshDocumentation()
+
     def refreshDocumentation(self):
         """
         refreshDocumentation will query the parser again for any updated
             documentation for either Tokens or Operators and then update the
-            corresponding web views.
+            view of the current tab.
+        The other tab is updated when it is selected.
 
+        Nothing is regenerated or reloaded if the Tokens and Operators are
+            unchanged since the last refresh, palette changes only update the
+            colours of the views.
         """
-        token_html = self.parser.token_documentation()
-        self._token_webview.setHtml(self.html_prefix() + token_html)
+        documentation_key = self._get_documentation_key()
+        if documentation_key != self._documentation_key:
+            self._cache_entry = self._cache.get(documentation_key)
+            self._pages = {}
+            self._search_results = None
+            self._documentation_key = documentation_key
 
-        operator_html = self.parser.operator_documentation()
-        self._operator_webview.setHtml(self.html_prefix() + operator_html)
+        kind = self._current_kind()
+        if kind is not None:
+            self._render_tab(kind)
 
     def showEvent(self, event):
         self.refreshDocumentation()
         return super(DocumentationWidget, self).showEvent(event)
+
+    def changeEvent(self, event):
+        # Palette changes can arrive while the base class is initialising.
+        rendered_html = getattr(self, "_rendered_html", {})
+        if event.type() == QtCore.QEvent.PaletteChange:
+            for kind in rendered_html:
+                self._apply_theme(kind)
+        return super(DocumentationWidget, self).changeEvent(event)
@@ -0,0 +1,263 @@
+import collections
+import hashlib
+import io
+import json
+import os
+
+FORMAT_VERSION = 1
+
+EditDelta = collections.namedtuple("EditDelta", ("position", "removed", "inserted"))
+
+
+def _hash_text(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def compute_delta(old_text, new_text):
+    """
+    compute_delta returns the single replacement that turns `old_text` into
+        `new_text`, found by trimming their common prefix and suffix.
+
+    :param str old_text: Text before the edit.
+    :param str new_text: Text after the edit.
+    :rtype: EditDelta
+    """
+    prefix = 0
+    limit = min(len(old_text), len(new_text))
+    while prefix < limit and old_text[prefix] == new_text[prefix]:
+        prefix += 1
+    suffix = 0
+    limit -= prefix
+    while (
+        suffix < limit
+        and old_text[len(old_text) - suffix - 1] == new_text[len(new_text) - suffix - 1]
+    ):
+        suffix += 1
+    return EditDelta(
+        position=prefix,
+        removed=old_text[prefix : len(old_text) - suffix],
+        inserted=new_text[prefix : len(new_text) - suffix],
+    )
+
+
+def _apply(text, position, removed, inserted):
+    if text[position : position + len(removed)] != removed:
+        raise ValueError("Edit history does not match the current text.")
+    return text[:position] + inserted + text[position + len(removed) :]
+
+
+def merge_deltas(previous, delta):
+    """
+    merge_deltas returns a single edit doing both `previous` and then
+        `delta`, if they are adjacent inserts or adjacent deletes, eg. typing
+        or backspacing through a word.
+
+    :param EditDelta previous: Earlier edit.
+    :param EditDelta delta: Edit made straight after `previous`.
+    :return: The combined edit, or `None` if they cannot be combined.
+    :rtype: EditDelta|None
+    """
+    if not previous.removed and not delta.removed:
+        if delta.position == previous.position + len(previous.inserted):
+            return EditDelta(previous.position, "", previous.inserted + delta.inserted)
+    elif not previous.inserted and not delta.inserted:
+        if delta.position + len(delta.removed) == previous.position:
+            # Backspace.
+            return EditDelta(delta.position, delta.removed + previous.removed, "")
+        if delta.position == previous.position:
+            # Forward delete.
+            return EditDelta(previous.position, previous.removed + delta.removed, "")
+    return None
+
+
+class EditHistory(object):
+    """
+    EditHistory is a plain text undo/redo history that stores each edit as the
+        small replacement it made rather than a snapshot of the whole text.
+
+    Like QTextEdit, consecutive typing or deleting is merged in to a single
+        undo step, see `merge_deltas`, until an edit is made elsewhere or the
+        history is undone or redone.
+
+    The history is capped both by number of edits and by the number of bytes
+        the edits hold, dropping the oldest edits first, so memory stays
+        bounded no matter how long the editing session is.
+    It can be saved to and loaded from disk so undo keeps working across
+        sessions.
+    """
+
+    DEFAULT_MAX_ENTRIES = 1000
+    DEFAULT_MAX_BYTES = 256 * 1024
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        """
+        :param int|None max_entries: Optional maximum number of undo steps.
+        :param int|None max_bytes: Optional maximum number of bytes of text
+            held by the undo and redo steps.
+        """
+        super(EditHistory, self).__init__()
+        self.max_entries = max_entries or self.DEFAULT_MAX_ENTRIES
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self._undo = collections.deque()
+        self._redo = []
+        self._bytes = 0
+        self._can_merge = False
+
+    def __len__(self):
+        return len(self._undo)
+
+    @staticmethod
+    def _size(delta):
+        return len(delta.removed.encode("utf-8")) + len(delta.inserted.encode("utf-8"))
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo = []
+        self._bytes = 0
+        self._can_merge = False
+
+    def _trim(self):
+        while self._undo and (
+            len(self._undo) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            self._bytes -= self._size(self._undo.popleft())
+
+    def record(self, old_text, new_text, merge=True):
+        """
+        record adds the edit from `old_text` to `new_text` to the history and
+            forgets anything that could have been redone.
+
+        :param str old_text: Text before the edit.
+        :param str new_text: Text after the edit.
+        :param bool merge: Whether the edit can be merged with the edits
+            before and after it, pass `False` for edits that should always be
+            undone on their own, eg. loading a file.
+        """
+        if old_text == new_text:
+            return
+        for delta in self._redo:
+            self._bytes -= self._size(delta)
+        self._redo = []
+        delta = compute_delta(old_text, new_text)
+        if merge and self._can_merge and self._undo:
+            merged = merge_deltas(self._undo[-1], delta)
+            if merged is not None:
+                self._bytes -= self._size(self._undo.pop())
+                delta = merged
+        self._undo.append(delta)
+        self._bytes += self._size(delta)
+        self._can_merge = merge
+        self._trim()
+
+    def undo(self, text):
+        """
+        undo reverts the most recent edit.
+
+        :param str text: The current text.
+        :return: The text before the edit and the position of the edit, or
+            `None` if there is nothing to undo.
+        :rtype: tuple[str, int]|None
+        """
+        if not self._undo:
+            return None
+        self._can_merge = False
+        delta = self._undo.pop()
+        try:
+            text = _apply(text, delta.position, delta.inserted, delta.removed)
+        except ValueError:
+            # The text was changed without being recorded, so the history no
+            #   longer applies to it.
+            self.clear()
+            return None
+        self._redo.append(delta)
+        return text, delta.position + len(delta.removed)
+
+    def redo(self, text):
+        """
+        redo re-applies the most recently undone edit.
+
+        :param str text: The current text.
+        :return: The text after the edit and the position of the edit, or
+            `None` if there is nothing to redo.
+        :rtype: tuple[str, int]|None
+        """
+        if not self._redo:
+            return None
+        self._can_merge = False
+        delta = self._redo.pop()
+        try:
+            text = _apply(text, delta.position, delta.removed, delta.inserted)
+        except ValueError:
+            self.clear()
+            return None
+        self._undo.append(delta)
+        return text, delta.position + len(delta.inserted)
+
+    def save(self, path, text):
+        """
+        save writes the history to `path` along with a hash of `text` so it
+            is only restored for the same text.
+
+        :param str path: Destination path.
+        :param str text: The current text the history applies to.
+        """
+        payload = {
+            "format_version": FORMAT_VERSION,
+            "text_sha1": _hash_text(text),
+            "undo": [list(delta) for delta in self._undo],
+            "redo": [list(delta) for delta in self._redo],
+        }
+        folder = os.path.dirname(path)
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder)
+        with io.open(path, "w", encoding="utf-8") as fh:
+            fh.write(json.dumps(payload, separators=(",", ":")))
+
+    def load(self, path, text):
+        """
+        load replaces the history with the one saved at `path`, if it was
+            saved for the same `text`. Otherwise the history is cleared.
+
+        :param str path: Path written by `save`.
+        :param str text: The current text.
+        :return: Whether the saved history was restored.
+        :rtype: bool
+        """
+        self.clear()
+        try:
+            with io.open(path, "r", encoding="utf-8") as fh:
+                payload = json.load(fh)
+        except (IOError, OSError, ValueError):
+            return False
+        if payload.get("format_version") != FORMAT_VERSION:
+            return False
+        if payload.get("text_sha1") != _hash_text(text):
+            return False
+        self._undo.extend(EditDelta(*delta) for delta in payload["undo"])
+        self._redo = [EditDelta(*delta) for delta in payload["redo"]]
+        self._bytes = sum(self._size(delta) for delta in self._undo)
+        self._bytes += sum(self._size(delta) for delta in self._redo)
+        self._trim()
+        return True
+
+
+def history_path(history_dir, template_path, entry=None):
+    """
+    history_path returns where the history for a template file, or an entry
+        of a template bundle, is stored inside of `history_dir`.
+
+    :param str history_dir: Directory holding the history files.
+    :param str template_path: Path of the template file.
+    :param str|None entry: Optional name of the template in a bundle.
+    :rtype: str
+    """
+    key = os.path.abspath(template_path)
+    if entry is not None:
+        key += "\0" + entry
+    return os.path.join(history_dir, _hash_text(key) + ".json")
@@ -0,0 +1,223 @@
+import collections
+import errno
+import functools
+import os
+import threading
+import time
+
+from .worker_pool import WorkerPool
+
+if hasattr(os, "scandir"):
+
+    def _list_directory(path):
+        return [entry.name for entry in os.scandir(path)]
+
+else:  # Python 2
+    _list_directory = os.listdir
+
+_MISSING_ERRNOS = (errno.ENOENT, errno.ENOTDIR)
+
+
+def _stat_exists(path):
+    """
+    _stat_exists returns whether `path` exists, or `None` if it could not be
+        checked, eg. a parent directory is missing permissions.
+    """
+    try:
+        os.stat(path)
+    except OSError as err:
+        if err.errno in _MISSING_ERRNOS:
+            return False
+        return None
+    return True
+
+
+class DirectoryListingCache(object):
+    """
+    DirectoryListingCache remembers the names found in a directory for `ttl`
+        seconds so that one directory listing can answer the existence of
+        every sibling inside of it.
+
+    It is safe to share a single cache between threads.
+    """
+
+    DEFAULT_TTL = 30.0
+
+    def __init__(self, ttl=None):
+        """
+        :param float|None ttl: Optional number of seconds a listing is
+            trusted before the directory is listed again.
+        """
+        super(DirectoryListingCache, self).__init__()
+        self.ttl = self.DEFAULT_TTL if ttl is None else ttl
+        self._listings = {}
+        self._lock = threading.Lock()
+
+    def get(self, directory):
+        """
+        get returns the names inside of `directory`, listing it again if the
+            cached listing is older than `ttl`.
+
+        A directory that does not exist returns an empty listing.
+        If the directory exists but cannot be listed (eg. it is missing read
+            permissions) `None` is returned so the caller can fall back to
+            checking each path directly.
+
+        :param str directory: Directory to list.
+        :return: The names in the directory.
+        :rtype: frozenset[str]|None
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._listings.get(directory)
+        if cached is not None and now - cached[0] < self.ttl:
+            return cached[1]
+
+        try:
+            listing = frozenset(_list_directory(directory))
+        except OSError as err:
+            if err.errno not in _MISSING_ERRNOS:
+                return None
+            listing = frozenset()
+
+        with self._lock:
+            self._listings[directory] = (now, listing)
+        return listing
+
+    def invalidate(self, directory=None):
+        """
+        invalidate drops the cached listing for `directory`, or every cached
+            listing if no directory is passed.
+
+        :param str|None directory: Optional directory to forget.
+        """
+        with self._lock:
+            if directory is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(directory, None)
+
+
+class PathExistenceChecker(object):
+    """
+    PathExistenceChecker checks whether many resolved paths exist on disk.
+
+    Paths are grouped by their parent directory and each directory is listed
+        once on a `sept_qt.worker_pool.WorkerPool`, so checking thousands of siblings
+        on a network mount costs a handful of directory listings rather than
+        thousands of serial `os.stat` calls.
+    Listings are kept in a `DirectoryListingCache` so repeated checks of the
+        same directories within the `ttl` do not touch the disk at all.
+    Paths in a directory that cannot be listed are each checked with their
+        own `os.stat` call, spread over the same pool.
+
+    A path is reported as missing only if it definitely does not exist,
+        paths that could not be checked, eg. because of permissions, are
+        reported as `None`.
+    """
+
+    DEFAULT_MAX_WORKERS = 16
+
+    def __init__(self, max_workers=None, ttl=None, listing_cache=None):
+        """
+        :param int|None max_workers: Optional maximum number of threads used
+            to check paths.
+        :param float|None ttl: Optional number of seconds a directory listing
+            is trusted for.
+        :param DirectoryListingCache|None listing_cache: Optional cache to
+            share listings with other checkers.
+        """
+        super(PathExistenceChecker, self).__init__()
+        self.listing_cache = listing_cache or DirectoryListingCache(ttl=ttl)
+        self.pool = WorkerPool(max_workers or self.DEFAULT_MAX_WORKERS)
+
+    @property
+    def max_workers(self):
+        return self.pool.max_workers
+
+    @staticmethod
+    def _split(path):
+        directory, name = os.path.split(os.path.normpath(path))
+        return directory or os.curdir, name
+
+    def exists(self, path):
+        """
+        exists checks a single path using the cached listing of its parent.
+
+        :param str path: Path to check.
+        :return: Whether the path exists, or `None` if it could not be
+            checked.
+        :rtype: bool|None
+        """
+        directory, name = self._split(path)
+        listing = self.listing_cache.get(directory)
+        if listing is None:
+            return _stat_exists(path)
+        return name in listing
+
+    def _check_directory(self, directory, members):
+        """
+        _check_directory returns the results for `members` from the listing
+            of `directory`, or `None` if it cannot be listed.
+        """
+        listing = self.listing_cache.get(directory)
+        if listing is None:
+            return None
+        return [(index, path, name in listing) for index, path, name in members]
+
+    @staticmethod
+    def _check_path(index, path):
+        return [(index, path, _stat_exists(path))]
+
+    def iter_check(self, paths):
+        """
+        iter_check checks every path in `paths` and yields the results as
+            they complete, which is not necessarily the order they were
+            passed in.
+
+        Closing the generator early skips the directories and paths that have
+            not been checked yet.
+
+        :param iterable[str] paths: Paths to check.
+        :return: Generator of `(index, path, exists)` tuples where `index` is
+            the position of the path in `paths` and `exists` is `None` if the
+            path could not be checked.
+        :rtype: generator
+        """
+        grouped = collections.OrderedDict()
+        for index, path in enumerate(paths):
+            if not path:
+                continue
+            directory, name = self._split(path)
+            grouped.setdefault(directory, []).append((index, path, name))
+
+        batch = self.pool.batch()
+        for directory, members in grouped.items():
+            batch.put(
+                members, functools.partial(self._check_directory, directory, members)
+            )
+        try:
+            for members, results in batch:
+                if results is None:
+                    # The directory cannot be listed, stat each path as its
+                    #   own job so the calls are spread over the pool.
+                    for index, path, _ in members:
+                        batch.put(
+                            None, functools.partial(self._check_path, index, path)
+                        )
+                    continue
+                for result in results:
+                    yield result
+        finally:
+            batch.close()
+
+    def check(self, paths):
+        """
+        check is a blocking helper around `iter_check`.
+
+        :param iterable[str] paths: Paths to check.
+        :return: Mapping of each path to whether it exists, or `None` if it
+            could not be checked.
+        :rtype: dict[str, bool|None]
+        """
+        return {path: exists for _, path, exists in self.iter_check(paths)}
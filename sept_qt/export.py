@@ -0,0 +1,214 @@
+from __future__ import unicode_literals
+
+import contextlib
+import csv
+import gzip
+import io
+import json
+import os
+
+import six
+from sept import errors
+
+CSV_FORMAT = "csv"
+JSON_FORMAT = "json"
+NDJSON_FORMAT = "ndjson"
+
+EXPORT_FORMATS = (CSV_FORMAT, JSON_FORMAT, NDJSON_FORMAT)
+_FORMAT_ALIASES = {
+    "jsonl": NDJSON_FORMAT,
+    "ndjson": NDJSON_FORMAT,
+    "json": JSON_FORMAT,
+    "csv": CSV_FORMAT,
+}
+_GZIP_EXTENSION = ".gz"
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+EXPORT_COLUMNS = ("id", "output", "error")
+
+
+def iter_resolved(template, data_objects, id_key="id"):
+    """
+    iter_resolved lazily resolves `template` for every data object and yields
+        one `(record_id, output, error)` row per object.
+
+    Rows are produced one at a time so `data_objects` may be any iterable,
+        including a generator reading from disk or a database cursor.
+    Resolving errors do not stop the iteration, instead the row will contain
+        `None` as the output and the error message as the error.
+
+    If a data object does not contain `id_key`, its position in
+        `data_objects` is used as the record id.
+
+    :param sept.Template template: Template to resolve for each data object.
+    :param iterable[dict] data_objects: Data objects to resolve against.
+    :param str id_key: Key to read the record id from each data object.
+    :return: Generator of `(record_id, output, error)` tuples.
+    :rtype: generator
+    """
+    for index, data_object in enumerate(data_objects):
+        record_id = data_object.get(id_key, index)
+        try:
+            output = template.resolve(data_object)
+        except errors.SeptError as err:
+            yield record_id, None, str(err)
+        else:
+            yield record_id, output, None
+
+
+def guess_format(path):
+    """
+    guess_format returns the export format and whether the output should be
+        gzipped based on the extension of `path`.
+
+    :param str path: Destination path, eg "manifest.ndjson.gz".
+    :return: The export format and compression flag.
+    :rtype: tuple[str|None, bool]
+    """
+    base, ext = os.path.splitext(path)
+    compress = ext.lower() == _GZIP_EXTENSION
+    if compress:
+        base, ext = os.path.splitext(base)
+    return _FORMAT_ALIASES.get(ext.lower().lstrip(".")), compress
+
+
+@contextlib.contextmanager
+def open_export_stream(path, compress=False, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    open_export_stream opens `path` for writing as a utf-8 text stream that
+        goes through a buffered writer and optionally through gzip.
+
+    :param str path: Destination path.
+    :param bool compress: Whether to gzip the output.
+    :param int buffer_size: Size in bytes of the write buffer.
+    :return: Context manager yielding a writable text stream.
+    """
+    raw = io.open(path, "wb", buffering=buffer_size)
+    stream = raw
+    if compress:
+        compressor = gzip.GzipFile(fileobj=raw, mode="wb")
+        stream = io.BufferedWriter(compressor, buffer_size=buffer_size)
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+        yield text
+    finally:
+        # GzipFile does not close the file object it was handed.
+        text.close()
+        raw.close()
+
+
+def _text(value):
+    # json.dumps returns a native str, which is bytes on Python 2.
+    if isinstance(value, six.binary_type):
+        return value.decode("utf-8")
+    return value
+
+
+class _Py2CsvWriter(object):
+    """
+    _Py2CsvWriter writes csv rows to a text stream on Python 2, where the csv
+        module only writes bytes. Each row is written to a byte buffer as
+        utf-8 and then decoded in to the stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = io.BytesIO()
+        self.writer = csv.writer(self.buffer)
+
+    def writerow(self, values):
+        self.writer.writerow(
+            [
+                value.encode("utf-8") if isinstance(value, six.text_type) else value
+                for value in values
+            ]
+        )
+        self.stream.write(self.buffer.getvalue().decode("utf-8"))
+        self.buffer.seek(0)
+        self.buffer.truncate()
+
+
+_csv_writer = csv.writer if six.PY3 else _Py2CsvWriter
+
+
+def _write_csv(stream, rows):
+    writer = _csv_writer(stream)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow(["" if value is None else value for value in row])
+        count += 1
+    return count
+
+
+def _write_ndjson(stream, rows):
+    count = 0
+    for row in rows:
+        stream.write(_text(json.dumps(dict(zip(EXPORT_COLUMNS, row)))))
+        stream.write("\n")
+        count += 1
+    return count
+
+
+def _write_json(stream, rows):
+    # Written as a streamed array so we never hold every row at once.
+    count = 0
+    stream.write("[")
+    for row in rows:
+        stream.write(",\n" if count else "\n")
+        stream.write(_text(json.dumps(dict(zip(EXPORT_COLUMNS, row)))))
+        count += 1
+    stream.write("\n]\n")
+    return count
+
+
+_WRITERS = {
+    CSV_FORMAT: _write_csv,
+    JSON_FORMAT: _write_json,
+    NDJSON_FORMAT: _write_ndjson,
+}
+
+
+def export_template(
+    template,
+    data_objects,
+    path,
+    export_format=None,
+    compress=None,
+    id_key="id",
+    buffer_size=DEFAULT_BUFFER_SIZE,
+):
+    """
+    export_template resolves `template` for every data object and streams
+        the `(id, output, error)` rows to `path` as they are resolved.
+
+    The whole result is never built in memory, each row is resolved and
+        written before the next data object is read, so `data_objects` can be
+        a generator over millions of records.
+
+    If `export_format` or `compress` are not passed, they are guessed from the
+        extension of `path`. "manifest.csv.gz" would be written as gzipped
+        CSV for example.
+
+    :param sept.Template template: Template to resolve for each data object.
+    :param iterable[dict] data_objects: Data objects to resolve against.
+    :param str path: Destination path.
+    :param str|None export_format: One of "csv", "json" or "ndjson" ("jsonl").
+    :param bool|None compress: Whether to gzip the output.
+    :param str id_key: Key to read the record id from each data object.
+    :param int buffer_size: Size in bytes of the write buffer.
+    :return: The number of rows written.
+    :rtype: int
+    """
+    guessed_format, guessed_compress = guess_format(path)
+    export_format = _FORMAT_ALIASES.get((export_format or guessed_format or "").lower())
+    if export_format is None:
+        raise ValueError(
+            "Could not determine the export format for {path}, expected one "
+            "of {formats}".format(path=path, formats=", ".join(EXPORT_FORMATS))
+        )
+    if compress is None:
+        compress = guessed_compress
+
+    rows = iter_resolved(template, data_objects, id_key=id_key)
+    with open_export_stream(path, compress=compress, buffer_size=buffer_size) as fh:
+        return _WRITERS[export_format](fh, rows)
@@ -0,0 +1,160 @@
+from .documentation_bundle import TOKENS, parser_entries
+from .template_bundle import template_tokens
+
+DATA_FIELDS_ATTRIBUTE = "data_fields"
+_MISSING = object()
+
+
+def token_data_fields(token, parser=None):
+    """
+    token_data_fields returns the data fields a Token reads in `getValue`.
+
+    Tokens declare the fields they read with a `data_fields` attribute, eg.
+        `data_fields = ("sg_status_list",)` on the Token class.
+    If `parser` is passed, Tokens that are not registered on it are treated
+        as the parser's default fallback Tokens, which read the field with
+        the same name as the Token.
+
+    :param sept.Token token: Token to inspect.
+    :param sept.PathTemplateParser|None parser: Optional parser the Token was
+        resolved by.
+    :return: The fields read, or `None` if the Token does not declare them.
+    :rtype: tuple[str]|None
+    """
+    fields = getattr(token, DATA_FIELDS_ATTRIBUTE, None)
+    if fields is not None:
+        return tuple(fields)
+    if parser is not None:
+        registered = parser_entries(parser, TOKENS) or []
+        if token.name not in set(entry.name for entry in registered):
+            return (token.name,)
+    return None
+
+
+def template_data_fields(template, parser=None, derived_fields=()):
+    """
+    template_data_fields returns every data field a `sept.Template` reads
+        through its Tokens.
+
+    Fields computed by one of `derived_fields` are replaced by the fields
+        that derived field is computed from, so the result can be requested
+        from ShotGrid directly.
+
+    :param sept.Template template: Validated template to inspect.
+    :param sept.PathTemplateParser|None parser: Optional parser the template
+        was validated by, see `token_data_fields`.
+    :param iterable[sept_qt.derived_fields.DerivedField] derived_fields:
+        Optional derived fields the Tokens may read.
+    :return: The sorted fields, or `None` if any Token used does not declare
+        the fields it reads, in which case every field may be needed.
+    :rtype: tuple[str]|None
+    """
+    derived_sources = dict(
+        (derived_field.name, derived_field.fields) for derived_field in derived_fields
+    )
+    fields = set()
+    for token in template_tokens(template):
+        token_fields = token_data_fields(token, parser)
+        if token_fields is None:
+            return None
+        for field in token_fields:
+            fields.update(derived_sources.get(field, (field,)))
+    return tuple(sorted(fields))
+
+
+def project_record(record, fields):
+    """
+    project_record returns a copy of `record` holding only `fields`, leaving
+        out any of them the record does not have.
+
+    :param dict record: Record to copy from.
+    :param iterable[str] fields: Fields to keep.
+    :rtype: dict
+    """
+    projected = {}
+    for field in fields:
+        value = record.get(field, _MISSING)
+        if value is not _MISSING:
+            projected[field] = value
+    return projected
+
+
+class RecordProjector(object):
+    """
+    RecordProjector slices records down to the fields the current template's
+        Tokens read, see `template_data_fields`.
+    Use it where records leave the preview, eg. before they are pickled for
+        another process or stored next to their results, so only the fields
+        the template needs are copied. Resolving records in place does not
+        need it.
+
+    Derived fields are kept as they are rather than expanded to the fields
+        they are computed from, so a Token reading
+        "published_file.version_number" does not keep the whole
+        "published_files" list.
+    The fields are only worked out again when the set of Tokens used by the
+        template changes, editing the text between Tokens keeps them.
+    """
+
+    def __init__(self, parser=None, keep_fields=("id",)):
+        """
+        :param sept.PathTemplateParser|None parser: Optional parser templates
+            are validated by, see `token_data_fields`.
+        :param iterable[str] keep_fields: Fields kept on every record, eg. the
+            id used to export results.
+        """
+        super(RecordProjector, self).__init__()
+        self.parser = parser
+        self.keep_fields = tuple(keep_fields)
+        self.fields = None
+        self._template_fields = ()
+        self._token_key = None
+
+    def update(self, template):
+        """
+        update works out the fields to keep for `template`.
+
+        :param sept.Template|None template: Validated template, `None` keeps
+            every field.
+        :return: Whether the fields to keep changed.
+        :rtype: bool
+        """
+        if template is None:
+            token_key = None
+        else:
+            token_key = tuple(
+                (token.name, type(token)) for token in template_tokens(template)
+            )
+        if token_key == self._token_key:
+            return False
+        self._token_key = token_key
+        fields = None
+        if template is not None:
+            fields = template_data_fields(template, self.parser)
+        self._template_fields = fields or ()
+        if fields is not None:
+            fields = tuple(sorted(set(fields) | set(self.keep_fields)))
+        changed = fields != self.fields
+        self.fields = fields
+        return changed
+
+    def project(self, records):
+        """
+        project lazily yields the projected copies of `records`, so projecting
+            a generator over a whole dataset never holds more than one record.
+
+        Records are yielded as they are if every field has to be kept, or if
+            they are missing one of the template's fields, so Tokens that
+            compute a missing field from others, eg. derived fields that were
+            not precomputed, still have them.
+
+        :param iterable[dict] records: Records to project.
+        :rtype: iterator[dict]
+        """
+        fields = self.fields
+        template_fields = self._template_fields
+        for record in records:
+            if fields is None or not all(field in record for field in template_fields):
+                yield record
+            else:
+                yield project_record(record, fields)
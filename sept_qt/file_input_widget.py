@@ -1,10 +1,71 @@
+import hashlib
 import os
+import sys
 
 from Qt import QtGui, QtWidgets, QtCore
 
 from sept import errors
 
+from .edit_history import history_path
 from .input_widget import TemplateInputWidget
+from .template_bundle import TemplateBundle, is_bundle_path
+
+
+def _file_signature(path, data):
+    """
+    _file_signature returns the mtime, size and content hash used to tell
+        whether a template file changed on disk.
+    """
+    stat = os.stat(path)
+    digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+    return stat.st_mtime, stat.st_size, digest
+
+
+def _bundle_names(path):
+    """
+    _bundle_names returns the template names in the bundle at `path`, or an
+        empty list if it does not exist yet.
+    """
+    if not os.path.exists(path):
+        return []
+    return TemplateBundle.load(path).names()
+
+
+# Job threads that timed out, kept alive until their file call returns so
+#   deleting the widget that started them does not destroy a running thread.
+_ABANDONED_JOB_THREADS = set()
+
+
+def _abandon_job_thread(thread):
+    thread.setParent(None)
+    _ABANDONED_JOB_THREADS.add(thread)
+
+    def _release():
+        _ABANDONED_JOB_THREADS.discard(thread)
+        thread.deleteLater()
+
+    thread.finished.connect(_release)
+
+
+class _FileJobThread(QtCore.QThread):
+    """
+    _FileJobThread runs a single file job off of the GUI thread and emits
+        either its result or the error it raised.
+    """
+
+    job_finished = QtCore.Signal(object, object)
+
+    def __init__(self, job, parent=None):
+        super(_FileJobThread, self).__init__(parent)
+        self._job = job
+
+    def run(self):
+        try:
+            result = self._job()
+        except Exception as err:
+            self.job_finished.emit(None, err)
+            return
+        self.job_finished.emit(result, None)
 
 
 class FileTemplateInputWidget(TemplateInputWidget):
@@ -30,6 +91,53 @@ class FileTemplateInputWidget(TemplateInputWidget):
     By default this is set at 1250ms but you can override this by passing a
         value to `timeout` during instantiation.
 
+    *Asynchronous File IO*
+    Reading and writing templates on a slow network mount can freeze your
+        GUI application.
+    Passing `async_io=True` will read, validate and write your templates on
+        a worker thread instead, disabling the load and save buttons while
+        a job is running.
+    If a job takes longer than `io_timeout` milliseconds (10000ms by default)
+        an error is displayed and the buttons are enabled again.
+    The `template_loaded` and `template_saved` signals are emitted with the
+        path once a job completes, and `io_error` with the path and error if
+        it fails.
+
+    *Watching For Changes*
+    Passing `watch=True` will reload `disk_path` when another application
+        changes it on disk.
+    Bursts of change notifications are coalesced and files whose mtime, size
+        and content are unchanged are not reloaded.
+    The file is read and validated on a worker thread.
+    If you have unsaved edits when the file changes, the `disk_conflict`
+        signal is emitted and you are asked whether to reload it.
+
+    *Template Bundles*
+    Files ending in ".septbundle" hold many named templates, see
+        `sept_qt.template_bundle.TemplateBundle`.
+    When one is chosen with the load or save buttons you are asked which
+        template in the bundle to use, or you can pass the name as
+        `disk_entry` during instantiation or as `entry` to `load_path` and
+        `save_path`.
+    The bundle is read to list its templates, and each template is parsed
+        once when it is loaded, on the worker thread if `async_io` is
+        enabled.
+    A `sept.Template` can not be stored in a bundle, so even entries that
+        `TemplateBundle` would trust are parsed when they are loaded here.
+        The stored validation results are only used by
+        `TemplateBundle.validate`, eg. to check a whole bundle against a new
+        parser.
+
+    *Persistent Undo History*
+    Passing a `history_dir` stores the undo history of each template file
+        in that directory, so undo keeps working after the file is loaded
+        again in a later session.
+    The history is written when the template is saved, when another file is
+        loaded and when the application quits, or whenever you call
+        `save_history`.
+    It is only restored if the file still contains the text it was saved
+        with.
+
     *Error handling*
     When using this in a larger GUI application, you may want to have a
         centralized place for displaying errors, if that is the case, you can
@@ -41,9 +149,25 @@ class FileTemplateInputWidget(TemplateInputWidget):
 
     LOAD_TEXT = "Load SEPT template"
     SAVE_TEXT = "Save SEPT template"
+    template_loaded = QtCore.Signal(str)
+    template_saved = QtCore.Signal(str)
+    io_error = QtCore.Signal(str, object)
+    disk_conflict = QtCore.Signal(str)
+    _IO_TIMEOUT = 10000
+    _WATCH_DEBOUNCE = 500
 
     def __init__(
-        self, parser, error_colour=None, timeout=None, disk_path=None, parent=None
+        self,
+        parser,
+        error_colour=None,
+        timeout=None,
+        disk_path=None,
+        parent=None,
+        async_io=False,
+        io_timeout=None,
+        watch=False,
+        disk_entry=None,
+        history_dir=None,
     ):
         super(FileTemplateInputWidget, self).__init__(
             parser=parser, error_colour=error_colour, timeout=timeout, parent=parent
@@ -51,37 +175,300 @@ class FileTemplateInputWidget(TemplateInputWidget):
         self._load_from_disk_button = None
         self._save_to_disk_button = None
         self._disk_path = disk_path
+        self._disk_entry = disk_entry
+        self.async_io = async_io
+        self._io_timeout = io_timeout or self._IO_TIMEOUT
+        self._job_thread = None
+        self._job_timer = QtCore.QTimer(self)
+        self._job_timer.setSingleShot(True)
+        self._job_timer.timeout.connect(self._handle_job_timeout)
+        self._job_callbacks = None
+        self._job_path = None
+
+        self._disk_signature = None
+        self._loaded_text = None
+        self._watcher = None
+        self._watch_timer = QtCore.QTimer(self)
+        self._watch_timer.setSingleShot(True)
+        self._watch_timer.timeout.connect(self._handle_watch_timeout)
+        self.watching = watch
+
+        self.history_dir = history_dir
+        self._history_key = None
+        application = QtWidgets.QApplication.instance()
+        if history_dir and application is not None:
+            application.aboutToQuit.connect(self.save_history)
+
+        if not disk_path or (is_bundle_path(disk_path) and not disk_entry):
+            return
+        if async_io:
+            # Let the worker thread find out whether the path exists.
+            self.load_path(disk_path, disk_entry)
+        elif os.path.exists(disk_path) and os.path.isfile(disk_path):
+            self.load_path(disk_path, disk_entry)
+
+    @property
+    def busy(self):
+        """
+        Whether a load or save job is currently running on a worker thread.
+
+        :rtype: bool
+        """
+        return self._job_thread is not None
+
+    @property
+    def watching(self):
+        return self._watcher is not None
+
+    @watching.setter
+    def watching(self, value):
+        """
+        Whether `disk_path` is reloaded when it changes on disk.
+
+        :param bool value: Whether to watch `disk_path`.
+        """
+        if value and self._watcher is None:
+            self._watcher = QtCore.QFileSystemWatcher(self)
+            self._watcher.fileChanged.connect(self._handle_watched_path_changed)
+            self._watcher.directoryChanged.connect(self._handle_watched_path_changed)
+            self._update_watched_paths()
+        elif not value and self._watcher is not None:
+            self._watch_timer.stop()
+            self._watcher.deleteLater()
+            self._watcher = None
 
-        if disk_path and os.path.exists(disk_path) and os.path.isfile(disk_path):
-            self.load_path(disk_path)
+    def has_unsaved_changes(self):
+        """
+        has_unsaved_changes checks whether the text was edited since it was
+            last loaded from or saved to `disk_path`.
+
+        :rtype: bool
+        """
+        if self._loaded_text is None:
+            return bool(self._line_widget.toPlainText())
+        return self._line_widget.toPlainText() != self._loaded_text
+
+    @QtCore.Slot()
+    def save_history(self):
+        """
+        save_history writes the undo history of the current template file to
+            `history_dir`. Nothing is written if `history_dir` is not set or
+            no file has been loaded or saved yet.
+        """
+        if not self.history_dir or self._history_key is None:
+            return
+        try:
+            self.history.save(
+                history_path(self.history_dir, *self._history_key),
+                self._line_widget.toPlainText(),
+            )
+        except (IOError, OSError) as err:
+            print("Error saving undo history: {}".format(str(err)))
 
-    def load_path(self, path):
+    def _switch_history(self, path, entry):
+        """
+        _switch_history loads the undo history for `path` and `entry` once
+            their text is displayed, the previous history must already have
+            been saved with `save_history`.
+        """
+        key = (path, entry)
+        if not self.history_dir or key == self._history_key:
+            return
+        self._history_key = key
+        self.history.load(
+            history_path(self.history_dir, path, entry),
+            self._line_widget.toPlainText(),
+        )
+
+    def load_path(self, path, entry=None):
         """
         load_path will attempt to read and validate your `sept.Template` from
             the filepath passed in.
         If you errors occur while validating, a popup will handle any exceptions
             from validating the template.
 
+        If `async_io` is enabled, the file is read and validated on a worker
+            thread and the text is updated once it completes.
+
         :param str path: Path to a file on disk containing the template_str.
+        :param str|None entry: Name of the template to load if `path` is a
+            template bundle.
         """
+        if self.async_io:
+            self._start_job(
+                path,
+                lambda: self._read_signed(path, entry),
+                lambda path, result: self._handle_load_job_finished(
+                    path, result, entry
+                ),
+                self._handle_load_error,
+            )
+            return
         try:
-            template_str = self._read_from_path(path)
-        except errors.SeptError as err:
-            import traceback
-
-            message = (
-                "Error loading template data from {path}\n"
-                "Error was: {error}\n"
-                "{long_error}".format(
-                    path=path, error=str(err), long_error=traceback.format_exc()
-                )
+            result = self._read_signed(path, entry)
+        except (errors.SeptError, KeyError, ValueError) as err:
+            self._handle_load_error(path, err)
+            return
+        else:  # No errors
+            self._handle_load_job_finished(path, result, entry)
+
+    def save_path(self, path, entry=None):
+        """
+        save_path will write the current template string to the filepath
+            passed in.
+
+        If `async_io` is enabled, the file is written on a worker thread.
+
+        If the text is not a valid template, nothing is written and the
+            error is reported through `io_error`.
+
+        :param str path: Path to write the template_str to.
+        :param str|None entry: Name to save the template as if `path` is a
+            template bundle.
+        """
+        self._save(path, entry)
+
+    def _save(self, path, entry=None, announce=False):
+        """
+        _save writes the current template to `path`, showing a message once it
+            is written if `announce` is True.
+        """
+        template = self.template
+        if template is None:
+            self._handle_save_error(
+                path, ValueError("The input text is not a valid template.")
             )
-            self._display_error(
-                message=message, title="Error loading template data from disk!"
+            return
+
+        def callback(path, signature):
+            self._handle_save_job_finished(path, signature, entry, announce)
+
+        if self.async_io:
+            self._start_job(
+                path,
+                lambda: self._write_to_path(path, template, entry),
+                callback,
+                self._handle_save_error,
             )
             return
-        else:  # No errors
-            self.setText(template_str)
+        try:
+            signature = self._write_to_path(path, template, entry)
+        except (IOError, OSError, ValueError) as err:
+            self._handle_save_error(path, err)
+            return
+        callback(path, signature)
+
+    def _handle_load_error(self, path, err):
+        import traceback
+
+        # Errors from a worker thread are no longer being handled here.
+        long_error = traceback.format_exc() if sys.exc_info()[0] else ""
+        message = (
+            "Error loading template data from {path}\n"
+            "Error was: {error}\n"
+            "{long_error}".format(path=path, error=str(err), long_error=long_error)
+        )
+        self.io_error.emit(path, err)
+        self._display_error(
+            message=message, title="Error loading template data from disk!"
+        )
+
+    def _handle_save_error(self, path, err):
+        self.io_error.emit(path, err)
+        self._display_error(
+            message="Error saving template to {path}\nError was: {error}".format(
+                path=path, error=str(err)
+            ),
+            title="Error saving template to disk!",
+        )
+
+    def _handle_load_job_finished(self, path, result, entry=None):
+        template_str, signature, template = result
+        if template_str is None:
+            # The file did not exist.
+            return
+        if (path, entry) != self._history_key:
+            self.save_history()
+        self.setText(template_str, template=template)
+        self._loaded_text = self._line_widget.toPlainText()
+        self._switch_history(path, entry)
+        if path == self._disk_path:
+            self._disk_signature = signature
+        self.template_loaded.emit(path)
+
+    def _handle_save_job_finished(self, path, signature, entry=None, announce=False):
+        if path == self._disk_path:
+            self._disk_signature = signature
+            self._loaded_text = self._line_widget.toPlainText()
+        # The current history now belongs to the file it was saved to.
+        self._history_key = (path, entry)
+        self.save_history()
+        self.template_saved.emit(path)
+        if announce:
+            self._display_information(
+                message="Template saved successfully to {}".format(path),
+                title="Success!",
+            )
+
+    def _set_buttons_enabled(self, enabled):
+        for button in (self._load_from_disk_button, self._save_to_disk_button):
+            if button is not None:
+                button.setEnabled(enabled)
+
+    def _start_job(self, path, job, callback, error_callback):
+        """
+        _start_job is an internal helper that runs `job` on a worker thread
+            and calls `callback` with the path and result once it completes,
+            or `error_callback` with the path and error if it raised.
+        """
+        if self.busy:
+            self._display_information(
+                message="Please wait for the current file operation to finish.",
+                title="Busy",
+            )
+            return
+        thread = _FileJobThread(job, parent=self)
+        thread.job_finished.connect(self._handle_job_finished)
+        self._job_thread = thread
+        self._job_callbacks = callback, error_callback
+        self._job_path = path
+        self._set_buttons_enabled(False)
+        self._job_timer.start(self._io_timeout)
+        thread.start()
+
+    def _finish_job(self):
+        thread = self._job_thread
+        self._job_timer.stop()
+        self._job_thread = None
+        self._set_buttons_enabled(True)
+        if thread is not None:
+            thread.job_finished.disconnect(self._handle_job_finished)
+            if thread.isFinished():
+                thread.deleteLater()
+            else:
+                # A hung thread is only cleaned up once its file call returns.
+                _abandon_job_thread(thread)
+
+    @QtCore.Slot(object, object)
+    def _handle_job_finished(self, result, error):
+        (callback, error_callback), path = self._job_callbacks, self._job_path
+        self._finish_job()
+        if error is None:
+            callback(path, result)
+        else:
+            error_callback(path, error)
+
+    @QtCore.Slot()
+    def _handle_job_timeout(self):
+        path = self._job_path
+        self._finish_job()
+        error = IOError(
+            "Timed out after {seconds:g}s accessing {path}".format(
+                seconds=self._io_timeout / 1000.0, path=path
+            )
+        )
+        self.io_error.emit(path, error)
+        self._display_error(message=str(error), title="File operation timed out!")
 
     def _build_input_widget(self):
         widget = QtWidgets.QWidget(self)
@@ -110,21 +497,147 @@ class FileTemplateInputWidget(TemplateInputWidget):
     def _display_information(self, message, title="Information!"):
         QtWidgets.QMessageBox.information(self, title, message)
 
-    def _read_from_path(self, path):
-        if not os.path.exists(path):
+    def _write_to_path(self, path, template, entry=None):
+        template_str = template._template_str
+        if entry is None:
+            with open(path, "w") as fh:
+                fh.write(template_str)
+            return _file_signature(path, template_str)
+
+        bundle = TemplateBundle()
+        if os.path.exists(path):
+            bundle = TemplateBundle.load(path)
+        bundle.set_template(entry, template, self.parser)
+        bundle.save(path)
+        return _file_signature(path, template_str)
+
+    def _read_signed(self, path, entry=None):
+        data, template = self._read_template(path, entry)
+        if data is None:
+            return None, None, None
+        return data, _file_signature(path, data), template
+
+    def _read_if_changed(self, path, known_signature, entry=None):
+        """
+        _read_if_changed is run on a worker thread to read and validate
+            `path` only if it differs from `known_signature`.
+
+        :return: The new signature, template string and template, the template
+            string and template are `None` if only the mtime changed. `None`
+            if nothing changed.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Removed, possibly in the middle of being replaced.
+            return None
+        if known_signature and (stat.st_mtime, stat.st_size) == known_signature[:2]:
+            return None
+        with open(path, "r") as fh:
+            data = fh.read()
+        if entry is not None:
+            data = TemplateBundle.from_string(data).template_str(entry)
+        signature = _file_signature(path, data)
+        if known_signature and signature[2] == known_signature[2]:
+            return signature, None, None
+        return signature, data, self._parse_template(data)
+
+    def _update_watched_paths(self):
+        """
+        _update_watched_paths points the watcher at `disk_path` and its
+            folder. The folder is watched as well because editors often save
+            by replacing the file, which stops the file itself being watched.
+        """
+        if self._watcher is None:
+            return
+        watched = self._watcher.files() + self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+        if not self._disk_path:
+            return
+        folder = os.path.dirname(os.path.abspath(self._disk_path))
+        paths = [folder]
+        if os.path.isfile(self._disk_path):
+            paths.append(self._disk_path)
+        self._watcher.addPaths(paths)
+
+    @QtCore.Slot(str)
+    def _handle_watched_path_changed(self, path):
+        # Restarting the timer coalesces bursts of notifications.
+        self._watch_timer.start(self._WATCH_DEBOUNCE)
+
+    @QtCore.Slot()
+    def _handle_watch_timeout(self):
+        if self._watcher is None or not self._disk_path:
+            return
+        if self.busy:
+            self._watch_timer.start(self._WATCH_DEBOUNCE)
             return
+        if self._disk_path not in self._watcher.files():
+            self._update_watched_paths()
+        path, entry = self._disk_path, self._disk_entry
+        known_signature = self._disk_signature
+        self._start_job(
+            path,
+            lambda: self._read_if_changed(path, known_signature, entry),
+            self._handle_reload_job_finished,
+            self._handle_load_error,
+        )
+
+    def _handle_reload_job_finished(self, path, result):
+        if result is None or path != self._disk_path:
+            return
+        signature, template_str, template = result
+        self._disk_signature = signature
+        if template_str is None:
+            return
+        if self.has_unsaved_changes():
+            self.disk_conflict.emit(path)
+            answer = QtWidgets.QMessageBox.question(
+                self,
+                "Template changed on disk",
+                "{path} was changed on disk but you have unsaved edits.\n"
+                "Reload it and discard your edits?".format(path=path),
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No,
+                QtWidgets.QMessageBox.No,
+            )
+            if answer != QtWidgets.QMessageBox.Yes:
+                return
+        self._handle_load_job_finished(
+            path, (template_str, signature, template), self._disk_entry
+        )
+
+    def _read_from_path(self, path, entry=None):
+        return self._read_template(path, entry)[0]
+
+    def _read_template(self, path, entry=None):
+        """
+        _read_template reads and validates the template string at `path`.
+
+        The validated `sept.Template` is returned alongside the string so it
+            can be handed to `setText` instead of being parsed again.
+        Bundle entries are parsed here too, a `sept.Template` can not be
+            stored in the bundle so even trusted entries need one parse.
+
+        :return: The template string and template, both `None` if `path`
+            does not exist.
+        :rtype: tuple[str|None, sept.Template|None]
+        """
+        if not os.path.exists(path):
+            return None, None
         with open(path, "r") as fh:
             data = fh.read()
-        try:
-            self.parser.validate_template(data)
-        except errors.SeptError:
-            raise
-        return data
+        if entry is not None:
+            data = TemplateBundle.from_string(data).template_str(entry)
+        return data, self._parse_template(data)
 
     def _get_folder_path(self):
         path = os.getcwd()
         if self._disk_path is None:
             return path
+        elif self.async_io:
+            # Avoid touching a possibly slow mount on the GUI thread.
+            return self._disk_path
         elif os.path.isfile(self._disk_path):
             if os.path.exists(self._disk_path):
                 path = self._disk_path
@@ -149,17 +662,94 @@ class FileTemplateInputWidget(TemplateInputWidget):
             return
         path = self._get_folder_path()
         new_path, _ = QtWidgets.QFileDialog.getSaveFileName(self, self.SAVE_TEXT, path)
-        with open(new_path, "w") as fh:
-            fh.write(self.template._template_str)
-        self._display_information(
-            message="Template saved successfully to {}".format(new_path),
-            title="Success!",
-        )
+        if not new_path:
+            return
+        if not is_bundle_path(new_path):
+            self._save(new_path, announce=True)
+            return
+
+        def save_entry(path, names):
+            entry = self._choose_bundle_entry(
+                path, names, self.SAVE_TEXT, editable=True
+            )
+            if entry:
+                self._save(path, entry, announce=True)
+
+        self._read_bundle_names(new_path, save_entry)
 
     @QtCore.Slot()
     def _handle_load_disk_button_clicked(self):
         path = self._get_folder_path()
 
         new_path, _ = QtWidgets.QFileDialog.getOpenFileName(self, self.LOAD_TEXT, path)
-        self._disk_path = new_path
-        self.load_path(self._disk_path)
+        if not new_path:
+            return
+        if not is_bundle_path(new_path):
+            self._load_disk_path(new_path)
+            return
+
+        def load_entry(path, names):
+            entry = self._choose_bundle_entry(path, names, self.LOAD_TEXT)
+            if entry:
+                self._load_disk_path(path, entry)
+
+        self._read_bundle_names(new_path, load_entry)
+
+    def _load_disk_path(self, path, entry=None):
+        self._disk_path = path
+        self._disk_entry = entry
+        self._disk_signature = None
+        self._update_watched_paths()
+        self.load_path(self._disk_path, entry)
+
+    def _read_bundle_names(self, path, callback):
+        """
+        _read_bundle_names reads the template names in the bundle at `path`
+            and calls `callback` with the path and names, on a worker thread
+            if `async_io` is enabled.
+        A bundle that does not exist yet has no names.
+        """
+        if self.async_io:
+            self._start_job(
+                path,
+                lambda: _bundle_names(path),
+                callback,
+                self._handle_bundle_error,
+            )
+            return
+        try:
+            names = _bundle_names(path)
+        except (IOError, OSError, ValueError) as err:
+            self._handle_bundle_error(path, err)
+            return
+        callback(path, names)
+
+    def _handle_bundle_error(self, path, err):
+        self.io_error.emit(path, err)
+        self._display_error(
+            message="Error reading template bundle {path}\n"
+            "Error was: {error}".format(path=path, error=str(err)),
+            title="Error reading template bundle!",
+        )
+
+    def _choose_bundle_entry(self, path, names, title, editable=False):
+        """
+        _choose_bundle_entry asks the user which of the template `names` in
+            the bundle at `path` to use. When `editable`, a new name can be
+            typed.
+
+        :return: The chosen name, or `None` if the user cancelled.
+        :rtype: str|None
+        """
+        if not names and not editable:
+            self._display_information(
+                message="{path} does not contain any templates.".format(path=path),
+                title="Empty template bundle",
+            )
+            return None
+        name, accepted = QtWidgets.QInputDialog.getItem(
+            self, title, "Template name:", names, 0, editable
+        )
+        if not accepted or not name:
+            return None
+        return name
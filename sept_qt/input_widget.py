@@ -1,7 +1,11 @@
+import collections
+
 from sept import errors
 
 from Qt import QtGui, QtWidgets, QtCore
 
+from .edit_history import EditHistory
+
 
 class TemplateInputWidget(QtWidgets.QWidget):
     """
@@ -26,11 +30,28 @@ class TemplateInputWidget(QtWidgets.QWidget):
     However, to ensure it visualizes correctly, you will want to ensure your
         error class has "location" and "length" attributes on it that can be
         used to display the highlighting.
+
+    *Template Caching*
+    The most recently validated templates are cached by their text, so
+        setting text that has been seen before does not parse it again.
+    The `parse_count` attribute counts how many times the parser was
+        actually asked to validate a template.
+
+    *Undo History*
+    QTextEdit's own undo stack is disabled because every error highlight
+        rebuilds the document, which both resets it and fills it with copies
+        of the whole rich text document.
+    Instead the plain text edits are recorded in `history`, an
+        `sept_qt.edit_history.EditHistory` which only stores the characters
+        each edit changed and is capped in size.
+    The undo and redo shortcuts and the Undo and Redo actions of the text
+        box's context menu all go through `history`.
     """
 
     ERROR_BG_COLOUR = QtGui.QColor(255, 192, 192)
     template_changed = QtCore.Signal(object)
     _TIMER_TIMEOUT = 1250
+    _TEMPLATE_CACHE_SIZE = 128
 
     def __init__(self, parser, error_colour=None, timeout=None, parent=None):
         """
@@ -61,6 +82,10 @@ class TemplateInputWidget(QtWidgets.QWidget):
         self._line_widget = None
         self._error_widget = None
         self._has_error = False
+        self._template_cache = collections.OrderedDict()
+        self.parse_count = 0
+        self.history = EditHistory()
+        self._history_text = ""
         self._build_ui()
 
     def _build_ui(self):
@@ -86,9 +111,57 @@ class TemplateInputWidget(QtWidgets.QWidget):
             QtWidgets.QSizePolicy.Policy.Expanding,
             QtWidgets.QSizePolicy.Policy.Fixed,
         )
+        self._line_widget.setUndoRedoEnabled(False)
         self._line_widget.textChanged.connect(self._handle_text_edited)
+        self._line_widget.installEventFilter(self)
+        self._line_widget.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self._line_widget.customContextMenuRequested.connect(
+            self._handle_context_menu_requested
+        )
         return self._line_widget
 
+    def _build_context_menu(self):
+        """
+        _build_context_menu returns the text box's standard context menu with
+            its Undo and Redo actions routed to `undo` and `redo`.
+        """
+        menu = self._line_widget.createStandardContextMenu()
+        for action in menu.actions():
+            name = action.objectName()
+            if name == "edit-undo":
+                action.setEnabled(self.history.can_undo())
+                action.triggered.connect(self.undo)
+            elif name == "edit-redo":
+                action.setEnabled(self.history.can_redo())
+                action.triggered.connect(self.redo)
+        return menu
+
+    @QtCore.Slot(QtCore.QPoint)
+    def _handle_context_menu_requested(self, position):
+        menu = self._build_context_menu()
+        menu.exec_(self._line_widget.mapToGlobal(position))
+        menu.deleteLater()
+
+    def eventFilter(self, watched, event):
+        """
+        eventFilter routes the undo and redo key presses of the text box to
+            `undo` and `redo`, QTextEdit would otherwise handle them itself.
+        """
+        if watched is self._line_widget and event.type() in (
+            QtCore.QEvent.ShortcutOverride,
+            QtCore.QEvent.KeyPress,
+        ):
+            for key_sequence, slot in (
+                (QtGui.QKeySequence.Undo, self.undo),
+                (QtGui.QKeySequence.Redo, self.redo),
+            ):
+                if event.matches(key_sequence):
+                    event.accept()
+                    if event.type() == QtCore.QEvent.KeyPress:
+                        slot()
+                    return True
+        return super(TemplateInputWidget, self).eventFilter(watched, event)
+
     def _stop_error_timer(self):
         """
         _stop_error_timer is an internal helper to cancel any queued errors
@@ -182,12 +255,93 @@ class TemplateInputWidget(QtWidgets.QWidget):
 
         return __display_error
 
-    def setText(self, text):
+    def setText(self, text, template=None):
+        """
+        setText replaces the template string and validates it.
+
+        If you have already validated `text`, pass the resulting
+            `sept.Template` as `template` so it is not parsed again.
+        It is used for the displayed text even if the document normalized
+            `text`, eg. dropping its trailing newline.
+
+        :param str text: The template string.
+        :param sept.Template|None template: Optional template validated from
+            `text`.
+        """
+        self._line_widget.textChanged.disconnect(self._handle_text_edited)
         self._line_widget.setHtml(text)
+        self._line_widget.textChanged.connect(self._handle_text_edited)
+        text = self._line_widget.toPlainText()
+        if template is not None:
+            self._cache_template(text, template)
+        # Recorded as its own step so undo never merges typing with it.
+        self.history.record(self._history_text, text, merge=False)
+        self._history_text = text
+        self._handle_text_edited()
+
+    @QtCore.Slot()
+    def undo(self):
+        """
+        undo reverts the most recent edit to the template string.
+        """
+        self._apply_history(self.history.undo(self._line_widget.toPlainText()))
+
+    @QtCore.Slot()
+    def redo(self):
+        """
+        redo re-applies the most recently undone edit to the template string.
+        """
+        self._apply_history(self.history.redo(self._line_widget.toPlainText()))
+
+    def _apply_history(self, result):
+        if result is None:
+            return
+        text, position = result
+        # Updated first so the change is not recorded as a new edit.
+        self._history_text = text
+        self._line_widget.textChanged.disconnect(self._handle_text_edited)
+        self._line_widget.setPlainText(text)
+        self._line_widget.textChanged.connect(self._handle_text_edited)
+        cursor = self._line_widget.textCursor()
+        cursor.setPosition(position)
+        self._line_widget.setTextCursor(cursor)
         self._handle_text_edited()
 
     def refresh(self):
-        self._line_widget.setHtml(self._line_widget.toPlainText())
+        """
+        refresh clears any error highlighting and emits `template_changed`
+            again for the current text.
+        """
+        if self._has_error:
+            # Rebuilding the document will validate it through textChanged.
+            self._line_widget.setHtml(self._line_widget.toPlainText())
+        else:
+            self._handle_text_edited()
+
+    def _cache_template(self, text, template):
+        self._template_cache.pop(text, None)
+        self._template_cache[text] = template
+        while len(self._template_cache) > self._TEMPLATE_CACHE_SIZE:
+            self._template_cache.popitem(last=False)
+
+    def _validate_template(self, text):
+        """
+        _validate_template returns the `sept.Template` for `text`, only
+            asking the parser to validate it if it is not already cached.
+        """
+        template = self._template_cache.get(text)
+        if template is None:
+            template = self._parse_template(text)
+        self._cache_template(text, template)
+        return template
+
+    def _parse_template(self, text):
+        """
+        _parse_template asks the parser to validate `text`, counting each call
+            in `parse_count`.
+        """
+        self.parse_count += 1
+        return self.parser.validate_template(text)
 
     @QtCore.Slot(object)
     def recieve_error(self, error):
@@ -217,8 +371,11 @@ class TemplateInputWidget(QtWidgets.QWidget):
             newly created Template as the only value.
         """
         text = self._line_widget.toPlainText()
+        # Formatting changes also emit textChanged, those are not recorded.
+        self.history.record(self._history_text, text)
+        self._history_text = text
         try:
-            template = self.parser.validate_template(text)
+            template = self._validate_template(text)
         except errors.MultipleBalancingError as errs:
             self._stop_error_timer()
             for error in errs.errors:
@@ -1,6 +1,126 @@
+import itertools
+import time
+
 from sept import errors
 
-from Qt import QtWidgets, QtCore
+from Qt import QtGui, QtWidgets, QtCore
+
+from . import export
+from .data import VERSION_FIELDS
+from .dataset_stream import DEFAULT_CHUNK_SIZE, iter_record_chunks
+from .derived_fields import enrich_record
+from .existence import PathExistenceChecker
+
+
+class _ExistenceCheckThread(QtCore.QThread):
+    """
+    _ExistenceCheckThread runs a `PathExistenceChecker` off of the GUI thread
+        and emits the results in small batches so the preview can annotate
+        rows as they complete without a signal per path.
+    """
+
+    paths_checked = QtCore.Signal(object)
+    _BATCH_INTERVAL = 0.1
+
+    def __init__(self, checker, paths, parent=None):
+        super(_ExistenceCheckThread, self).__init__(parent)
+        self._checker = checker
+        self._paths = paths
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        batch = []
+        last_emit = time.time()
+        results = self._checker.iter_check(self._paths)
+        try:
+            for index, path, exists in results:
+                if self._cancelled:
+                    return
+                batch.append((index, path, exists))
+                if time.time() - last_emit >= self._BATCH_INTERVAL:
+                    self.paths_checked.emit(batch)
+                    batch = []
+                    last_emit = time.time()
+            if batch and not self._cancelled:
+                self.paths_checked.emit(batch)
+        finally:
+            results.close()
+
+
+class _DatasetStreamThread(QtCore.QThread):
+    """
+    _DatasetStreamThread reads a dataset off of the GUI thread and emits its
+        records in chunks as they arrive, then the error that stopped it or
+        `None` once every chunk has been read.
+    """
+
+    records_read = QtCore.Signal(object)
+    read_finished = QtCore.Signal(object)
+
+    def __init__(self, iter_chunks, parent=None):
+        """
+        :param callable iter_chunks: Callable returning an iterator of lists
+            of records, called on the thread.
+        """
+        super(_DatasetStreamThread, self).__init__(parent)
+        self._iter_chunks = iter_chunks
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            chunks = self._iter_chunks()
+            try:
+                for chunk in chunks:
+                    if self._cancelled:
+                        return
+                    self.records_read.emit(chunk)
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+        except Exception as err:
+            self.read_finished.emit(err)
+            return
+        self.read_finished.emit(None)
+
+
+class _ExportThread(QtCore.QThread):
+    """
+    _ExportThread runs an export off of the GUI thread and emits the number
+        of rows written, or the error that stopped it.
+    """
+
+    export_finished = QtCore.Signal(object, object)
+
+    def __init__(self, run_export, parent=None):
+        """
+        :param callable run_export: Callable writing the export and returning
+            the number of rows written, called on the thread.
+        """
+        super(_ExportThread, self).__init__(parent)
+        self._run_export = run_export
+
+    def run(self):
+        try:
+            count = self._run_export()
+        except Exception as err:
+            self.export_finished.emit(None, err)
+            return
+        self.export_finished.emit(count, None)
+
+
+def _iter_enriched_chunks(path, chunk_size, derived_fields):
+    derived_fields = tuple(derived_fields)
+    for chunk in iter_record_chunks(path, chunk_size):
+        for record in chunk:
+            enrich_record(record, derived_fields)
+        yield chunk
 
 
 class TemplatePreviewWidget(QtWidgets.QPlainTextEdit):
@@ -15,11 +135,51 @@ class TemplatePreviewWidget(QtWidgets.QPlainTextEdit):
 
     Assuming all of the example cases resolve correctly, the QPlainTextEdit
         will update the preview text.
+
+    *Existence Checking*
+    If you pass a `sept_qt.existence.PathExistenceChecker` as the
+        `existence_checker` parameter, or toggle the `check_existence_action`,
+        each resolved path is checked on disk in the background.
+    Rows are annotated as their results arrive, paths that do not exist are
+        highlighted with `MISSING_BG_COLOUR` and paths that could not be
+        checked, eg. because of permissions, with `UNKNOWN_BG_COLOUR`.
+
+    *Loading Datasets*
+    `load_versions` shows the Versions a `sept_qt.data.ShotGridLoader` has
+        cached straight away and loads fresh ones on a background thread,
+        previewing the current template again once they arrive.
+    `load_file` streams the records of a JSON or NDJSON file in to
+        `data_objects` on a background thread, previewing each chunk of
+        records as it is read so the first rows show up straight away.
+
+    *Exporting*
+    The `export_action` writes a row for every data object on a background
+        thread, so exporting millions of rows does not freeze the GUI, see
+        `start_export`.
+    `data_exported` is emitted with the path and number of rows once an
+        export is written, or `data_export_error` if it fails.
     """
 
     resolve_error = QtCore.Signal(object)
+    EXPORT_TEXT = "Export resolved paths..."
+    EXPORT_FILTERS = (
+        "CSV (*.csv);;"
+        "NDJSON (*.ndjson *.jsonl);;"
+        "JSON (*.json);;"
+        "Gzipped CSV (*.csv.gz);;"
+        "Gzipped NDJSON (*.ndjson.gz *.jsonl.gz);;"
+        "Gzipped JSON (*.json.gz)"
+    )
+    CHECK_EXISTENCE_TEXT = "Check paths exist on disk"
+    MISSING_BG_COLOUR = QtGui.QColor(255, 192, 192)
+    UNKNOWN_BG_COLOUR = QtGui.QColor(255, 240, 192)
+    existence_checked = QtCore.Signal(object)
+    data_loaded = QtCore.Signal(object)
+    data_load_error = QtCore.Signal(object)
+    data_exported = QtCore.Signal(str, int)
+    data_export_error = QtCore.Signal(object)
 
-    def __init__(self, data_list, text=None, parent=None):
+    def __init__(self, data_list, text=None, parent=None, existence_checker=None):
         """
         TemplatePreviewWidget takes a list of data dictionaries for resolving
             a template.
@@ -43,12 +203,64 @@ class TemplatePreviewWidget(QtWidgets.QPlainTextEdit):
             `sept.Template` in different scenarios.
         :param str text: Default text for the QPlainTextEdit.
         :param QtWidgets.QWidget|None parent: Optional Qt parent widget.
+        :param sept_qt.existence.PathExistenceChecker|None existence_checker:
+            Optional checker used to test whether each resolved path exists.
         """
         super(TemplatePreviewWidget, self).__init__(text, parent)
         self.setReadOnly(True)
         self._data_objects = data_list
+        self._template = None
+        self._previews = []
+        self._path_existence = {}
+        self._existence_checker = existence_checker
+        self._existence_thread = None
+        self._stream_thread = None
+        self._export_thread = None
+        self._clear_on_read = False
         self.setEnabled(False)
 
+        # Exposed so host applications can add it to their own menus.
+        self.export_action = QtWidgets.QAction(self.EXPORT_TEXT, self)
+        self.export_action.setEnabled(False)
+        self.export_action.triggered.connect(self._handle_export_action_triggered)
+
+        self.check_existence_action = QtWidgets.QAction(self.CHECK_EXISTENCE_TEXT, self)
+        self.check_existence_action.setCheckable(True)
+        self.check_existence_action.setChecked(existence_checker is not None)
+        self.check_existence_action.toggled.connect(
+            self._handle_check_existence_toggled
+        )
+
+    @property
+    def template(self):
+        return self._template
+
+    @property
+    def existence_checker(self):
+        return self._existence_checker
+
+    @existence_checker.setter
+    def existence_checker(self, value):
+        """
+        Checker used to test whether each resolved path exists on disk.
+        Setting this to `None` disables existence checking.
+
+        :param sept_qt.existence.PathExistenceChecker|None value: The checker
+        """
+        self._existence_checker = value
+        self.check_existence_action.setChecked(value is not None)
+
+    @property
+    def path_existence(self):
+        """
+        Mapping of each checked preview path to whether it exists on disk, or
+            `None` if it could not be checked.
+        Paths whose check has not completed yet are not included.
+
+        :rtype: dict[str, bool|None]
+        """
+        return self._path_existence
+
     @property
     def data_objects(self):
         return self._data_objects
@@ -66,6 +278,120 @@ class TemplatePreviewWidget(QtWidgets.QPlainTextEdit):
 
         self._data_objects = value
 
+    def load_versions(self, loader, filters, fields=VERSION_FIELDS, limit=None):
+        """
+        load_versions replaces `data_objects` with the Versions from
+            `loader` matching `filters`.
+
+        Cached Versions, even expired ones, are used straight away and the
+            Versions are then loaded again on a background thread.
+        The Versions are previewed a page at a time as they arrive, replacing
+            the cached ones, and `data_loaded` is emitted with every Version
+            once they have all arrived.
+        If loading fails `data_load_error` is emitted with the error.
+
+        :param sept_qt.data.ShotGridLoader loader: Loader to load with.
+        :param list filters: ShotGrid filters.
+        :param list[str] fields: Version fields to load.
+        :param int|None limit: Optional maximum number of Versions.
+        """
+        self._cancel_stream()
+        cached = loader.cached_versions(filters, fields, limit)
+        if cached is not None:
+            self.data_objects = cached.records
+            if self._template is not None:
+                self.preview_template(self._template)
+            if not cached.expired:
+                self.data_loaded.emit(cached.records)
+                return
+        self._start_stream(
+            lambda: loader.iter_versions(filters, fields, limit, refresh=True),
+            # Keep showing the cached Versions until the first page arrives.
+            keep_current=cached is not None,
+        )
+
+    def load_file(self, path, chunk_size=DEFAULT_CHUNK_SIZE, derived_fields=()):
+        """
+        load_file replaces `data_objects` with the records of the JSON or
+            NDJSON dataset at `path`, see
+            `sept_qt.dataset_stream.iter_records`.
+
+        The file is read on a background thread and the current template is
+            previewed for each chunk of `chunk_size` records as it arrives.
+            `data_loaded` is emitted with every record once the whole file
+            has been read, or `data_load_error` if reading it fails.
+
+        :param str path: Path to a JSON or NDJSON dataset.
+        :param int chunk_size: Number of records previewed at a time.
+        :param iterable[sept_qt.derived_fields.DerivedField] derived_fields:
+            Optional fields computed for each record as it is read.
+        """
+        self._cancel_stream()
+        self._start_stream(
+            lambda: _iter_enriched_chunks(path, chunk_size, derived_fields)
+        )
+
+    def _start_stream(self, iter_chunks, keep_current=False):
+        self._clear_on_read = keep_current
+        if not keep_current:
+            self._clear_data()
+        thread = _DatasetStreamThread(iter_chunks, parent=self)
+        thread.records_read.connect(self._handle_records_read)
+        thread.read_finished.connect(self._handle_read_finished)
+        thread.finished.connect(thread.deleteLater)
+        self._stream_thread = thread
+        thread.start()
+
+    def _clear_data(self):
+        self._clear_on_read = False
+        self._data_objects = []
+        self._previews = []
+        self._cancel_existence_check()
+        self._path_existence = {}
+        self.setPlainText("")
+
+    def _cancel_stream(self):
+        thread = self._stream_thread
+        self._stream_thread = None
+        if thread is None:
+            return
+        thread.records_read.disconnect(self._handle_records_read)
+        thread.read_finished.disconnect(self._handle_read_finished)
+        thread.cancel()
+
+    @QtCore.Slot(object)
+    def _handle_records_read(self, records):
+        if self._clear_on_read:
+            self._clear_data()
+        self._data_objects.extend(records)
+        if self._template is None or len(self._previews) < len(
+            self._data_objects
+        ) - len(records):
+            # Nothing is previewed yet, or an earlier chunk failed to resolve.
+            return
+        _previews = []
+        for data_object in records:
+            try:
+                output_data = self._template.resolve(data_object)
+            except errors.ParsingError as err:
+                self.resolve_error.emit(err)
+                return
+            _previews.append(output_data)
+        self._previews.extend(_previews)
+        self.appendPlainText("\n".join(_previews))
+
+    @QtCore.Slot(object)
+    def _handle_read_finished(self, error):
+        self._stream_thread = None
+        if error is not None:
+            self.data_load_error.emit(error)
+            return
+        if self._clear_on_read:
+            # Nothing was read, so nothing replaced the previous records.
+            self._clear_data()
+        self.check_existence()
+        self.data_loaded.emit(self._data_objects)
+
     @QtCore.Slot(object)
     def preview_template(self, template):
         """
@@ -79,6 +405,8 @@ class TemplatePreviewWidget(QtWidgets.QPlainTextEdit):
 
         :param sept.Template template: Template to resolve for each data_object
         """
+        self._template = template
+        self.export_action.setEnabled(self._export_thread is None)
         _previews = []
         for data_object in self.data_objects:
             try:
@@ -90,3 +418,183 @@ class TemplatePreviewWidget(QtWidgets.QPlainTextEdit):
 
         text = "\n".join(_previews)
         self.setPlainText(text)
+        self._previews = _previews
+        self.check_existence()
+
+    def check_existence(self):
+        """
+        check_existence starts checking whether each previewed path exists
+            on disk, cancelling any check that is still running.
+
+        The check runs on a background thread and each row is annotated as
+            its result arrives. The `existence_checked` signal is emitted with
+            the `path_existence` mapping once every path has been checked.
+        Nothing happens if no `existence_checker` has been set.
+        """
+        self._cancel_existence_check()
+        self._path_existence = {}
+        if self._existence_checker is None or not self._previews:
+            return
+
+        thread = _ExistenceCheckThread(
+            self._existence_checker, list(self._previews), parent=self
+        )
+        thread.paths_checked.connect(self._handle_paths_checked)
+        thread.finished.connect(self._handle_existence_thread_finished)
+        self._existence_thread = thread
+        thread.start()
+
+    def _cancel_existence_check(self):
+        thread = self._existence_thread
+        self._existence_thread = None
+        if thread is None:
+            return
+        thread.paths_checked.disconnect(self._handle_paths_checked)
+        thread.finished.disconnect(self._handle_existence_thread_finished)
+        thread.cancel()
+        # Let the thread clean itself up once its current directory is done.
+        thread.finished.connect(thread.deleteLater)
+
+    @QtCore.Slot(object)
+    def _handle_paths_checked(self, results):
+        missing_format = QtGui.QTextCharFormat()
+        missing_format.setBackground(self.MISSING_BG_COLOUR)
+        unknown_format = QtGui.QTextCharFormat()
+        unknown_format.setBackground(self.UNKNOWN_BG_COLOUR)
+        document = self.document()
+        for index, path, exists in results:
+            # Results queued before the previews were rebuilt are stale.
+            if index >= len(self._previews) or self._previews[index] != path:
+                continue
+            self._path_existence[path] = exists
+            if exists:
+                continue
+            cursor = QtGui.QTextCursor(document.findBlockByNumber(index))
+            cursor.select(QtGui.QTextCursor.BlockUnderCursor)
+            cursor.setCharFormat(missing_format if exists is False else unknown_format)
+
+    @QtCore.Slot()
+    def _handle_existence_thread_finished(self):
+        thread = self._existence_thread
+        self._existence_thread = None
+        if thread is not None:
+            thread.deleteLater()
+        self.existence_checked.emit(self._path_existence)
+
+    @QtCore.Slot(bool)
+    def _handle_check_existence_toggled(self, checked):
+        if checked and self._existence_checker is None:
+            self._existence_checker = PathExistenceChecker()
+        elif not checked:
+            self._existence_checker = None
+            self._cancel_existence_check()
+            self._path_existence = {}
+            # Re-set the text to drop any missing path highlighting.
+            self.setPlainText("\n".join(self._previews))
+            return
+        self.check_existence()
+
+    def export_template(self, path, data_objects=None, **kwargs):
+        """
+        export_template streams the `(id, output, error)` rows for the last
+            previewed template to `path`, on the calling thread. Use
+            `start_export` to export without blocking the GUI.
+
+        By default the rows are resolved from `data_objects`, however you
+            can pass any iterable of data dictionaries, such as a generator
+            over your entire dataset, to export the same template the user
+            previewed.
+        Any extra keyword arguments are passed on to
+            `sept_qt.export.export_template`.
+
+        :param str path: Destination path, the format is guessed from the
+            extension.
+        :param iterable[dict]|None data_objects: Optional data dictionaries
+            to export instead of `data_objects`.
+        :return: The number of rows written.
+        :rtype: int
+        """
+        if self._template is None:
+            raise ValueError("No template has been previewed yet.")
+        if data_objects is None:
+            data_objects = self._data_objects
+        return export.export_template(self._template, data_objects, path, **kwargs)
+
+    @QtCore.Slot()
+    def _handle_export_action_triggered(self):
+        new_path, selected_filter = QtWidgets.QFileDialog.getSaveFileName(
+            self, self.EXPORT_TEXT, "", self.EXPORT_FILTERS
+        )
+        if not new_path:
+            return
+        if export.guess_format(new_path)[0] is None and "(*" in selected_filter:
+            # Use the first extension of the chosen filter, eg "(*.csv.gz)"
+            extension = selected_filter.split("(*", 1)[1].split()[0].rstrip(")")
+            new_path += extension
+        try:
+            self._start_export(new_path, announce=True)
+        except ValueError as err:
+            self._show_export_error(new_path, err)
+
+    def start_export(self, path, **kwargs):
+        """
+        start_export writes the rows `export_template` would to `path` on a
+            background thread, emitting `data_exported` or
+            `data_export_error` once it is done.
+
+        The data objects loaded when it is called are exported, records
+            streamed in afterwards are not.
+
+        :param str path: Destination path, the format is guessed from the
+            extension.
+        """
+        self._start_export(path, **kwargs)
+
+    def _start_export(self, path, announce=False, **kwargs):
+        if self._template is None:
+            raise ValueError("No template has been previewed yet.")
+        if self._export_thread is not None:
+            raise ValueError("An export is already running.")
+        template = self._template
+        data_objects = itertools.islice(self._data_objects, len(self._data_objects))
+
+        def run_export():
+            return export.export_template(template, data_objects, path, **kwargs)
+
+        thread = _ExportThread(run_export, parent=self)
+        thread.export_finished.connect(
+            lambda count, error: self._handle_export_finished(
+                path, count, error, announce
+            )
+        )
+        thread.finished.connect(thread.deleteLater)
+        self._export_thread = thread
+        self.export_action.setEnabled(False)
+        thread.start()
+
+    def _handle_export_finished(self, path, count, error, announce):
+        self._export_thread = None
+        self.export_action.setEnabled(self._template is not None)
+        if error is not None:
+            if announce:
+                self._show_export_error(path, error)
+            self.data_export_error.emit(error)
+            return
+        self.data_exported.emit(path, count)
+
+    def _show_export_error(self, path, error):
+        QtWidgets.QMessageBox.critical(
+            self,
+            "Error exporting resolved paths!",
+            "Error exporting to {path}\nError was: {error}".format(
+                path=path, error=str(error)
+            ),
+        )
+
+    def contextMenuEvent(self, event):
+        menu = self.createStandardContextMenu()
+        menu.addSeparator()
+        menu.addAction(self.export_action)
+        menu.addAction(self.check_existence_action)
+        menu.exec_(event.globalPos())
+        menu.deleteLater()
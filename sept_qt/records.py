@@ -0,0 +1,257 @@
+try:
+    from collections.abc import Mapping, Sequence
+except ImportError:  # Python 2
+    from collections import Mapping, Sequence
+
+import six
+
+_MISSING = object()
+INTERN_MAX_LENGTH = 64
+INTERN_SAMPLE_SIZE = 64
+
+
+class RecordSchema(object):
+    """
+    RecordSchema is the ordered set of keys shared by every record in a
+        `RecordStore`. Keys are only ever added, so the position of a key
+        never changes.
+    """
+
+    def __init__(self, keys=()):
+        """
+        :param iterable[str] keys: Initial keys.
+        """
+        super(RecordSchema, self).__init__()
+        self.keys = []
+        self.indexes = {}
+        # Schemas of the dictionaries nested under each key.
+        self.children = {}
+        for key in keys:
+            self.add(key)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key):
+        """
+        add returns the position of `key`, adding it if it is new.
+
+        :param str key: Key to add.
+        :rtype: int
+        """
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = len(self.keys)
+            self.keys.append(key)
+        return index
+
+    def child(self, key):
+        """
+        :param str key: Key holding nested dictionaries.
+        :return: The schema shared by the dictionaries nested under `key`.
+        :rtype: RecordSchema
+        """
+        schema = self.children.get(key)
+        if schema is None:
+            schema = self.children[key] = RecordSchema()
+        return schema
+
+
+class _StringTable(object):
+    """
+    _StringTable shares the strings stored under one key of a schema, and
+        tracks whether they repeat often enough to be worth sharing.
+    """
+
+    __slots__ = ("strings", "count")
+
+    def __init__(self):
+        self.strings = {}
+        self.count = 0
+
+    def share(self, value):
+        """
+        :return: The shared copy of `value`.
+        :rtype: str
+        """
+        self.count += 1
+        return self.strings.setdefault(value, value)
+
+    def repeats(self):
+        """
+        :return: Whether at most half of the strings seen so far were unique,
+            always True until `INTERN_SAMPLE_SIZE` strings were seen.
+        :rtype: bool
+        """
+        return self.count < INTERN_SAMPLE_SIZE or len(self.strings) * 2 <= self.count
+
+
+def _unpack(value):
+    if isinstance(value, CompactRecord):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return [_unpack(item) for item in value]
+    return value
+
+
+class CompactRecord(Mapping):
+    """
+    CompactRecord is a read only dictionary-like view of one row of a
+        `RecordStore`, so `Token.getValue(data)` implementations using
+        `data.get(key, default)` or `data[key]` keep working.
+    """
+
+    __slots__ = ("_schema", "_values")
+
+    def __init__(self, schema, values):
+        self._schema = schema
+        self._values = values
+
+    def get(self, key, default=None):
+        index = self._schema.indexes.get(key)
+        if index is None or index >= len(self._values):
+            return default
+        value = self._values[index]
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        for key, value in zip(self._schema.keys, self._values):
+            if value is not _MISSING:
+                yield key
+
+    def __len__(self):
+        return sum(1 for value in self._values if value is not _MISSING)
+
+    def __repr__(self):
+        return "CompactRecord({!r})".format(self.to_dict())
+
+    def to_dict(self):
+        """
+        :return: A plain dictionary copy of the record, including nested
+            records.
+        :rtype: dict
+        """
+        return dict(
+            (key, _unpack(value))
+            for key, value in zip(self._schema.keys, self._values)
+            if value is not _MISSING
+        )
+
+
+class RecordStore(Sequence):
+    """
+    RecordStore holds many dictionaries that share the same keys, such as
+        ShotGrid records, using a fraction of the memory of plain
+        dictionaries.
+
+    The keys are stored once in a shared `RecordSchema` and each record is
+        stored as a tuple of its values.
+    Short strings that repeat across records, like status codes or sequence
+        names, are stored once and shared.
+    Strings are shared per key, a key whose strings are mostly unique, like
+        a code or a path, stops being shared after its first
+        `INTERN_SAMPLE_SIZE` strings so the store does not hold on to an
+        extra reference to each of them.
+    Indexing or iterating the store returns `CompactRecord` views, which
+        can be passed anywhere a data dictionary is expected, eg. as the
+        `data_list` of `sept_qt.TemplatePreviewWidget`.
+    Nested dictionaries, and lists of dictionaries such as
+        "published_files", are packed the same way and read back as
+        `CompactRecord` views and tuples of them.
+    """
+
+    def __init__(self, records=(), keys=(), intern_max_length=INTERN_MAX_LENGTH):
+        """
+        :param iterable[dict] records: Optional records to add.
+        :param iterable[str] keys: Optional keys to put first in the schema.
+        :param int intern_max_length: Strings up to this length are shared
+            between records, 0 disables sharing.
+        """
+        super(RecordStore, self).__init__()
+        self.schema = RecordSchema(keys)
+        self.intern_max_length = intern_max_length
+        self._rows = []
+        # `_StringTable` by schema and key, `None` once a key stops sharing.
+        self._strings = {}
+        self.extend(records)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [CompactRecord(self.schema, row) for row in self._rows[index]]
+        return CompactRecord(self.schema, self._rows[index])
+
+    def __iter__(self):
+        schema = self.schema
+        for row in self._rows:
+            yield CompactRecord(schema, row)
+
+    def _share(self, schema, key, value):
+        table_key = (id(schema), key)
+        table = self._strings.get(table_key, _MISSING)
+        if table is None:
+            return value
+        if table is _MISSING:
+            table = self._strings[table_key] = _StringTable()
+        value = table.share(value)
+        if not table.repeats():
+            self._strings[table_key] = None
+        return value
+
+    def _pack_value(self, schema, key, value):
+        if isinstance(value, six.string_types):
+            if len(value) <= self.intern_max_length:
+                value = self._share(schema, key, value)
+        elif isinstance(value, dict):
+            child = schema.child(key)
+            value = CompactRecord(child, self._pack(child, value))
+        elif isinstance(value, list) and value:
+            if all(isinstance(item, dict) for item in value):
+                child = schema.child(key)
+                value = tuple(
+                    CompactRecord(child, self._pack(child, item)) for item in value
+                )
+        return value
+
+    def _pack(self, schema, record):
+        for key in record:
+            if key not in schema.indexes:
+                schema.add(key)
+        values = [_MISSING] * len(schema)
+        for key, value in record.items():
+            values[schema.indexes[key]] = self._pack_value(schema, key, value)
+        # Trailing missing values are left off, `get` treats them as missing.
+        while values and values[-1] is _MISSING:
+            values.pop()
+        return tuple(values)
+
+    def append(self, record):
+        """
+        :param dict record: Record to add.
+        """
+        self._rows.append(self._pack(self.schema, record))
+
+    def extend(self, records):
+        """
+        :param iterable[dict] records: Records to add.
+        """
+        schema = self.schema
+        self._rows.extend(self._pack(schema, record) for record in records)
+
+    def to_dicts(self):
+        """
+        :return: Plain dictionary copies of every record.
+        :rtype: list[dict]
+        """
+        return [record.to_dict() for record in self]
@@ -0,0 +1,84 @@
+import contextlib
+import os
+import sqlite3
+
+_SCHEMA_VERSION_KEY = "schema_version"
+
+
+@contextlib.contextmanager
+def connect(path):
+    """
+    connect opens the SQLite database at `path` for the duration of the
+        context, committing if it exits cleanly and rolling back otherwise.
+
+    `sqlite3` connections can only be used on the thread that opened them,
+        so callers open one for each operation rather than sharing one.
+
+    :param str path: Path of the SQLite database.
+    :return: Context manager yielding a `sqlite3.Connection`.
+    """
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            yield connection
+    finally:
+        connection.close()
+
+
+def read_meta(connection, key):
+    """
+    read_meta returns the value stored under `key` in the "meta" table.
+
+    :param sqlite3.Connection connection: Open connection.
+    :param str key: Key to read.
+    :return: The value, or `None` if nothing is stored.
+    :rtype: str|None
+    """
+    row = connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return None if row is None else row[0]
+
+
+def write_meta(connection, key, value):
+    """
+    write_meta stores `value` under `key` in the "meta" table.
+
+    :param sqlite3.Connection connection: Open connection.
+    :param str key: Key to write.
+    :param str value: Value to store.
+    """
+    connection.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+    )
+
+
+def create_schema(path, version, tables):
+    """
+    create_schema creates the database at `path` with a "meta" table and
+        `tables`, creating its folder if needed.
+
+    If the database was created with another schema `version`, `tables` are
+        dropped and created again, so a format change only costs the data
+        stored in them.
+
+    :param str path: Path of the SQLite database.
+    :param int version: Version of the table definitions.
+    :param list[tuple[str, str]] tables: `(name, columns)` of each table,
+        where `columns` is the body of its CREATE TABLE statement.
+    """
+    folder = os.path.dirname(path)
+    if folder and not os.path.isdir(folder):
+        os.makedirs(folder)
+    with connect(path) as connection:
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        if read_meta(connection, _SCHEMA_VERSION_KEY) != str(version):
+            for name, _ in tables:
+                connection.execute("DROP TABLE IF EXISTS {}".format(name))
+        for name, columns in tables:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS {name} ({columns})".format(
+                    name=name, columns=columns
+                )
+            )
+        write_meta(connection, _SCHEMA_VERSION_KEY, str(version))
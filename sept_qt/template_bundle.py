@@ -0,0 +1,259 @@
+import collections
+import hashlib
+import io
+import json
+import os
+
+import six
+from sept import errors
+
+from .documentation_bundle import parser_fingerprint
+
+FORMAT_VERSION = 1
+BUNDLE_EXTENSION = ".septbundle"
+
+BundleEntry = collections.namedtuple(
+    "BundleEntry", ("template_str", "sha1", "valid", "error", "tokens", "metadata")
+)
+
+
+def _hash_template(template_str):
+    return hashlib.sha1(template_str.encode("utf-8")).hexdigest()
+
+
+def template_tokens(template):
+    """
+    template_tokens returns the Tokens used by a `sept.Template`, including
+        Tokens nested inside of other Tokens, once each.
+
+    :param sept.Template template: Template to inspect.
+    :rtype: list[sept.Token]
+    """
+    tokens = {}
+    for resolved_token in getattr(template, "_resolved_tokens", []):
+        raw_token = resolved_token.raw_token
+        # Nested tokens keep their child ResolvedToken as the raw token.
+        while hasattr(raw_token, "raw_token"):
+            raw_token = raw_token.raw_token
+        tokens.setdefault(raw_token.name, raw_token)
+    return [tokens[name] for name in sorted(tokens)]
+
+
+def template_token_names(template):
+    """
+    template_token_names returns the names of the Tokens used by a
+        `sept.Template`, including Tokens nested inside of other Tokens.
+
+    :param sept.Template template: Template to inspect.
+    :rtype: list[str]
+    """
+    return [token.name for token in template_tokens(template)]
+
+
+def is_bundle_path(path):
+    """
+    :param str path: Path to check.
+    :return: Whether `path` has the template bundle extension.
+    :rtype: bool
+    """
+    return path.lower().endswith(BUNDLE_EXTENSION)
+
+
+class TemplateBundle(object):
+    """
+    TemplateBundle stores many named template strings in one file, along with
+        the fingerprint of the parser they were validated against and the
+        result of that validation.
+
+    Loading a bundle is a single read, and entries whose text and parser
+        fingerprint are unchanged are trusted without being parsed again.
+    The `sept.Template` for an entry is only parsed when it is requested
+        through `template`.
+    """
+
+    def __init__(self, fingerprint=None, entries=None, metadata=None):
+        """
+        :param str|None fingerprint: Fingerprint of the parser the entries
+            were validated against, see
+            `sept_qt.documentation_bundle.parser_fingerprint`.
+        :param dict[str, BundleEntry]|None entries: Optional entries by name.
+        :param dict|None metadata: Optional metadata for the whole bundle.
+        """
+        super(TemplateBundle, self).__init__()
+        self.fingerprint = fingerprint
+        self.entries = collections.OrderedDict(entries or {})
+        self.metadata = metadata or {}
+        self._templates = {}
+
+    @classmethod
+    def from_string(cls, data):
+        """
+        :param str data: Serialized bundle.
+        :rtype: TemplateBundle
+        """
+        payload = json.loads(data)
+        if payload.get("format_version") != FORMAT_VERSION:
+            raise ValueError(
+                "Unsupported template bundle format {version}".format(
+                    version=payload.get("format_version")
+                )
+            )
+        entries = collections.OrderedDict()
+        for name, entry in payload.get("templates", {}).items():
+            entries[name] = BundleEntry(
+                template_str=entry["template"],
+                sha1=entry.get("sha1"),
+                valid=entry.get("valid"),
+                error=entry.get("error"),
+                tokens=entry.get("tokens", []),
+                metadata=entry.get("metadata", {}),
+            )
+        return cls(payload.get("fingerprint"), entries, payload.get("metadata"))
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param str path: Path to a bundle file.
+        :rtype: TemplateBundle
+        """
+        with io.open(path, "r", encoding="utf-8") as fh:
+            return cls.from_string(fh.read())
+
+    def to_string(self):
+        """
+        :rtype: str
+        """
+        templates = collections.OrderedDict()
+        for name, entry in self.entries.items():
+            templates[name] = {
+                "template": entry.template_str,
+                "sha1": entry.sha1,
+                "valid": entry.valid,
+                "error": entry.error,
+                "tokens": entry.tokens,
+                "metadata": entry.metadata,
+            }
+        payload = collections.OrderedDict(
+            [
+                ("format_version", FORMAT_VERSION),
+                ("fingerprint", self.fingerprint),
+                ("metadata", self.metadata),
+                ("templates", templates),
+            ]
+        )
+        return json.dumps(payload, indent=2)
+
+    def save(self, path):
+        """
+        save writes the bundle to `path`, replacing it atomically so readers
+            never see a partially written bundle.
+
+        :param str path: Destination path.
+        """
+        temp_path = path + ".tmp"
+        with io.open(temp_path, "w", encoding="utf-8") as fh:
+            fh.write(self.to_string())
+        if os.name == "nt" and os.path.exists(path):
+            os.remove(path)
+        os.rename(temp_path, path)
+
+    def names(self):
+        return list(self.entries)
+
+    def template_str(self, name):
+        return self.entries[name].template_str
+
+    def set_template(self, name, template, parser, metadata=None):
+        """
+        set_template adds or replaces the entry `name` with a template that
+            has already been validated by `parser`.
+
+        Entries validated by a different parser than the rest of the bundle
+            are stored, but the older entries will be validated again the
+            next time they are checked.
+
+        :param str name: Name of the entry.
+        :param sept.Template template: Validated template.
+        :param sept.PathTemplateParser parser: Parser that validated it.
+        :param dict|None metadata: Optional metadata for the entry.
+        """
+        fingerprint = parser_fingerprint(parser)
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            # Validation results from another parser can no longer be trusted.
+            for entry_name, entry in list(self.entries.items()):
+                self.entries[entry_name] = entry._replace(valid=None, error=None)
+        template_str = template._template_str
+        self.entries[name] = BundleEntry(
+            template_str=template_str,
+            sha1=_hash_template(template_str),
+            valid=True,
+            error=None,
+            tokens=template_token_names(template),
+            metadata=metadata or {},
+        )
+        self._templates[name] = template
+
+    def is_trusted(self, name, parser_or_fingerprint):
+        """
+        is_trusted checks whether the stored validation result of `name` can
+            be used without validating it again.
+
+        :param str name: Name of the entry.
+        :param sept.PathTemplateParser|str parser_or_fingerprint: Parser, or
+            its fingerprint, the entry will be used with.
+        :rtype: bool
+        """
+        fingerprint = parser_or_fingerprint
+        if not isinstance(fingerprint, six.string_types):
+            fingerprint = parser_fingerprint(parser_or_fingerprint)
+        entry = self.entries[name]
+        return (
+            fingerprint == self.fingerprint
+            and entry.valid is not None
+            and entry.sha1 == _hash_template(entry.template_str)
+        )
+
+    def validate(self, parser):
+        """
+        validate checks every entry against `parser`, skipping entries whose
+            stored validation result is still trusted.
+
+        :param sept.PathTemplateParser parser: Parser to validate with.
+        :return: Mapping of each invalid entry name to its error message.
+        :rtype: dict[str, str]
+        """
+        fingerprint = parser_fingerprint(parser)
+        invalid = {}
+        for name, entry in self.entries.items():
+            if not self.is_trusted(name, fingerprint):
+                try:
+                    template = parser.validate_template(entry.template_str)
+                except errors.SeptError as err:
+                    entry = entry._replace(valid=False, error=str(err), tokens=[])
+                else:
+                    self._templates[name] = template
+                    entry = entry._replace(
+                        valid=True, error=None, tokens=template_token_names(template)
+                    )
+                entry = entry._replace(sha1=_hash_template(entry.template_str))
+                self.entries[name] = entry
+            if not entry.valid:
+                invalid[name] = entry.error
+        self.fingerprint = fingerprint
+        return invalid
+
+    def template(self, name, parser):
+        """
+        template returns the parsed `sept.Template` for `name`, parsing it the
+            first time it is requested.
+
+        :param str name: Name of the entry.
+        :param sept.PathTemplateParser parser: Parser to parse with.
+        :rtype: sept.Template
+        """
+        template = self._templates.get(name)
+        if template is None:
+            template = parser.validate_template(self.entries[name].template_str)
+            self._templates[name] = template
+        return template
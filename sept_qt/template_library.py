@@ -0,0 +1,329 @@
+import collections
+import hashlib
+import io
+import os
+
+from sept import errors
+
+from Qt import QtWidgets, QtCore
+
+from . import sqlite_store
+from .documentation_bundle import parser_fingerprint
+from .template_bundle import template_token_names
+
+SCHEMA_VERSION = 1
+DEFAULT_EXTENSION = ".sept"
+DEFAULT_INDEX_NAME = ".sept_library.sqlite"
+_FINGERPRINT_KEY = "parser_fingerprint"
+_TABLES = [
+    (
+        "templates",
+        "path TEXT PRIMARY KEY, mtime REAL, size INTEGER, sha1 TEXT, "
+        "valid INTEGER, error TEXT, tokens TEXT, template_str TEXT",
+    )
+]
+
+TemplateRecord = collections.namedtuple(
+    "TemplateRecord",
+    ("path", "mtime", "size", "sha1", "valid", "error", "tokens", "template_str"),
+)
+RefreshStats = collections.namedtuple(
+    "RefreshStats", ("added", "updated", "removed", "unchanged")
+)
+
+
+class TemplateLibraryIndex(object):
+    """
+    TemplateLibraryIndex keeps a persistent SQLite index of every template
+        file in a directory tree.
+
+    For each template it stores the path, mtime, size and content hash along
+        with whether it is valid for the parser and which Tokens it uses.
+    The fingerprint of the parser is stored alongside them, so changing the
+        parser's Tokens or Operators validates every template again.
+    Refreshing the index only reads files whose mtime or size changed, so
+        after the first refresh browsing and searching thousands of
+        templates does not touch the files themselves.
+
+    Each call opens its own connection, so the index can be refreshed on a
+        worker thread while it is searched from the GUI thread.
+    """
+
+    def __init__(self, root, parser, index_path=None, extension=DEFAULT_EXTENSION):
+        """
+        :param str root: Directory containing the template files.
+        :param sept.PathTemplateParser parser: Parser used to validate the
+            templates.
+        :param str|None index_path: Optional path of the SQLite index,
+            defaults to a ".sept_library.sqlite" file inside of `root`.
+        :param str extension: Extension of the template files.
+        """
+        super(TemplateLibraryIndex, self).__init__()
+        self.root = os.path.abspath(root)
+        self.parser = parser
+        self.index_path = index_path or os.path.join(self.root, DEFAULT_INDEX_NAME)
+        self.extension = extension
+        sqlite_store.create_schema(self.index_path, SCHEMA_VERSION, _TABLES)
+
+    def _connect(self):
+        return sqlite_store.connect(self.index_path)
+
+    def absolute_path(self, path):
+        """
+        :param str path: Path of a template relative to `root`.
+        :rtype: str
+        """
+        return os.path.join(self.root, path)
+
+    def _iter_template_files(self):
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            for filename in filenames:
+                if filename.endswith(self.extension):
+                    path = os.path.join(dirpath, filename)
+                    yield os.path.relpath(path, self.root), path
+
+    def _read_record(self, path, full_path, stat):
+        with io.open(full_path, "r", encoding="utf-8") as fh:
+            template_str = fh.read()
+        return self._validate_record(path, stat.st_mtime, stat.st_size, template_str)
+
+    def _validate_record(self, path, mtime, size, template_str):
+        sha1 = hashlib.sha1(template_str.encode("utf-8")).hexdigest()
+        try:
+            template = self.parser.validate_template(template_str)
+        except errors.SeptError as err:
+            valid, error, tokens = False, str(err), []
+        else:
+            valid, error, tokens = True, None, template_token_names(template)
+        return TemplateRecord(
+            path=path,
+            mtime=mtime,
+            size=size,
+            sha1=sha1,
+            valid=valid,
+            error=error,
+            # Padded with spaces so a single token can be matched with LIKE.
+            tokens=" {} ".format(" ".join(tokens)),
+            template_str=template_str,
+        )
+
+    def refresh(self):
+        """
+        refresh brings the index up to date with the files on disk.
+
+        Files with the same mtime and size as their indexed record are
+            skipped without being opened. Files that changed are read and
+            validated again, unless their content hash is unchanged.
+        If the Tokens or Operators on the parser changed since the last
+            refresh, see `sept_qt.documentation_bundle.parser_fingerprint`,
+            every indexed template is validated again from its stored text.
+
+        :return: How many records were added, updated, removed and unchanged.
+        :rtype: RefreshStats
+        """
+        fingerprint = parser_fingerprint(self.parser)
+        with self._connect() as connection:
+            known = {
+                row[0]: TemplateRecord(*row)
+                for row in connection.execute("SELECT * FROM templates")
+            }
+            revalidate = (
+                sqlite_store.read_meta(connection, _FINGERPRINT_KEY) != fingerprint
+            )
+
+        added, updated, touched, unchanged = [], [], [], 0
+        for path, full_path in self._iter_template_files():
+            try:
+                stat = os.stat(full_path)
+            except OSError:
+                continue
+            previous = known.pop(path, None)
+            if previous is not None and (previous.mtime, previous.size) == (
+                stat.st_mtime,
+                stat.st_size,
+            ):
+                if not revalidate:
+                    unchanged += 1
+                    continue
+                record = self._validate_record(
+                    path, previous.mtime, previous.size, previous.template_str
+                )
+            else:
+                try:
+                    record = self._read_record(path, full_path, stat)
+                except (IOError, OSError, UnicodeDecodeError):
+                    continue
+            if previous is None:
+                added.append(record)
+            elif record[3:] == previous[3:]:
+                touched.append((record.mtime, record.size, path))
+                unchanged += 1
+            else:
+                updated.append(record)
+
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO templates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                added + updated,
+            )
+            connection.executemany(
+                "UPDATE templates SET mtime = ?, size = ? WHERE path = ?", touched
+            )
+            connection.executemany(
+                "DELETE FROM templates WHERE path = ?", [(path,) for path in known]
+            )
+            sqlite_store.write_meta(connection, _FINGERPRINT_KEY, fingerprint)
+        return RefreshStats(len(added), len(updated), len(known), unchanged)
+
+    def search(self, query="", valid_only=False, limit=None):
+        """
+        search returns the indexed templates whose path, Tokens or template
+            string contain every word in `query`.
+
+        :param str query: Words to search for, an empty query matches all.
+        :param bool valid_only: Whether to skip templates that failed to
+            validate.
+        :param int|None limit: Optional maximum number of records.
+        :rtype: list[TemplateRecord]
+        """
+        clauses, params = [], []
+        for word in query.split():
+            pattern = "%{}%".format(
+                word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            clauses.append(
+                "(path LIKE ? ESCAPE '\\' OR tokens LIKE ? ESCAPE '\\' "
+                "OR template_str LIKE ? ESCAPE '\\')"
+            )
+            params.extend((pattern, pattern, pattern))
+        if valid_only:
+            clauses.append("valid = 1")
+        sql = "SELECT * FROM templates"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY path"
+        if limit:
+            sql += " LIMIT {:d}".format(limit)
+        with self._connect() as connection:
+            rows = connection.execute(sql, params).fetchall()
+        return [
+            record._replace(valid=bool(record.valid), tokens=record.tokens.split())
+            for record in (TemplateRecord(*row) for row in rows)
+        ]
+
+
+class _RefreshThread(QtCore.QThread):
+    """
+    _RefreshThread refreshes a TemplateLibraryIndex off of the GUI thread.
+    """
+
+    refreshed = QtCore.Signal(object)
+
+    def __init__(self, index, parent=None):
+        super(_RefreshThread, self).__init__(parent)
+        self._index = index
+
+    def run(self):
+        self.refreshed.emit(self._index.refresh())
+
+
+class TemplateLibraryWidget(QtWidgets.QWidget):
+    """
+    TemplateLibraryWidget lets users browse and search a directory of
+        template files through a `TemplateLibraryIndex`.
+
+    The indexed templates are listed straight away and the index is refreshed
+        on a worker thread, so opening a library of thousands of templates is
+        instant.
+    Typing in the search box filters the list by path, Tokens used and
+        template text.
+
+    When a template is double clicked, the `template_activated` signal is
+        emitted with its absolute path, which you can connect directly to
+        `FileTemplateInputWidget.load_path`.
+    """
+
+    template_activated = QtCore.Signal(str)
+    SEARCH_PLACEHOLDER_TEXT = "Search templates..."
+    COLUMNS = ("Template", "Status", "Tokens")
+    VALID_TEXT = "Valid"
+    INVALID_TEXT = "Invalid"
+
+    def __init__(self, index, parent=None):
+        """
+        :param TemplateLibraryIndex index: Index of the template library.
+        :param QtWidgets.QWidget|None parent: Optional Qt parent widget.
+        """
+        super(TemplateLibraryWidget, self).__init__(parent)
+        self.index = index
+        self._refresh_thread = None
+
+        self.setLayout(QtWidgets.QVBoxLayout())
+        self.layout().setContentsMargins(0, 0, 0, 0)
+
+        self._search_widget = QtWidgets.QLineEdit(self)
+        self._search_widget.setPlaceholderText(self.SEARCH_PLACEHOLDER_TEXT)
+        self._search_widget.textChanged.connect(self._handle_search_text_changed)
+
+        self._tree_widget = QtWidgets.QTreeWidget(self)
+        self._tree_widget.setHeaderLabels(self.COLUMNS)
+        self._tree_widget.setRootIsDecorated(False)
+        self._tree_widget.setUniformRowHeights(True)
+        self._tree_widget.itemDoubleClicked.connect(self._handle_item_double_clicked)
+
+        self.layout().addWidget(self._search_widget)
+        self.layout().addWidget(self._tree_widget)
+
+        self.populate()
+        self.refresh()
+
+    def refresh(self):
+        """
+        refresh updates the index from disk on a worker thread and then
+            updates the list.
+        """
+        if self._refresh_thread is not None:
+            return
+        self._refresh_thread = _RefreshThread(self.index, parent=self)
+        self._refresh_thread.refreshed.connect(self._handle_refreshed)
+        self._refresh_thread.finished.connect(self._handle_refresh_finished)
+        self._refresh_thread.start()
+
+    def populate(self):
+        """
+        populate lists the indexed templates matching the search text.
+        """
+        records = self.index.search(self._search_widget.text())
+        self._tree_widget.setUpdatesEnabled(False)
+        self._tree_widget.clear()
+        items = []
+        for record in records:
+            status = self.VALID_TEXT if record.valid else self.INVALID_TEXT
+            item = QtWidgets.QTreeWidgetItem(
+                [record.path, status, ", ".join(record.tokens)]
+            )
+            item.setData(0, QtCore.Qt.UserRole, self.index.absolute_path(record.path))
+            item.setToolTip(0, record.template_str)
+            if record.error:
+                item.setToolTip(1, record.error)
+            items.append(item)
+        self._tree_widget.addTopLevelItems(items)
+        self._tree_widget.setUpdatesEnabled(True)
+
+    @QtCore.Slot(object)
+    def _handle_refreshed(self, stats):
+        if stats.added or stats.updated or stats.removed:
+            self.populate()
+
+    @QtCore.Slot()
+    def _handle_refresh_finished(self):
+        self._refresh_thread.deleteLater()
+        self._refresh_thread = None
+
+    @QtCore.Slot(str)
+    def _handle_search_text_changed(self, text):
+        self.populate()
+
+    def _handle_item_double_clicked(self, item, column):
+        self.template_activated.emit(item.data(0, QtCore.Qt.UserRole))
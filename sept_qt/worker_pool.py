@@ -0,0 +1,181 @@
+import collections
+import itertools
+import threading
+
+from six.moves import queue
+
+DEFAULT_IDLE_TIMEOUT = 5.0
+
+
+class WorkerPool(object):
+    """
+    WorkerPool runs jobs on at most `max_workers` threads.
+
+    Threads are only started while there are more queued jobs than idle
+        threads, and exit again once they have been idle for `idle_timeout`
+        seconds, so a pool can be kept and reused between calls without
+        holding on to threads in between.
+    Jobs are queued through a `Batch`, which yields the results of its own
+        jobs as they complete. A pool with a single worker runs the jobs on
+        the thread iterating over the batch instead of starting threads.
+
+    It is safe to share a single pool between threads.
+    """
+
+    def __init__(self, max_workers=None, idle_timeout=None):
+        """
+        :param int|None max_workers: Optional maximum number of threads,
+            defaults to 1.
+        :param float|None idle_timeout: Optional number of seconds an idle
+            thread waits for another job before it exits.
+        """
+        super(WorkerPool, self).__init__()
+        self.max_workers = max(max_workers or 1, 1)
+        if idle_timeout is None:
+            idle_timeout = DEFAULT_IDLE_TIMEOUT
+        self.idle_timeout = idle_timeout
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._idle = 0
+        self._workers = 0
+
+    @property
+    def inline(self):
+        return self.max_workers == 1
+
+    def _submit(self, batch, key, job):
+        with self._lock:
+            self._queued += 1
+            self._jobs.put((batch, key, job))
+            if self._queued <= self._idle or self._workers >= self.max_workers:
+                return
+            self._workers += 1
+            self._idle += 1
+        thread = threading.Thread(target=self._work)
+        thread.daemon = True
+        thread.start()
+
+    def _work(self):
+        while True:
+            try:
+                batch, key, job = self._jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._lock:
+                    if self._queued:
+                        # A job was queued after the wait timed out.
+                        continue
+                    self._idle -= 1
+                    self._workers -= 1
+                    return
+            with self._lock:
+                self._queued -= 1
+                self._idle -= 1
+            try:
+                batch._run(key, job)
+            finally:
+                with self._lock:
+                    self._idle += 1
+
+    def batch(self):
+        """
+        batch returns a new `Batch` to queue jobs on this pool with.
+
+        :rtype: Batch
+        """
+        return Batch(self)
+
+    def imap_unordered(self, tasks):
+        """
+        imap_unordered runs the `(key, job)` tuples from `tasks` and yields
+            `(key, result)` tuples as they complete.
+
+        At most `max_workers` jobs are queued at once and `tasks` is only read
+            on the calling thread, after the previous result was handled, so
+            it can be a generator that stops producing tasks based on the
+            results so far.
+
+        :param iterable[tuple] tasks: `(key, job)` tuples, where `job` is
+            called without arguments.
+        :rtype: iterator[tuple]
+        """
+        tasks = iter(tasks)
+        batch = self.batch()
+        try:
+            for key, job in itertools.islice(tasks, self.max_workers):
+                batch.put(key, job)
+            for result in batch:
+                yield result
+                task = next(tasks, None)
+                if task is not None:
+                    batch.put(*task)
+        finally:
+            batch.close()
+
+
+class Batch(object):
+    """
+    Batch queues jobs on a `WorkerPool` and yields `(key, result)` tuples as
+        they complete, which is not necessarily the order they were queued.
+
+    Jobs can be queued while iterating, eg. to split up work based on an
+        earlier result, iteration only stops once every queued job is done.
+    The first error raised by a job is raised while iterating. Closing the
+        batch skips any of its jobs that have not started yet.
+
+    A batch should only be used from the thread that iterates over it.
+    """
+
+    def __init__(self, pool):
+        """
+        :param WorkerPool pool: Pool to run the jobs on.
+        """
+        super(Batch, self).__init__()
+        self.pool = pool
+        self._pending = 0
+        self._inline_jobs = collections.deque()
+        self._results = queue.Queue()
+        self._closed = threading.Event()
+
+    def put(self, key, job):
+        """
+        put queues `job` to be called without arguments.
+
+        :param key: Value yielded alongside the job's result.
+        :param callable job: Job to run.
+        """
+        self._pending += 1
+        if self.pool.inline:
+            self._inline_jobs.append((key, job))
+        else:
+            self.pool._submit(self, key, job)
+
+    def _run(self, key, job):
+        if self._closed.is_set():
+            return
+        try:
+            self._results.put((key, job(), None))
+        except Exception as err:
+            self._results.put((key, None, err))
+
+    def close(self):
+        """
+        close skips every job that has not started yet.
+        """
+        self._closed.set()
+        self._inline_jobs.clear()
+
+    def __iter__(self):
+        try:
+            while self._pending:
+                self._pending -= 1
+                if self._inline_jobs:
+                    key, job = self._inline_jobs.popleft()
+                    yield key, job()
+                    continue
+                key, value, error = self._results.get()
+                if error is not None:
+                    raise error
+                yield key, value
+        finally:
+            self.close()
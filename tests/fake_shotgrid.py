@@ -0,0 +1,158 @@
+"""
+fake_shotgrid is an in-process stand-in for a ShotGrid site, answering the
+    `find` calls ShotGridLoader makes from in-memory records.
+"""
+
+import copy
+import threading
+import time
+
+
+class FakeShotGrid(object):
+    """
+    FakeShotGrid holds the records of a site and records every `find` made
+        through its connections.
+
+    `latency` seconds are slept in each call, and the next `failures` calls
+        raise `error`, so slow or flaky connections can be simulated.
+    """
+
+    def __init__(self, entities, latency=0.0, failures=0, error=IOError):
+        super(FakeShotGrid, self).__init__()
+        self.entities = entities
+        self.latency = latency
+        self.failures = failures
+        self.error = error
+        self.calls = []
+        self.active = 0
+        self.peak_active = 0
+        self._lock = threading.Lock()
+
+    def connect(self):
+        return FakeShotgun(self)
+
+    def calls_for(self, entity_type):
+        return [call for call in self.calls if call["entity_type"] == entity_type]
+
+    def _matches(self, record, filters):
+        for field, operator, value in filters:
+            if operator == "is" and record.get(field) != value:
+                return False
+            if operator == "in" and record.get(field) not in value:
+                return False
+        return True
+
+    def find(self, entity_type, filters, fields=None, order=None, limit=0, page=0):
+        with self._lock:
+            self.calls.append(
+                {
+                    "entity_type": entity_type,
+                    "filters": copy.deepcopy(filters),
+                    "fields": list(fields or []),
+                    "order": order,
+                    "limit": limit,
+                    "page": page,
+                }
+            )
+            if self.failures:
+                self.failures -= 1
+                raise self.error("Connection reset by peer")
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            records = [
+                record
+                for record in self.entities.get(entity_type, [])
+                if self._matches(record, filters)
+            ]
+            if order:
+                records.sort(key=lambda record: record[order[0]["field_name"]])
+            if limit:
+                start = (max(page, 1) - 1) * limit
+                records = records[start : start + limit]
+            keep = set(fields or []) | {"type", "id"}
+            return [
+                dict(
+                    (key, copy.deepcopy(value))
+                    for key, value in record.items()
+                    if key in keep
+                )
+                for record in records
+            ]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeShotgun(object):
+    """
+    FakeShotgun is one connection to a `FakeShotGrid`. Like
+        `shotgun_api3.Shotgun` it must not be used by two threads at once.
+    """
+
+    def __init__(self, site):
+        super(FakeShotgun, self).__init__()
+        self.site = site
+        self._in_use = threading.Lock()
+
+    def find(self, entity_type, filters, **kwargs):
+        if not self._in_use.acquire(False):
+            raise AssertionError("Connection used by two threads at once")
+        try:
+            return self.site.find(entity_type, filters, **kwargs)
+        finally:
+            self._in_use.release()
+
+
+def make_site(version_count, files_per_version=1, shared_files=None, **kwargs):
+    """
+    make_site returns a FakeShotGrid with `version_count` Versions, each
+        linked to `files_per_version` PublishedFiles. The links only hold the
+        type, id and name of each PublishedFile, like a real multi-entity
+        field.
+    If `shared_files` is passed, Versions link to that many PublishedFiles
+        in turn instead, so files are shared between Versions.
+    """
+    file_count = shared_files or version_count * files_per_version
+    published_files = [
+        {
+            "type": "PublishedFile",
+            "id": file_id,
+            "code": "file{}".format(file_id),
+            "version_number": file_id % 7 + 1,
+            "path": {
+                "link_type": "local",
+                "local_path": "/mnt/show/file{}.exr".format(file_id),
+            },
+        }
+        for file_id in range(1, file_count + 1)
+    ]
+    versions = []
+    for version_id in range(1, version_count + 1):
+        links = []
+        for index in range(files_per_version):
+            file_id = (version_id - 1) * files_per_version + index
+            file_id = file_id % file_count + 1
+            links.append(
+                {
+                    "type": "PublishedFile",
+                    "id": file_id,
+                    "name": "file{}".format(file_id),
+                }
+            )
+        versions.append(
+            {
+                "type": "Version",
+                "id": version_id,
+                "code": "v{:04d}".format(version_id),
+                "project.Project.id": 128,
+                "published_files": links,
+            }
+        )
+    # Stored out of order to check the loader asks for a fixed order.
+    versions.reverse()
+    return FakeShotGrid(
+        {"Version": versions, "PublishedFile": published_files}, **kwargs
+    )
@@ -0,0 +1,197 @@
+import time
+
+import pytest
+from fake_shotgrid import make_site
+
+from sept_qt import data, worker_pool
+from sept_qt.data import ShotGridLoader
+from sept_qt.derived_fields import PUBLISHED_FILE_FIELDS
+
+FILTERS = [["project.Project.id", "is", 128]]
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(data.time, "sleep", delays.append)
+    return delays
+
+
+def _version_pages(site):
+    return [call["page"] for call in site.calls_for("Version")]
+
+
+@pytest.mark.parametrize(
+    "version_count, pages",
+    [(0, [1]), (99, [1]), (100, [1, 2]), (250, [1, 2, 3])],
+)
+def test_find_pages_in_id_order(version_count, pages):
+    site = make_site(version_count)
+    loader = ShotGridLoader(site.connect(), page_size=100)
+    records = loader.find("Version", FILTERS, ["code"])
+
+    assert [record["id"] for record in records] == list(range(1, version_count + 1))
+    assert _version_pages(site) == pages
+    for call in site.calls_for("Version"):
+        assert call["limit"] == 100
+        assert call["order"] == [{"field_name": "id", "direction": "asc"}]
+
+
+def test_iter_pages_yields_each_page():
+    site = make_site(250)
+    loader = ShotGridLoader(site.connect(), page_size=100)
+    pages = list(loader.iter_pages("Version", FILTERS, ["code"]))
+    assert [len(page) for page in pages] == [100, 100, 50]
+
+
+@pytest.mark.parametrize(
+    "limit, pages", [(1, [1]), (100, [1]), (150, [1, 2]), (1000, [1, 2, 3])]
+)
+def test_find_limit(limit, pages):
+    site = make_site(250)
+    loader = ShotGridLoader(site.connect(), page_size=100)
+    records = loader.find("Version", FILTERS, ["code"], limit=limit)
+
+    assert [record["id"] for record in records] == list(range(1, min(limit, 250) + 1))
+    assert _version_pages(site) == pages
+
+
+def test_backfill_published_files_fetches_each_file_once():
+    # 20 Versions sharing 5 PublishedFiles, fetched 2 ids at a time.
+    site = make_site(20, files_per_version=2, shared_files=5)
+    loader = ShotGridLoader(site.connect(), batch_size=2)
+    versions = loader.find("Version", FILTERS, ["code", "published_files"])
+    del site.calls[:]
+
+    loader.backfill_published_files(versions)
+
+    calls = site.calls_for("PublishedFile")
+    fetched_ids = [file_id for call in calls for file_id in call["filters"][0][2]]
+    assert sorted(fetched_ids) == [1, 2, 3, 4, 5]
+    assert all(len(call["filters"][0][2]) <= 2 for call in calls)
+    files = dict(
+        (published_file["id"], published_file)
+        for published_file in site.entities["PublishedFile"]
+    )
+    for version in versions:
+        for link in version["published_files"]:
+            assert link["version_number"] == files[link["id"]]["version_number"]
+            assert link["path"] == files[link["id"]]["path"]
+
+
+def test_backfill_skips_complete_links():
+    site = make_site(3)
+    loader = ShotGridLoader(site.connect())
+    versions = [
+        {
+            "id": 1,
+            "published_files": [{"id": 1, "version_number": 2, "path": {"x": 1}}],
+        }
+    ]
+    loader.backfill_published_files(versions)
+    assert site.calls == []
+
+
+def test_load_versions_computes_derived_fields():
+    site = make_site(3)
+    loader = ShotGridLoader(site.connect(), derived_fields=PUBLISHED_FILE_FIELDS)
+    versions = loader.load_versions(FILTERS)
+    assert [version["published_file.extension"] for version in versions] == ["exr"] * 3
+    assert [version["published_file.version_number"] for version in versions] == [
+        2,
+        3,
+        4,
+    ]
+
+
+def test_transient_errors_are_retried_with_backoff(sleeps):
+    site = make_site(10, failures=3)
+    loader = ShotGridLoader(site.connect(), retries=3)
+    loader.retry_delay = 0.5
+
+    records = loader.find("Version", FILTERS, ["code"])
+
+    assert len(records) == 10
+    assert len(site.calls_for("Version")) == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_retries_give_up(sleeps):
+    site = make_site(10, failures=3)
+    loader = ShotGridLoader(site.connect(), retries=2)
+    with pytest.raises(IOError):
+        loader.find("Version", FILTERS, ["code"])
+    assert len(site.calls) == 3
+    assert len(sleeps) == 2
+
+
+def test_other_errors_are_not_retried(sleeps):
+    site = make_site(10, failures=1, error=ValueError)
+    loader = ShotGridLoader(site.connect())
+    with pytest.raises(ValueError):
+        loader.find("Version", FILTERS, ["code"])
+    assert len(site.calls) == 1
+    assert sleeps == []
+
+
+def _load(site, **kwargs):
+    loader = ShotGridLoader(site.connect(), page_size=10, batch_size=10, **kwargs)
+    start = time.time()
+    versions = loader.find("Version", FILTERS, ["code"])
+    elapsed = time.time() - start
+    pages = list(loader.iter_versions(FILTERS, fields=["code", "published_files"]))
+    return versions, pages, elapsed
+
+
+def test_concurrent_paging_beats_sequential():
+    # 10 pages of Versions at 50ms a call.
+    site = make_site(95, latency=0.05)
+    sequential_versions, sequential_pages, sequential_time = _load(site)
+    assert site.peak_active == 1
+
+    site = make_site(95, latency=0.05)
+    versions, pages, concurrent_time = _load(
+        site, connection_factory=site.connect, max_workers=4
+    )
+
+    assert [version["id"] for version in versions] == list(range(1, 96))
+    assert versions == sequential_versions
+    assert [len(page) for page in pages] == [10] * 9 + [5]
+    assert pages == sequential_pages
+    assert all(
+        version["published_files"][0]["path"] for page in pages for version in page
+    )
+    assert 1 < site.peak_active <= 4
+    assert concurrent_time < sequential_time * 0.5
+
+
+def test_threads_are_reused_across_pages(monkeypatch):
+    started = []
+
+    class Thread(worker_pool.threading.Thread):
+        def start(self):
+            started.append(self)
+            super(Thread, self).start()
+
+    monkeypatch.setattr(worker_pool.threading, "Thread", Thread)
+    site = make_site(95, latency=0.01)
+    _load(site, connection_factory=site.connect, max_workers=4)
+    # Every page and PublishedFile batch ran on the same four threads.
+    assert len(started) == 4
+
+
+def test_cache_is_keyed_on_derived_fields(tmp_path):
+    from sept_qt.dataset_cache import DatasetCache
+
+    cache = DatasetCache(str(tmp_path / "cache.sqlite"))
+    site = make_site(3)
+    ShotGridLoader(site.connect(), cache=cache).load_versions(FILTERS)
+
+    loader = ShotGridLoader(
+        site.connect(), cache=cache, derived_fields=PUBLISHED_FILE_FIELDS
+    )
+    assert loader.cached_versions(FILTERS) is None
+    versions = loader.load_versions(FILTERS)
+    assert all("published_file.extension" in version for version in versions)
+    cached = loader.cached_versions(FILTERS)
+    assert cached.records == versions
@@ -0,0 +1,81 @@
+from sept_qt import dataset_cache, sqlite_store
+from sept_qt.dataset_cache import DatasetCache, query_key
+
+FILTERS = [["project", "is", {"type": "Project", "id": 1}], ["code", "is", "a"]]
+
+
+def _records(count):
+    return [{"id": index, "code": "v{:03d}".format(index)} for index in range(count)]
+
+
+def test_query_key_ignores_field_order():
+    key = query_key("Version", FILTERS, ["code", "id"], 10, ["b", "a"])
+    assert key == query_key("Version", FILTERS, ["id", "code"], 10, ["a", "b"])
+    assert key != query_key("Version", FILTERS[::-1], ["code", "id"], 10, ["a", "b"])
+    assert key != query_key("Version", FILTERS, ["code", "id"], 20, ["a", "b"])
+    assert key != query_key("Version", FILTERS, ["code", "id"], 10)
+
+
+def test_query_key_without_derived_fields_is_unchanged():
+    assert query_key("Version", FILTERS, ["code"]) == query_key(
+        "Version", FILTERS, ["code"], None, ()
+    )
+
+
+def test_chunks_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_cache, "CHUNK_SIZE", 3)
+    path = str(tmp_path / "cache" / "datasets.sqlite")
+    cache = DatasetCache(path)
+    cache.put("key", _records(10), "Version")
+    assert cache.get("key").records == _records(10)
+
+    # Storing fewer records drops the chunks that are no longer used.
+    cache.put("key", _records(4), "Version")
+    assert cache.get("key").records == _records(4)
+    with sqlite_store.connect(path) as connection:
+        chunk_count = connection.execute("SELECT COUNT(*) FROM chunks").fetchone()
+    assert chunk_count == (2,)
+
+
+def test_empty_dataset(tmp_path):
+    cache = DatasetCache(str(tmp_path / "datasets.sqlite"))
+    assert cache.get("key") is None
+    cache.put("key", [])
+    assert cache.get("key").records == []
+
+
+def test_ttl_expiry(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(dataset_cache.time, "time", lambda: now[0])
+    cache = DatasetCache(str(tmp_path / "datasets.sqlite"), ttl=60)
+    cache.put("key", _records(2))
+    cached = cache.get("key")
+    assert (cached.fetched_at, cached.expired) == (1000.0, False)
+    now[0] += 59
+    assert not cache.get("key").expired
+    now[0] += 1
+    expired = cache.get("key")
+    assert expired.expired
+    assert expired.records == _records(2)
+
+
+def test_clear_by_entity_type(tmp_path):
+    cache = DatasetCache(str(tmp_path / "datasets.sqlite"))
+    cache.put("versions", _records(2), "Version")
+    cache.put("shots", _records(2), "Shot")
+    cache.clear("Version")
+    assert cache.get("versions") is None
+    assert cache.get("shots") is not None
+    cache.clear()
+    assert cache.get("shots") is None
+
+
+def test_schema_version_change_drops_datasets(tmp_path, monkeypatch):
+    path = str(tmp_path / "datasets.sqlite")
+    DatasetCache(path).put("key", _records(2))
+    assert DatasetCache(path).get("key") is not None
+    monkeypatch.setattr(dataset_cache, "SCHEMA_VERSION", 2)
+    cache = DatasetCache(path)
+    assert cache.get("key") is None
+    with sqlite_store.connect(path) as connection:
+        assert sqlite_store.read_meta(connection, "schema_version") == "2"
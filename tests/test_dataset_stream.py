@@ -0,0 +1,74 @@
+import gzip
+import io
+import json
+
+import pytest
+
+from sept_qt.dataset_stream import iter_record_chunks, iter_records
+
+RECORDS = [
+    {"id": 1, "code": "v001", "published_files": [{"id": 10, "version_number": 2}]},
+    {"id": 2, "code": "v002", "published_files": []},
+    {"id": 3, "code": "caf\u00e9", "value": 2.5},
+]
+
+
+def _write(tmp_path, name, text):
+    path = str(tmp_path / name)
+    opener = gzip.open if name.endswith(".gz") else io.open
+    with opener(path, "wb") as fh:
+        fh.write(text.encode("utf-8"))
+    return path
+
+
+@pytest.mark.parametrize("name", ["data.json", "data.json.gz"])
+@pytest.mark.parametrize("read_size", [1, 2, 3, 7, 64 * 1024])
+def test_json_array(tmp_path, name, read_size):
+    path = _write(tmp_path, name, json.dumps(RECORDS, indent=1))
+    assert list(iter_records(path, read_size=read_size)) == RECORDS
+
+
+@pytest.mark.parametrize("name", ["data.ndjson", "data.ndjson.gz"])
+def test_ndjson(tmp_path, name):
+    text = "\n".join(json.dumps(record) for record in RECORDS) + "\n\n"
+    path = _write(tmp_path, name, text)
+    assert list(iter_records(path, read_size=5)) == RECORDS
+
+
+@pytest.mark.parametrize("read_size", range(1, 12))
+def test_numbers_split_across_reads(tmp_path, read_size):
+    values = [2.5, -1e5, 12345, 0.125, 3e-2, 7]
+    path = _write(tmp_path, "numbers.json", json.dumps(values))
+    assert list(iter_records(path, read_size=read_size)) == values
+
+
+@pytest.mark.parametrize("read_size", range(1, 8))
+def test_other_values_split_across_reads(tmp_path, read_size):
+    values = [True, 25, "25", None, 2.5, False, {"a": 1}, [1, 2], 0]
+    path = _write(tmp_path, "values.json", json.dumps(values))
+    assert list(iter_records(path, read_size=read_size)) == values
+
+
+def test_malformed_item_is_bounded(tmp_path):
+    path = _write(tmp_path, "bad.json", '[{"id": 1}, {"id": "' + "x" * 10000)
+    records = iter_records(path, read_size=100, max_item_size=1000)
+    assert next(records) == {"id": 1}
+    with pytest.raises(ValueError):
+        next(records)
+
+
+def test_large_item_within_bound(tmp_path):
+    records = [{"id": 1, "description": "x" * 10000}, {"id": 2}]
+    path = _write(tmp_path, "large.json", json.dumps(records))
+    assert list(iter_records(path, read_size=100, max_item_size=20000)) == records
+
+
+def test_unterminated_array(tmp_path):
+    path = _write(tmp_path, "short.json", '[{"id": 1}, ')
+    with pytest.raises(ValueError):
+        list(iter_records(path))
+
+
+def test_record_chunks(tmp_path):
+    path = _write(tmp_path, "data.json", json.dumps(RECORDS))
+    assert list(iter_record_chunks(path, chunk_size=2)) == [RECORDS[:2], RECORDS[2:]]
@@ -0,0 +1,60 @@
+import pytest
+
+from sept_qt.derived_fields import (
+    PUBLISHED_FILE_EXTENSION,
+    PUBLISHED_FILE_VERSION_NUMBER,
+    DerivedField,
+    enrich,
+)
+
+RECORD = {
+    "code": "sh010_comp_v002",
+    "published_files": [
+        {"version_number": None, "path": None},
+        {
+            "version_number": 2,
+            "path": {"link_type": "local", "local_path": "/shows/sh010.v002.exr"},
+        },
+    ],
+}
+
+
+class UpperCode(DerivedField):
+    name = "code.upper"
+    fields = ("code",)
+
+    def compute(self, record):
+        return record.get("code", "").upper()
+
+
+def test_compute_is_abstract():
+    with pytest.raises(TypeError):
+        DerivedField("value")
+
+    class Incomplete(DerivedField):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_subclass_name_override():
+    assert UpperCode().name == "code.upper"
+    assert UpperCode("code_upper").name == "code_upper"
+    assert UpperCode().compute(RECORD) == "SH010_COMP_V002"
+
+
+def test_published_file_fields():
+    assert PUBLISHED_FILE_VERSION_NUMBER.compute(RECORD) == 2
+    assert PUBLISHED_FILE_EXTENSION.compute(RECORD) == "exr"
+    assert PUBLISHED_FILE_EXTENSION.compute({"published_files": []}) is None
+
+
+def test_enrich_and_get():
+    field = UpperCode()
+    record = dict(RECORD)
+    assert field.get(record) == "SH010_COMP_V002"
+    (enriched,) = enrich([record], [field])
+    assert enriched is record
+    record["code.upper"] = "stored"
+    assert field.get(record) == "stored"
@@ -0,0 +1,82 @@
+import pytest
+from sept import PathTemplateParser, Token
+
+from sept_qt import documentation_bundle
+from sept_qt.documentation_bundle import KINDS, export_bundle, load_bundle
+
+
+class StatusToken(Token):
+    """
+    The <code>status</code> Token will return the "sg_status_list" value.
+    """
+
+    name = "status"
+
+    def getValue(self, data):
+        return data.get("sg_status_list")
+
+
+class ShotToken(Token):
+    """
+    The <code>shot</code> Token will return the "code" value of the Shot.
+    """
+
+    name = "shot"
+
+    def getValue(self, data):
+        return data.get("entity.Shot.code", "")
+
+
+PARSERS = {
+    "builtin": lambda: PathTemplateParser(),
+    "custom_tokens": lambda: PathTemplateParser(
+        additional_tokens=[StatusToken, ShotToken]
+    ),
+}
+
+
+@pytest.fixture(params=sorted(PARSERS))
+def parser(request):
+    return PARSERS[request.param]()
+
+
+@pytest.fixture
+def bundle(parser, tmp_path):
+    bundle = load_bundle(str(tmp_path / "docs"), parser)
+    yield bundle
+    bundle.close()
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_all_entries_round_trip(parser, bundle, kind):
+    expected = documentation_bundle.parser_documentation(parser, kind)
+    assert bundle.documentation(kind) == expected
+    assert bundle.documentation(kind, bundle.entries(kind)) == expected
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_entry_subsets_match_parser(parser, bundle, kind):
+    parser_entries = documentation_bundle.parser_entries(parser, kind)
+    bundle_entries = bundle.entries(kind)
+    assert [entry.name for entry in bundle_entries] == [
+        entry.name for entry in parser_entries
+    ]
+    assert bundle.documentation(kind, []) == (
+        documentation_bundle.parser_documentation(parser, kind, [])
+    )
+    if not parser_entries:
+        return
+    last = len(parser_entries) - 1
+    for indexes in ([0], [last], [0, last], [last, 0]):
+        expected = documentation_bundle.parser_documentation(
+            parser, kind, [parser_entries[index] for index in indexes]
+        )
+        html = bundle.documentation(kind, [bundle_entries[index] for index in indexes])
+        assert html == expected
+
+
+def test_export_skips_current_bundle(parser, tmp_path):
+    path = str(tmp_path / "docs")
+    assert export_bundle(parser, path)
+    assert not export_bundle(parser, path)
+    assert export_bundle(parser, path, force=True)
@@ -0,0 +1,46 @@
+import types
+
+import pytest
+from sept import PathTemplateParser
+
+from sept_qt import documentation_widget
+from sept_qt.documentation_widget import DocumentationWidget
+
+
+@pytest.fixture
+def web_modules(monkeypatch):
+    modules = {}
+
+    def import_module(name):
+        try:
+            return modules[name.split(".", 1)[1]]
+        except KeyError:
+            raise ImportError(name)
+
+    monkeypatch.setattr(documentation_widget, "_QWebView", None)
+    monkeypatch.setattr(documentation_widget.importlib, "import_module", import_module)
+    return modules
+
+
+def test_web_view_prefers_web_engine(web_modules):
+    web_modules["QtWebEngineWidgets"] = types.SimpleNamespace(QWebEngineView="engine")
+    web_modules["QtWebKitWidgets"] = types.SimpleNamespace(QWebView="webkit")
+    assert documentation_widget._get_web_view_class() == "engine"
+
+
+def test_web_view_falls_back_to_web_kit(web_modules):
+    web_modules["QtWebKitWidgets"] = types.SimpleNamespace(QWebView="webkit")
+    assert documentation_widget._get_web_view_class() == "webkit"
+
+
+def test_web_view_unavailable(web_modules):
+    with pytest.raises(ImportError, match="'text' renderer"):
+        documentation_widget._get_web_view_class()
+
+
+def test_text_renderer_is_default(qapp):
+    widget = DocumentationWidget(PathTemplateParser())
+    widget.show()
+    view = widget.widget(0)
+    assert isinstance(view, documentation_widget._TextBrowserRenderer)
+    assert "Token Documentation" in view.toPlainText()
@@ -0,0 +1,144 @@
+import json
+
+from sept_qt.edit_history import EditDelta, EditHistory, compute_delta, merge_deltas
+
+
+def _type(history, text, typed):
+    for character in typed:
+        history.record(text, text + character)
+        text += character
+    return text
+
+
+def test_compute_delta():
+    assert compute_delta("abcd", "abXd") == EditDelta(2, "c", "X")
+    assert compute_delta("aaa", "aaaa") == EditDelta(3, "", "a")
+    assert compute_delta("abc", "") == EditDelta(0, "abc", "")
+
+
+def test_typing_is_merged():
+    history = EditHistory()
+    text = _type(history, "", "{{lower:name}}")
+    assert len(history) == 1
+    assert history.undo(text) == ("", 0)
+    assert not history.can_undo()
+
+
+def test_backspace_and_delete_are_merged():
+    assert merge_deltas(EditDelta(4, "d", ""), EditDelta(3, "c", "")) == EditDelta(
+        3, "cd", ""
+    )
+    assert merge_deltas(EditDelta(3, "c", ""), EditDelta(3, "d", "")) == EditDelta(
+        3, "cd", ""
+    )
+    history = EditHistory()
+    text = "abcdef"
+    for _ in range(3):
+        history.record(text, text[:-1])
+        text = text[:-1]
+    assert len(history) == 1
+    assert history.undo(text) == ("abcdef", 6)
+
+
+def test_edits_elsewhere_are_not_merged():
+    assert merge_deltas(EditDelta(0, "", "a"), EditDelta(5, "", "b")) is None
+    assert merge_deltas(EditDelta(0, "", "a"), EditDelta(1, "a", "")) is None
+    history = EditHistory()
+    text = _type(history, "", "abc")
+    history.record(text, "X" + text)
+    assert len(history) == 2
+
+
+def test_no_merge_after_undo_or_unmergeable_record():
+    history = EditHistory()
+    text = _type(history, "", "ab")
+    text = history.undo(text)[0]
+    text = _type(history, text, "cd")
+    assert len(history) == 1
+
+    history = EditHistory()
+    history.record("", "loaded", merge=False)
+    _type(history, "loaded", "!")
+    assert len(history) == 2
+
+
+def test_undo_redo():
+    history = EditHistory()
+    history.record("a", "ab")
+    history.record("ab", "Xab")
+    assert history.undo("Xab") == ("ab", 0)
+    assert history.undo("ab") == ("a", 1)
+    assert history.undo("a") is None
+    assert history.redo("a") == ("ab", 2)
+    assert history.redo("ab") == ("Xab", 1)
+    assert history.redo("Xab") is None
+
+
+def test_record_invalidates_redo():
+    history = EditHistory()
+    history.record("", "a")
+    history.undo("a")
+    assert history.can_redo()
+    history.record("", "b")
+    assert not history.can_redo()
+    assert history._bytes == 1
+
+
+def test_trimming():
+    history = EditHistory(max_entries=3)
+    text = ""
+    for word in ("a", " b", " c", " d"):
+        history.record(text, text + word, merge=False)
+        text += word
+    assert len(history) == 3
+    assert history.undo(text)[0] == "a b c"
+
+    history = EditHistory(max_bytes=10)
+    history.record("", "0123456789", merge=False)
+    history.record("0123456789", "0123456789ab", merge=False)
+    assert len(history) == 1
+    assert history._bytes == 2
+
+
+def test_mismatched_text_clears_history():
+    history = EditHistory()
+    history.record("a", "ab")
+    history.record("ab", "abc", merge=False)
+    assert history.undo("changed elsewhere") is None
+    assert not history.can_undo()
+    assert not history.can_redo()
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "history" / "a.json")
+    history = EditHistory()
+    text = _type(history, "", "abc")
+    history.record(text, "X" + text)
+    history.undo("Xabc")
+    history.save(path, "abc")
+
+    loaded = EditHistory()
+    assert loaded.load(path, "abc")
+    assert loaded.redo("abc") == ("Xabc", 1)
+    assert loaded.undo("Xabc") == ("abc", 0)
+    assert loaded.undo("abc") == ("", 0)
+
+
+def test_load_requires_same_text(tmp_path):
+    path = str(tmp_path / "a.json")
+    history = EditHistory()
+    history.record("", "abc")
+    history.save(path, "abc")
+
+    loaded = EditHistory()
+    loaded.record("", "x")
+    assert not loaded.load(path, "abcd")
+    assert not loaded.can_undo()
+    assert not loaded.load(str(tmp_path / "missing.json"), "abc")
+
+    with open(path) as fh:
+        payload = json.load(fh)
+    payload["format_version"] = 0
+    with open(path, "w") as fh:
+        json.dump(payload, fh)
+    assert not loaded.load(path, "abc")
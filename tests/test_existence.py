@@ -0,0 +1,98 @@
+import errno
+import threading
+import time
+
+from sept_qt import existence
+from sept_qt.existence import DirectoryListingCache, PathExistenceChecker
+
+
+def _denied(path):
+    raise OSError(errno.EACCES, "Permission denied", path)
+
+
+def test_check_lists_each_directory_once(tmp_path, monkeypatch):
+    for name in ("a", "b"):
+        (tmp_path / name).write_text("")
+    listed = []
+
+    def _list_directory(path):
+        listed.append(path)
+        return [name for name in ("a", "b")]
+
+    monkeypatch.setattr(existence, "_list_directory", _list_directory)
+    paths = [str(tmp_path / name) for name in ("a", "b", "c")]
+    assert PathExistenceChecker().check(paths) == {
+        paths[0]: True,
+        paths[1]: True,
+        paths[2]: False,
+    }
+    assert listed == [str(tmp_path)]
+
+
+def test_missing_directory(tmp_path):
+    path = str(tmp_path / "missing" / "a")
+    assert PathExistenceChecker().check([path]) == {path: False}
+
+
+def test_iter_check_skips_empty_paths(tmp_path):
+    path = str(tmp_path / "a")
+    results = list(PathExistenceChecker().iter_check(["", path, None]))
+    assert results == [(1, path, False)]
+
+
+def test_listing_cache_ttl(tmp_path):
+    cache = DirectoryListingCache(ttl=60)
+    assert cache.get(str(tmp_path)) == frozenset()
+    (tmp_path / "a").write_text("")
+    assert cache.get(str(tmp_path)) == frozenset()
+    cache.invalidate(str(tmp_path))
+    assert cache.get(str(tmp_path)) == frozenset(["a"])
+
+
+def test_unlistable_directory_stats_concurrently(tmp_path, monkeypatch):
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def _stat_exists(path):
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return path.endswith("0")
+
+    monkeypatch.setattr(existence, "_list_directory", _denied)
+    monkeypatch.setattr(existence, "_stat_exists", _stat_exists)
+    paths = [str(tmp_path / str(index)) for index in range(200)]
+
+    start = time.time()
+    results = PathExistenceChecker(max_workers=16).check(paths)
+    elapsed = time.time() - start
+
+    assert results == dict((path, path.endswith("0")) for path in paths)
+    assert 1 < active[1] <= 16
+    # 200 serial stat calls take 2 seconds.
+    assert elapsed < 1.0
+
+
+def test_unknown_paths_are_none(tmp_path, monkeypatch):
+    monkeypatch.setattr(existence, "_list_directory", _denied)
+    monkeypatch.setattr(existence.os, "stat", _denied)
+    path = str(tmp_path / "a")
+    assert PathExistenceChecker().check([path]) == {path: None}
+
+
+def test_closing_iter_check_skips_remaining_directories(tmp_path, monkeypatch):
+    listed = []
+
+    def _list_directory(path):
+        listed.append(path)
+        return []
+
+    monkeypatch.setattr(existence, "_list_directory", _list_directory)
+    paths = [str(tmp_path / str(index) / "a") for index in range(50)]
+    results = PathExistenceChecker(max_workers=1).iter_check(paths)
+    next(results)
+    results.close()
+    assert len(listed) == 1
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+import csv
+import gzip
+import io
+import json
+
+import pytest
+import six
+from sept import PathTemplateParser, Token, errors
+
+from sept_qt import export
+from sept_qt.export import export_template, guess_format, iter_resolved
+
+
+class CheckedToken(Token):
+    name = "checked"
+
+    def getValue(self, data):
+        if "code" not in data:
+            raise errors.ParsingError(0, "No code")
+        return data["code"]
+
+
+DATA = [
+    {"id": 10, "code": "café"},
+    {"code": 'b,"quoted"'},
+    {"id": 12},
+]
+ROWS = [
+    (10, "shots/café", None),
+    (1, 'shots/b,"quoted"', None),
+    (12, None, "No code"),
+]
+
+
+@pytest.fixture
+def template():
+    parser = PathTemplateParser(additional_tokens=[CheckedToken])
+    return parser.validate_template("shots/{{checked}}")
+
+
+def _read(path):
+    opener = gzip.open if path.endswith(".gz") else io.open
+    with opener(path, "rb") as fh:
+        return fh.read().decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("out.csv", ("csv", False)),
+        ("out.CSV.GZ", ("csv", True)),
+        ("out.json", ("json", False)),
+        ("out.ndjson.gz", ("ndjson", True)),
+        ("out.jsonl", ("ndjson", False)),
+        ("out.txt", (None, False)),
+        ("out.gz", (None, True)),
+    ],
+)
+def test_guess_format(path, expected):
+    assert guess_format(path) == expected
+
+
+def test_iter_resolved_keeps_errors(template):
+    rows = iter_resolved(template, iter(DATA))
+    assert next(rows) == ROWS[0]
+    assert list(rows) == ROWS[1:]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_csv(tmp_path, template, compress):
+    path = str(tmp_path / ("out.csv.gz" if compress else "out.csv"))
+    assert export_template(template, DATA, path) == 3
+    rows = list(csv.reader(io.StringIO(_read(path))))
+    assert rows == [["id", "output", "error"]] + [
+        [str(record_id), output or "", error or ""] for record_id, output, error in ROWS
+    ]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_json(tmp_path, template, compress):
+    path = str(tmp_path / ("out.json.gz" if compress else "out.json"))
+    assert export_template(template, iter(DATA), path) == 3
+    assert json.loads(_read(path)) == [
+        dict(zip(export.EXPORT_COLUMNS, row)) for row in ROWS
+    ]
+
+
+@pytest.mark.parametrize("name", ["out.ndjson", "out.jsonl.gz"])
+def test_ndjson(tmp_path, template, name):
+    path = str(tmp_path / name)
+    assert export_template(template, DATA, path) == 3
+    lines = _read(path).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        dict(zip(export.EXPORT_COLUMNS, row)) for row in ROWS
+    ]
+
+
+def test_empty_json(tmp_path, template):
+    path = str(tmp_path / "out.json")
+    assert export_template(template, [], path) == 0
+    assert json.loads(_read(path)) == []
+
+
+def test_explicit_format(tmp_path, template):
+    path = str(tmp_path / "manifest.txt")
+    export_template(template, DATA, path, export_format="jsonl", compress=True)
+    with gzip.open(path, "rb") as fh:
+        assert len(fh.read().splitlines()) == 3
+
+
+def test_unknown_format(tmp_path, template):
+    with pytest.raises(ValueError, match="export format"):
+        export_template(template, DATA, str(tmp_path / "out.txt"))
+
+
+def test_text_decodes_native_strings():
+    assert export._text(b"caf\xc3\xa9") == "café"
+    assert export._text("café") == "café"
+
+
+@pytest.mark.skipif(six.PY3, reason="The csv module writes text on Python 3")
+def test_py2_csv_writer():
+    stream = io.StringIO()
+    writer = export._Py2CsvWriter(stream)
+    writer.writerow(["café", 1, b"a,b"])
+    writer.writerow(["x", 2, ""])
+    assert stream.getvalue() == 'café,1,"a,b"\r\nx,2,\r\n'
+
+
+def test_widget_exports_in_background(qapp, tmp_path, template):
+    from Qt import QtCore
+
+    from sept_qt.preview_widget import TemplatePreviewWidget
+
+    widget = TemplatePreviewWidget(list(DATA))
+    widget.preview_template(template)
+    finished = []
+    loop = QtCore.QEventLoop()
+    widget.data_exported.connect(lambda *args: finished.append(args))
+    widget.data_exported.connect(loop.quit)
+    widget.data_export_error.connect(loop.quit)
+
+    path = str(tmp_path / "out.ndjson")
+    widget.start_export(path)
+    assert not widget.export_action.isEnabled()
+    with pytest.raises(ValueError, match="already running"):
+        widget.start_export(path)
+    QtCore.QTimer.singleShot(5000, loop.quit)
+    loop.exec_()
+
+    assert finished == [(path, 3)]
+    assert widget.export_action.isEnabled()
+    assert len(_read(path).splitlines()) == 3
+    widget.deleteLater()
+
+
+def test_widget_export_error(qapp, tmp_path, template):
+    from Qt import QtCore
+
+    from sept_qt.preview_widget import TemplatePreviewWidget
+
+    widget = TemplatePreviewWidget(list(DATA))
+    widget.preview_template(template)
+    failures = []
+    loop = QtCore.QEventLoop()
+    widget.data_export_error.connect(failures.append)
+    widget.data_export_error.connect(loop.quit)
+
+    widget.start_export(str(tmp_path / "missing" / "out.csv"))
+    QtCore.QTimer.singleShot(5000, loop.quit)
+    loop.exec_()
+
+    assert len(failures) == 1
+    assert isinstance(failures[0], (IOError, OSError))
+    widget.deleteLater()
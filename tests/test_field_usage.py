@@ -0,0 +1,56 @@
+import types
+
+from sept import PathTemplateParser
+
+from sept_qt.field_usage import RecordProjector
+
+RECORDS = [
+    {"id": 1, "code": "v001", "status": "ip", "published_files": [{"id": 10}]},
+    {"id": 2, "code": "v002", "status": "fin", "published_files": []},
+]
+
+
+def _projector(text):
+    parser = PathTemplateParser()
+    projector = RecordProjector(parser)
+    projector.update(parser.validate_template(text))
+    return parser, projector
+
+
+def test_project_is_lazy():
+    _, projector = _projector("{{code}}")
+    consumed = []
+
+    def records():
+        for record in RECORDS:
+            consumed.append(record["id"])
+            yield record
+
+    projected = projector.project(records())
+    assert isinstance(projected, types.GeneratorType)
+    assert consumed == []
+    assert next(projected) == {"id": 1, "code": "v001"}
+    assert consumed == [1]
+
+
+def test_project_keeps_every_field_without_template():
+    projector = RecordProjector(PathTemplateParser())
+    assert list(projector.project(RECORDS)) == RECORDS
+
+
+def test_project_passes_through_records_missing_fields():
+    _, projector = _projector("{{code}}/{{status}}")
+    records = [{"id": 3, "code": "v003"}] + RECORDS
+    projected = list(projector.project(records))
+    assert projected[0] is records[0]
+    assert projected[1:] == [
+        {"id": 1, "code": "v001", "status": "ip"},
+        {"id": 2, "code": "v002", "status": "fin"},
+    ]
+
+
+def test_update_only_reports_token_changes():
+    parser, projector = _projector("{{code}}")
+    assert not projector.update(parser.validate_template("shots/{{code}}"))
+    assert projector.update(parser.validate_template("{{code}}/{{status}}"))
+    assert projector.fields == ("code", "id", "status")
@@ -0,0 +1,108 @@
+import io
+
+import pytest
+from sept import PathTemplateParser
+
+TEMPLATES = (
+    "{{lower:name}}/a",
+    "{{ lower:name }}/a",
+    "{{lower:name}}/a\n",
+)
+
+
+@pytest.fixture
+def widget_factory(qapp):
+    from sept_qt.file_input_widget import FileTemplateInputWidget
+
+    widgets = []
+
+    def factory(**kwargs):
+        widget = FileTemplateInputWidget(PathTemplateParser(), **kwargs)
+        widgets.append(widget)
+        return widget
+
+    yield factory
+    for widget in widgets:
+        widget.deleteLater()
+
+
+def _write(tmp_path, text):
+    path = str(tmp_path / "template.sept")
+    with io.open(path, "w", encoding="utf-8", newline="") as fh:
+        fh.write(text)
+    return path
+
+
+@pytest.mark.parametrize("text", TEMPLATES)
+def test_load_path_parses_once(widget_factory, tmp_path, text):
+    widget = widget_factory()
+    widget.load_path(_write(tmp_path, text))
+    assert widget.template is not None
+    assert widget.parse_count == 1
+
+
+@pytest.mark.parametrize("text", TEMPLATES)
+def test_async_load_path_parses_once(qapp, widget_factory, tmp_path, text):
+    from Qt import QtCore
+
+    widget = widget_factory(async_io=True)
+    loop = QtCore.QEventLoop()
+    widget.template_loaded.connect(lambda path: loop.quit())
+    QtCore.QTimer.singleShot(5000, loop.quit)
+    widget.load_path(_write(tmp_path, text))
+    loop.exec_()
+    assert widget.template is not None
+    assert widget.parse_count == 1
+
+
+def test_disk_path_parses_once(widget_factory, tmp_path):
+    widget = widget_factory(disk_path=_write(tmp_path, TEMPLATES[1]))
+    assert widget.template is not None
+    assert widget.parse_count == 1
+
+
+def _write_bundle(tmp_path):
+    from sept_qt.template_bundle import TemplateBundle
+
+    parser = PathTemplateParser()
+    bundle = TemplateBundle()
+    bundle.set_template("shot", parser.validate_template(TEMPLATES[0]), parser)
+    path = str(tmp_path / "templates.septbundle")
+    bundle.save(path)
+    return path
+
+
+@pytest.mark.parametrize("async_io", (False, True))
+def test_load_bundle_entry(qapp, widget_factory, tmp_path, monkeypatch, async_io):
+    import threading
+
+    from Qt import QtCore, QtWidgets
+
+    from sept_qt import file_input_widget
+
+    path = _write_bundle(tmp_path)
+    listing_threads = []
+    bundle_names = file_input_widget._bundle_names
+
+    def _bundle_names(path):
+        listing_threads.append(threading.current_thread())
+        return bundle_names(path)
+
+    monkeypatch.setattr(file_input_widget, "_bundle_names", _bundle_names)
+    monkeypatch.setattr(
+        QtWidgets.QFileDialog, "getOpenFileName", lambda *args: (path, "")
+    )
+    monkeypatch.setattr(
+        QtWidgets.QInputDialog, "getItem", lambda *args: (args[3][0], True)
+    )
+    widget = widget_factory(async_io=async_io)
+    loop = QtCore.QEventLoop()
+    widget.template_loaded.connect(lambda path: loop.quit())
+    QtCore.QTimer.singleShot(5000, loop.quit)
+    widget._handle_load_disk_button_clicked()
+    if async_io:
+        loop.exec_()
+    assert widget._line_widget.toPlainText() == TEMPLATES[0]
+    assert widget.parse_count == 1
+    is_main_thread = listing_threads == [threading.current_thread()]
+    assert is_main_thread != async_io
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so nothing is already in sys.modules.
+_IMPORT_WITHOUT_SUBPROCESSES = """
+import subprocess
+import sys
+
+sys.path.insert(0, {root!r})
+spawned = []
+
+
+class NoPopen(subprocess.Popen):
+    def __init__(self, args, *a, **kw):
+        spawned.append(args)
+        raise RuntimeError("Spawned a subprocess: {{!r}}".format(args))
+
+
+subprocess.Popen = NoPopen
+import sept_qt
+
+assert not spawned, spawned
+"""
+
+
+def _run(code):
+    process = subprocess.Popen(
+        [sys.executable, "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    stdout, stderr = process.communicate()
+    return process.returncode, stderr.decode("utf-8", "replace")
+
+
+def test_import_spawns_no_subprocess():
+    returncode, stderr = _run(_IMPORT_WITHOUT_SUBPROCESSES.format(root=ROOT))
+    assert returncode == 0, stderr
@@ -0,0 +1,57 @@
+import pytest
+from sept import PathTemplateParser
+
+
+@pytest.fixture
+def widget(qapp):
+    from sept_qt.input_widget import TemplateInputWidget
+
+    widget = TemplateInputWidget(PathTemplateParser())
+    yield widget
+    widget.deleteLater()
+
+
+def _type(widget, text):
+    from Qt import QtTest
+
+    QtTest.QTest.keyClicks(widget._line_widget, text)
+
+
+def test_typing_is_undone_in_one_step(widget):
+    from Qt import QtGui
+
+    widget.setText("shots/")
+    widget._line_widget.moveCursor(QtGui.QTextCursor.End)
+    _type(widget, "{{lower:name}}")
+    assert widget._line_widget.toPlainText() == "shots/{{lower:name}}"
+    widget.undo()
+    assert widget._line_widget.toPlainText() == "shots/"
+    # Loading the text is its own step.
+    widget.undo()
+    assert widget._line_widget.toPlainText() == ""
+    widget.redo()
+    widget.redo()
+    assert widget._line_widget.toPlainText() == "shots/{{lower:name}}"
+
+
+def test_context_menu_uses_history(widget):
+    menu = widget._build_context_menu()
+    actions = dict((action.objectName(), action) for action in menu.actions())
+    assert not actions["edit-undo"].isEnabled()
+    menu.deleteLater()
+
+    widget.setText("{{lower:name}}")
+    menu = widget._build_context_menu()
+    actions = dict((action.objectName(), action) for action in menu.actions())
+    assert actions["edit-undo"].isEnabled()
+    assert not actions["edit-redo"].isEnabled()
+    actions["edit-undo"].trigger()
+    assert widget._line_widget.toPlainText() == ""
+    menu.deleteLater()
+
+    menu = widget._build_context_menu()
+    actions = dict((action.objectName(), action) for action in menu.actions())
+    assert actions["edit-redo"].isEnabled()
+    actions["edit-redo"].trigger()
+    assert widget._line_widget.toPlainText() == "{{lower:name}}"
+    menu.deleteLater()
@@ -0,0 +1,101 @@
+import pytest
+
+from sept_qt.records import INTERN_SAMPLE_SIZE, CompactRecord, RecordStore
+
+RECORDS = [
+    {
+        "code": "sh010",
+        "sg_status_list": "ip",
+        "published_files": [
+            {"code": "sh010_comp_v001", "version_number": 1},
+            {"code": "sh010_comp_v002", "version_number": 2, "path": "/a"},
+        ],
+        "entity": {"type": "Shot", "id": 10},
+    },
+    {"code": "sh020", "sg_status_list": "fin", "published_files": []},
+]
+
+
+@pytest.fixture
+def store():
+    return RecordStore(RECORDS)
+
+
+def test_mapping_access(store):
+    record = store[0]
+    assert isinstance(record, CompactRecord)
+    assert record["code"] == "sh010"
+    assert record.get("code") == "sh010"
+    assert record.get("missing") is None
+    assert record.get("missing", "default") == "default"
+    assert "code" in record
+    assert "missing" not in record
+    with pytest.raises(KeyError):
+        record["missing"]
+    assert len(record) == 4
+    assert list(record) == ["code", "sg_status_list", "published_files", "entity"]
+
+
+def test_store_sequence(store):
+    assert len(store) == 2
+    assert [record["code"] for record in store] == ["sh010", "sh020"]
+    assert [record["code"] for record in store[1:]] == ["sh020"]
+    assert store[-1]["code"] == "sh020"
+
+
+def test_nested_views(store):
+    published_files = store[0]["published_files"]
+    assert isinstance(published_files, tuple)
+    assert [item["version_number"] for item in published_files] == [1, 2]
+    assert published_files[0].get("path") is None
+    assert "path" not in published_files[0]
+    assert published_files[1]["path"] == "/a"
+    assert len(published_files[0]) == 2
+    assert store[0]["entity"]["type"] == "Shot"
+    assert store[1]["published_files"] == []
+
+
+def test_keys_added_later(store):
+    store.append({"code": "sh030", "sg_cut_in": 1001})
+    assert store[2]["sg_cut_in"] == 1001
+    assert "sg_status_list" not in store[2]
+    # Earlier rows are shorter than the schema and miss the new key.
+    for record in store[:2]:
+        assert record.get("sg_cut_in") is None
+        assert "sg_cut_in" not in record
+        with pytest.raises(KeyError):
+            record["sg_cut_in"]
+        assert "sg_cut_in" not in list(record)
+        assert len(record) == len(record.to_dict())
+
+
+def test_to_dicts_round_trip(store):
+    records = RECORDS + [{"code": "sh030", "sg_cut_in": 1001}]
+    store.extend(records[2:])
+    dicts = store.to_dicts()
+    assert dicts == records
+    assert RecordStore(dicts).to_dicts() == records
+    # Views compare equal to dictionaries, nested lists are read back as tuples.
+    assert store[2] == records[2]
+
+
+def test_repeated_strings_are_shared():
+    count = INTERN_SAMPLE_SIZE * 2
+    store = RecordStore(
+        {"code": "sh{:04d}".format(index), "sg_status_list": "".join(["i", "p"])}
+        for index in range(count)
+    )
+    assert store[0]["sg_status_list"] is store[count - 1]["sg_status_list"]
+    tables = dict((key, table) for (_, key), table in store._strings.items())
+    # Unique codes stop being shared instead of filling the table.
+    assert tables["code"] is None
+    assert len(tables["sg_status_list"].strings) == 1
+
+
+def test_sharing_can_be_disabled():
+    store = RecordStore(
+        [{"status": "".join(["i", "p"])}, {"status": "".join(["i", "p"])}],
+        intern_max_length=0,
+    )
+    assert store[0]["status"] == store[1]["status"]
+    assert store[0]["status"] is not store[1]["status"]
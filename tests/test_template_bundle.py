@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from sept import PathTemplateParser, Token
+
+from sept_qt.documentation_bundle import parser_fingerprint
+from sept_qt.template_bundle import TemplateBundle, is_bundle_path
+
+
+class StatusToken(Token):
+    name = "status"
+
+    def getValue(self, data):
+        return data.get("sg_status_list")
+
+
+class CountingParser(PathTemplateParser):
+    def __init__(self, *args, **kwargs):
+        super(CountingParser, self).__init__(*args, **kwargs)
+        self.parse_count = 0
+
+    def validate_template(self, template_str):
+        self.parse_count += 1
+        return super(CountingParser, self).validate_template(template_str)
+
+
+@pytest.fixture
+def parser():
+    return CountingParser()
+
+
+@pytest.fixture
+def bundle(parser):
+    bundle = TemplateBundle(metadata={"show": "demo"})
+    bundle.set_template(
+        "shot", parser.validate_template("{{lower:name}}/a"), parser, {"a": 1}
+    )
+    bundle.set_template("asset", parser.validate_template("{{upper:code}}"), parser)
+    parser.parse_count = 0
+    return bundle
+
+
+def test_is_bundle_path():
+    assert is_bundle_path("/a/b.septbundle")
+    assert is_bundle_path("/a/b.SEPTBUNDLE")
+    assert not is_bundle_path("/a/b.sept")
+
+
+def test_string_round_trip(bundle, parser):
+    loaded = TemplateBundle.from_string(bundle.to_string())
+    assert loaded.names() == ["shot", "asset"]
+    assert loaded.fingerprint == bundle.fingerprint
+    assert loaded.metadata == {"show": "demo"}
+    assert loaded.entries == bundle.entries
+    assert loaded.entries["shot"].tokens == ["name"]
+    assert loaded.entries["shot"].metadata == {"a": 1}
+
+
+def test_save_load_round_trip(bundle, tmp_path):
+    path = str(tmp_path / "templates.septbundle")
+    bundle.save(path)
+    bundle.save(path)
+    assert not (tmp_path / "templates.septbundle.tmp").exists()
+    loaded = TemplateBundle.load(path)
+    assert loaded.entries == bundle.entries
+    assert loaded.template_str("asset") == "{{upper:code}}"
+
+
+def test_unsupported_format_version(bundle):
+    payload = json.loads(bundle.to_string())
+    payload["format_version"] = 999
+    with pytest.raises(ValueError):
+        TemplateBundle.from_string(json.dumps(payload))
+
+
+def test_loaded_entries_are_trusted(bundle, parser):
+    loaded = TemplateBundle.from_string(bundle.to_string())
+    assert loaded.is_trusted("shot", parser)
+    assert loaded.is_trusted("shot", parser_fingerprint(parser))
+    assert loaded.validate(parser) == {}
+    assert parser.parse_count == 0
+
+
+def test_changed_text_is_not_trusted(bundle, parser):
+    payload = json.loads(bundle.to_string())
+    payload["templates"]["shot"]["template"] = "{{lower:name}}/b"
+    loaded = TemplateBundle.from_string(json.dumps(payload))
+    assert not loaded.is_trusted("shot", parser)
+    assert loaded.is_trusted("asset", parser)
+    assert loaded.validate(parser) == {}
+    assert parser.parse_count == 1
+    assert loaded.is_trusted("shot", parser)
+
+
+def test_unvalidated_entry_is_not_trusted(bundle, parser):
+    bundle.entries["shot"] = bundle.entries["shot"]._replace(valid=None)
+    assert not bundle.is_trusted("shot", parser)
+
+
+def test_other_parser_is_not_trusted(bundle):
+    other = PathTemplateParser(additional_tokens=[StatusToken])
+    assert not bundle.is_trusted("shot", other)
+    assert not bundle.is_trusted("shot", "another fingerprint")
+
+
+def test_validate_reports_invalid_entries(bundle, parser):
+    payload = json.loads(bundle.to_string())
+    payload["templates"]["shot"]["template"] = "{{missing:name}}"
+    loaded = TemplateBundle.from_string(json.dumps(payload))
+    invalid = loaded.validate(parser)
+    assert list(invalid) == ["shot"]
+    assert loaded.entries["shot"].valid is False
+    assert loaded.entries["shot"].tokens == []
+    # The failed result is trusted until the text or parser changes.
+    assert loaded.validate(parser) == invalid
+    assert parser.parse_count == 1
+
+
+def test_fingerprint_change_resets_other_entries(bundle):
+    other = PathTemplateParser(additional_tokens=[StatusToken])
+    bundle.set_template("status", other.validate_template("{{status}}"), other)
+    assert bundle.fingerprint == parser_fingerprint(other)
+    assert bundle.entries["status"].valid is True
+    for name in ("shot", "asset"):
+        assert bundle.entries[name].valid is None
+        assert bundle.entries[name].error is None
+        assert not bundle.is_trusted(name, other)
+    assert bundle.is_trusted("status", other)
+    assert bundle.validate(other) == {}
+    assert bundle.is_trusted("shot", other)
+
+
+def test_template_is_parsed_once(bundle, parser):
+    loaded = TemplateBundle.from_string(bundle.to_string())
+    template = loaded.template("shot", parser)
+    assert loaded.template("shot", parser) is template
+    assert parser.parse_count == 1
+    assert template.resolve({"name": "ABC"}) == "abc/a"
@@ -0,0 +1,128 @@
+import io
+import os
+
+import pytest
+from sept import Operator, PathTemplateParser, Token
+
+from sept_qt.template_library import RefreshStats, TemplateLibraryIndex
+
+
+class StatusToken(Token):
+    name = "status"
+
+    def getValue(self, data):
+        return data.get("sg_status_list")
+
+
+class ReverseOperator(Operator):
+    name = "reverse"
+
+    def execute(self, input_data):
+        return input_data[::-1]
+
+
+def _write(root, name, text, mtime=None):
+    path = os.path.join(str(root), name)
+    folder = os.path.dirname(path)
+    if not os.path.isdir(folder):
+        os.makedirs(folder)
+    with io.open(path, "w", encoding="utf-8") as fh:
+        fh.write(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "library"
+    root.mkdir()
+    _write(root, "a.sept", "{{lower:status}}", mtime=1000)
+    _write(root, "shots/b.sept", "{{status}}/100%_done", mtime=1000)
+    _write(root, "broken.sept", "{{lower:status", mtime=1000)
+    _write(root, "notes.txt", "ignored", mtime=1000)
+    return root
+
+
+def _index(library, tmp_path, tokens=(StatusToken,)):
+    parser = PathTemplateParser(additional_tokens=list(tokens))
+    return TemplateLibraryIndex(
+        str(library), parser, index_path=str(tmp_path / "index.sqlite")
+    )
+
+
+def test_refresh_indexes_templates(library, tmp_path):
+    index = _index(library, tmp_path)
+    assert index.refresh() == RefreshStats(3, 0, 0, 0)
+    records = {record.path: record for record in index.search()}
+    assert sorted(records) == ["a.sept", "broken.sept", os.path.join("shots", "b.sept")]
+    assert records["a.sept"].valid
+    assert records["a.sept"].tokens == ["status"]
+    assert not records["broken.sept"].valid
+    assert records["broken.sept"].error
+
+
+def test_refresh_skips_unchanged_files(library, tmp_path, monkeypatch):
+    index = _index(library, tmp_path)
+    index.refresh()
+    read = []
+    original = TemplateLibraryIndex._read_record
+
+    def _read_record(self, path, full_path, stat):
+        read.append(path)
+        return original(self, path, full_path, stat)
+
+    monkeypatch.setattr(TemplateLibraryIndex, "_read_record", _read_record)
+    assert _index(library, tmp_path).refresh() == RefreshStats(0, 0, 0, 3)
+    assert read == []
+
+    # Touched without changing the content, only the mtime is updated.
+    _write(library, "a.sept", "{{lower:status}}", mtime=2000)
+    _write(library, "broken.sept", "{{lower:status}}", mtime=2000)
+    assert index.refresh() == RefreshStats(0, 1, 0, 2)
+    assert sorted(read) == ["a.sept", "broken.sept"]
+    assert all(record.valid for record in index.search())
+
+
+def test_refresh_removes_deleted_files(library, tmp_path):
+    index = _index(library, tmp_path)
+    index.refresh()
+    os.remove(str(library / "a.sept"))
+    assert index.refresh() == RefreshStats(0, 0, 1, 2)
+    assert "a.sept" not in [record.path for record in index.search()]
+
+
+def test_parser_change_revalidates(tmp_path):
+    library = tmp_path / "library"
+    library.mkdir()
+    _write(library, "a.sept", "{{reverse:status}}", mtime=1000)
+    _write(library, "b.sept", "{{lower:status}}", mtime=1000)
+    index_path = str(tmp_path / "index.sqlite")
+
+    index = TemplateLibraryIndex(str(library), PathTemplateParser(), index_path)
+    index.refresh()
+    assert [record.valid for record in index.search()] == [False, True]
+
+    parser = PathTemplateParser(additional_operators=[ReverseOperator])
+    index = TemplateLibraryIndex(str(library), parser, index_path)
+    assert index.refresh() == RefreshStats(0, 1, 0, 1)
+    assert [record.valid for record in index.search()] == [True, True]
+    assert index.refresh() == RefreshStats(0, 0, 0, 2)
+
+
+def test_search_escapes_like_wildcards(library, tmp_path):
+    index = _index(library, tmp_path)
+    index.refresh()
+    _write(library, "c.sept", "{{status}}/100x_done", mtime=1000)
+    _write(library, "d.sept", "{{status}}/100%xdone", mtime=1000)
+    index.refresh()
+    assert [record.path for record in index.search("100%_")] == [
+        os.path.join("shots", "b.sept")
+    ]
+    assert [record.path for record in index.search("lower status", True)] == ["a.sept"]
+    assert [record.path for record in index.search("status", valid_only=True)] == [
+        "a.sept",
+        "c.sept",
+        "d.sept",
+        os.path.join("shots", "b.sept"),
+    ]
@@ -0,0 +1,108 @@
+import threading
+import time
+
+import pytest
+
+from sept_qt.worker_pool import WorkerPool
+
+
+def _job(value, delay=0.0):
+    def job():
+        time.sleep(delay)
+        return value
+
+    return job
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_imap_unordered_yields_every_result(max_workers):
+    pool = WorkerPool(max_workers)
+    tasks = ((index, _job(index * 2)) for index in range(20))
+    results = dict(pool.imap_unordered(tasks))
+    assert results == dict((index, index * 2) for index in range(20))
+
+
+def test_imap_unordered_reads_tasks_lazily():
+    pool = WorkerPool(2)
+    read = []
+
+    def tasks():
+        for index in range(10):
+            read.append(index)
+            yield index, _job(index)
+
+    results = pool.imap_unordered(tasks())
+    next(results)
+    assert len(read) <= 3
+    results.close()
+
+
+def test_single_worker_runs_inline():
+    pool = WorkerPool(1)
+    threads = list(pool.imap_unordered([(0, threading.current_thread)]))
+    assert threads == [(0, threading.current_thread())]
+
+
+def test_job_error_is_raised():
+    pool = WorkerPool(4)
+
+    def fail():
+        raise KeyError("broken")
+
+    with pytest.raises(KeyError):
+        list(pool.imap_unordered([(0, _job(0)), (1, fail), (2, _job(2))]))
+
+
+def test_batch_waits_for_jobs_queued_while_iterating():
+    pool = WorkerPool(8)
+    batch = pool.batch()
+    batch.put("split", _job(list(range(16))))
+    results = []
+    for key, value in batch:
+        if key == "split":
+            for index in value:
+                batch.put(index, _job(index, 0.01))
+        else:
+            results.append(value)
+    assert sorted(results) == list(range(16))
+
+
+def test_threads_are_capped_and_exit_when_idle():
+    pool = WorkerPool(3, idle_timeout=0.05)
+    lock = threading.Lock()
+    active = [0, 0]
+
+    def job():
+        with lock:
+            active[0] += 1
+            active[1] = max(active)
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+
+    batch = pool.batch()
+    for index in range(30):
+        batch.put(index, job)
+    assert len(list(batch)) == 30
+    assert active[1] == 3
+    assert pool._workers == 3
+
+    deadline = time.time() + 2
+    while pool._workers and time.time() < deadline:
+        time.sleep(0.01)
+    assert pool._workers == 0
+    # The pool starts new threads for later batches.
+    assert dict(pool.imap_unordered([(0, _job(1))])) == {0: 1}
+
+
+def test_closed_batch_skips_jobs_not_started():
+    pool = WorkerPool(2)
+    ran = []
+    batch = pool.batch()
+    for index in range(20):
+        batch.put(index, lambda index=index: ran.append(index) or time.sleep(0.01))
+    iterator = iter(batch)
+    next(iterator)
+    iterator.close()
+    time.sleep(0.1)
+    assert len(ran) < 20
@@ -1,15 +1,26 @@
-import json
 import os
 
 from PySide import QtGui
 
 from sept import PathTemplateParser, Token
 from sept_qt import TemplatePreviewWidget, DocumentationWidget, FileTemplateInputWidget
+from sept_qt.data import VERSION_FIELDS, ShotGridLoader
+from sept_qt.dataset_stream import iter_records
+from sept_qt.derived_fields import (
+    PUBLISHED_FILE_EXTENSION,
+    PUBLISHED_FILE_FIELDS,
+    PUBLISHED_FILE_VERSION_NUMBER,
+    enrich,
+)
 
 
 def get_tokens():
     """
     Setting up Tokens you want to expose to the user.
+
+    Each Token lists the data fields it reads in `data_fields`, so only the
+        fields a template needs are loaded, see
+        `ShotGridLoader.fields_for_template`.
     """
 
     class StatusToken(Token):
@@ -18,6 +29,7 @@ def get_tokens():
         """
 
         name = "status"
+        data_fields = ("sg_status_list",)
 
         def getValue(self, data):
             return data.get("sg_status_list")
@@ -28,6 +40,7 @@ def get_tokens():
         """
 
         name = "lastname"
+        data_fields = ("user.HumanUser.lastname",)
 
         def getValue(self, data):
             return data.get("user.HumanUser.lastname", "")
@@ -38,6 +51,7 @@ def get_tokens():
         """
 
         name = "firstname"
+        data_fields = ("user.HumanUser.firstname",)
 
         def getValue(self, data):
             return data.get("user.HumanUser.firstname", "")
@@ -48,6 +62,7 @@ def get_tokens():
         """
 
         name = "user"
+        data_fields = ("user.HumanUser.name",)
 
         def getValue(self, data):
             return data.get("user.HumanUser.name", "")
@@ -58,6 +73,7 @@ def get_tokens():
         """
 
         name = "shot"
+        data_fields = ("entity.Shot.code",)
 
         def getValue(self, data):
             return data.get("entity.Shot.code", "")
@@ -68,6 +84,7 @@ def get_tokens():
         """
 
         name = "sequence"
+        data_fields = ("entity.Sequence.code", "entity.Shot.sg_sequence.Sequence.code")
 
         def getValue(self, data):
             value = data.get("entity.Sequence.code", "")
@@ -81,6 +98,7 @@ def get_tokens():
         """
 
         name = "project"
+        data_fields = ("project.Project.tank_name", "project.Project.code")
 
         def getValue(self, data):
             value = data.get("project.Project.tank_name", "")
@@ -92,6 +110,7 @@ def get_tokens():
         """
 
         name = "name"
+        data_fields = ("code",)
 
         def getValue(self, data):
             return data.get("code", "")
@@ -102,14 +121,12 @@ def get_tokens():
         """
 
         name = "version"
+        data_fields = ("published_file.version_number",)
 
         def getValue(self, data):
-            published_files = data.get("published_files", [])
-            version_number = None
-            for published_file in published_files:
-                if published_file.get("version_number"):
-                    version_number = published_file.get("version_number")
-                    break
+            # Precomputed when the data is loaded, see sept_qt.derived_fields,
+            #   or computed here for data that was not enriched.
+            version_number = PUBLISHED_FILE_VERSION_NUMBER.get(data)
             if version_number is None:
                 return version_number
             return str(version_number)
@@ -120,25 +137,12 @@ def get_tokens():
         """
 
         name = "extension"
+        data_fields = ("published_file.extension",)
 
         def getValue(self, data):
-            published_files = data.get("published_files", [])
-            extension = None
-            for published_file in published_files:
-                if published_file.get("path"):
-                    path = published_file.get("path")
-                    if path.get("link_type") == "local":
-                        local_path = path.get("local_path") or path.get(
-                            "local_path_linux"
-                        )
-                    elif path.get("link_type") == "web":
-                        local_path = path.get("url")[len("file://") :]
-                    else:
-                        return None
-                    base, ext = os.path.splitext(local_path)
-                    extension = ext.lstrip(".")
-                    break
-            return extension
+            # Precomputed when the data is loaded, see sept_qt.derived_fields,
+            #   or computed here for data that was not enriched.
+            return PUBLISHED_FILE_EXTENSION.get(data)
 
     return [
         StatusToken,
@@ -154,60 +158,35 @@ def get_tokens():
     ]
 
 
-def live_version_data():
+def live_version_data(template=None, parser=None):
     """
     live_version_data is an example of how you might prepare data for your
         sept application.
+
+    If a validated `template` is passed, only the fields its Tokens read are
+        requested from ShotGrid.
     """
     # Setting up input data
     from shotgun_api3 import Shotgun
 
-    sg = Shotgun(
-        "https://mysite.shotgunstudio.com", login="mylogin", password="mypassword"
+    def connect():
+        return Shotgun(
+            "https://mysite.shotgunstudio.com", login="mylogin", password="mypassword"
+        )
+
+    # Fetch up to 4 pages at once, each over its own connection.
+    loader = ShotGridLoader(
+        connect(),
+        derived_fields=PUBLISHED_FILE_FIELDS,
+        connection_factory=connect,
+        max_workers=4,
     )
-    fields = [
-        "code",
-        "description",
-        "user.HumanUser.firstname",
-        "user.HumanUser.lastname",
-        "user.HumanUser.name",
-        "sg_status_list",
-        "project.Project.tank_name",
-        "project.Project.code",
-        "entity.Shot.code",
-        "entity.Shot.sg_sequence.Sequence.code",
-        "entity.Sequence.code",
-        "published_files",
-    ]
-    versions = sg.find(
-        entity_type="Version",
-        filters=[["project.Project.id", "is", 128]],
-        fields=fields,
-        limit=5,
+    fields = VERSION_FIELDS
+    if template is not None:
+        fields = loader.fields_for_template(template, parser)
+    versions = loader.load_versions(
+        filters=[["project.Project.id", "is", 128]], fields=fields
     )
-
-    # Fill out published file data
-    published_files_ids = []
-    for version in versions:
-        published_files = version.get("published_files")
-        for published_file in published_files:
-            if not published_file.get("version_number") or not published_file.get(
-                "path"
-            ):
-                published_files_ids.append(published_file.get("id"))
-    if published_files_ids:
-        results = sg.find(
-            entity_type="PublishedFile",
-            filters=[["id", "in", published_files_ids]],
-            fields=["version_number", "path"],
-        )
-        for result in results:
-            for version in versions:
-                published_files = version.get("published_files")
-                for published_file in published_files:
-                    if result.get("id") == published_file.get("id"):
-                        published_file["version_number"] = result.get("version_number")
-                        published_file["path"] = result.get("path")
     return versions
 
 
@@ -218,9 +197,8 @@ def get_version_data():
 
     Plus, not like I'm going to hard code my credentials or anything
     """
-    with open(os.path.join(os.path.dirname(__file__), "usage_data.json"), "r") as fh:
-        version_data = json.loads(fh.read())
-    return version_data
+    path = os.path.join(os.path.dirname(__file__), "usage_data.json")
+    return list(enrich(iter_records(path), PUBLISHED_FILE_FIELDS))
 
 
 class Dialog(QtGui.QDialog):